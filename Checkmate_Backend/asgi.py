@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+실시간 출석 스트림(api/attendance/sessions/<code>/events/)은 비동기 뷰로 이벤트 루프에서
+연결을 유지하므로 이 진입점으로 실행해야 한다. 예: uvicorn Checkmate_Backend.asgi:application
+이벤트는 프로세스 내에서만 전달되므로 대시보드 스트림은 단일 워커(또는 세션 단위 고정 라우팅)로 운영한다.
 """
 
 import os
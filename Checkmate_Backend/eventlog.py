@@ -0,0 +1,162 @@
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# 구조화 이벤트 로그 (JSON 한 줄 = 이벤트 1건).
+# 요청 스레드는 레코드를 메모리 큐에 넣기만 하고, 포맷과 출력(write syscall)은 리스너 스레드가 맡는다.
+# 모든 이벤트에 요청 id(request_id, X-Request-ID 로 전파)가 붙고, 출석 세션 관련 이벤트에는 세션 코드(session)가 붙어
+# 세션 시작 → 라즈베리파이 알림 → BLE 광고 → 출석 체크 → 종료 흐름을 grep '"session": "<세션 코드>"' 한 번으로 따라갈 수 있다.
+
+logger = logging.getLogger('checkmate.events')
+
+_context = contextvars.ContextVar('checkmate_log_context', default={})
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+def _config(key):
+    return settings.EVENT_LOG[key]
+
+
+def current_request_id():
+    return _context.get().get('request_id')
+
+
+def log_event(event, level=logging.INFO, sample=None, exc_info=False, **fields):
+    """이벤트 1건 기록 - sample 을 주면 EVENT_LOG['SAMPLE_RATES'][sample] 비율로만 남긴다 (sample_rate 필드로 표시)"""
+    if not logger.isEnabledFor(level):
+        return
+    if sample is not None:
+        rate = _config('SAMPLE_RATES').get(sample, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                return
+            fields['sample_rate'] = rate
+    logger.log(level, event, exc_info=exc_info, extra={'fields': fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """로그 레코드 → JSON 한 줄 (ts, level, logger, event, request_id, 이벤트 필드)"""
+
+    def format(self, record):
+        data = {
+            "ts": self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        context = getattr(record, 'context', None)
+        data.update(_context.get() if context is None else context)
+        data.update(getattr(record, 'fields', None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BufferedHandler(QueueHandler):
+    """비차단 로그 핸들러 - 레코드를 크기 제한 큐에 넣고 리스너 스레드가 stderr(또는 파일)에 쓴다
+    큐가 가득 차면 요청을 막지 않고 버리며 dropped 로 센다"""
+
+    def __init__(self, filename=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = WatchedFileHandler(filename, encoding='utf-8') if filename else logging.StreamHandler(sys.stderr)
+        self.dropped = 0
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # 포맷은 리스너 스레드에서 대상 핸들러가 한다
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # 호출 스레드에서만 알 수 있는 값(메시지 인자, 예외, 요청 컨텍스트)만 확정해 넘긴다
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, 'context', None) is None:
+            record.context = _context.get()
+        return record
+
+    def enqueue(self, record):
+        if self._listener is None:
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        # 관리 명령 등 로그를 쓰지 않는 프로세스에서 스레드가 뜨지 않도록 첫 기록 시점에 시작
+        with self._lock:
+            if self._listener is None:
+                listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                listener.start()
+                atexit.register(listener.stop)  # 종료 전 큐에 남은 로그를 마저 쓴다
+                self._listener = listener
+
+    def flush(self):
+        """큐에 쌓인 레코드를 모두 쓸 때까지 대기 (테스트/종료용)"""
+        if self._listener is not None:
+            self.queue.join()
+        self.target.flush()
+
+
+class RequestContextMiddleware:
+    """요청 id 를 정해(X-Request-ID 헤더가 있으면 이어받음) 이 요청의 모든 로그에 붙이고 응답 헤더로 돌려준다"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _bind(request):
+        request_id = (request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16])[:64]
+        return request_id, _context.set({"request_id": request_id})
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_id, token = self._bind(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _context.reset(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request_id, token = self._bind(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _context.reset(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+@contextmanager
+def log_context(**fields):
+    """이 블록에서 남기는 로그에 필드를 추가 (백그라운드 스레드에서 원래 요청의 request_id 를 이어 쓸 때 등)"""
+    token = _context.set({**_context.get(), **{key: value for key, value in fields.items() if value is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
@@ -0,0 +1,365 @@
+import bisect
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils import timezone
+
+# 요청별 DB 쿼리 수/시간과 전체 처리 시간을 URL 이름(route) 단위로 집계하는 프로세스 내 메트릭.
+# 쿼리 계측은 모든 DB 연결에 한 번 설치하는 execute wrapper 가 contextvar 로 현재 요청의 누적기를 찾아 더한다.
+# contextvar 는 sync_to_async 스레드로도 복사되므로 ASGI 비동기 뷰의 쿼리도 같은 요청으로 집계된다.
+# 워커 프로세스마다 따로 집계되므로 Prometheus 는 워커별로 수집한다.
+
+logger = logging.getLogger('checkmate.metrics')
+
+_current = contextvars.ContextVar('checkmate_request_metrics', default=None)
+
+# 파라미터 자리(%s) 목록과 공백을 접어 같은 형태의 쿼리를 하나로 묶는다
+_IN_LIST = re.compile(r'\((?:%s|\?)(?:\s*,\s*(?:%s|\?))+\)')
+_SPACES = re.compile(r'\s+')
+
+
+def _config(key):
+    return settings.METRICS[key]
+
+
+def fingerprint(sql):
+    return _SPACES.sub(' ', _IN_LIST.sub('(...)', sql)).strip()
+
+
+class _RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = []  # (sql, 초) - 느린 요청의 SQL 지문용
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        current.queries += 1
+        current.db_time += elapsed
+        if len(current.statements) < _config('SLOW_SQL_CAPTURE'):
+            current.statements.append((sql, elapsed))
+
+
+def _install(connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+class RollingHistogram:
+    """고정 버킷 히스토그램 - 누적값(Prometheus 노출용)과 최근 window 구간값(분위수 계산용)을 함께 유지"""
+
+    def __init__(self, buckets, slots, slot_seconds):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.slot_seconds = slot_seconds
+        self._slots = [(None, [0] * len(self.counts)) for _ in range(slots)]
+
+    def observe(self, value, now):
+        index = bisect.bisect_left(self.buckets, value)
+        self.counts[index] += 1
+        self.total += value
+
+        epoch = int(now // self.slot_seconds)
+        position = epoch % len(self._slots)
+        slot_epoch, counts = self._slots[position]
+        if slot_epoch != epoch:
+            counts = [0] * len(self.counts)
+            self._slots[position] = (epoch, counts)
+        counts[index] += 1
+
+    def window_counts(self, now):
+        oldest = int(now // self.slot_seconds) - len(self._slots) + 1
+        merged = [0] * len(self.counts)
+        for slot_epoch, counts in self._slots:
+            if slot_epoch is not None and slot_epoch >= oldest:
+                merged = [a + b for a, b in zip(merged, counts)]
+        return merged
+
+    def window_quantile(self, q, now):
+        """최근 window 의 q 분위수 (해당 버킷 상한값, +Inf 버킷이면 마지막 상한), 관측이 없으면 None"""
+        counts = self.window_counts(now)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= rank:
+                return self.buckets[min(index, len(self.buckets) - 1)]
+
+
+class _RouteMetrics:
+    def __init__(self):
+        slots, slot_seconds = _config('WINDOW_SLOTS'), _config('SLOT_SECONDS')
+        self.requests = {}  # (method, status) → 건수
+        self.slow = 0
+        self.duration = RollingHistogram(_config('DURATION_BUCKETS_MS'), slots, slot_seconds)
+        self.db_time = RollingHistogram(_config('DURATION_BUCKETS_MS'), slots, slot_seconds)
+        self.queries = RollingHistogram(_config('QUERY_BUCKETS'), slots, slot_seconds)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.slow_requests = deque(maxlen=_config('SLOW_LOG_SIZE'))
+
+    def record(self, route, method, status, duration_ms, current):
+        now = time.monotonic()
+        db_ms = current.db_time * 1000
+        slow = duration_ms >= _config('SLOW_REQUEST_MS')
+        with self._lock:
+            metrics = self._routes.get(route)
+            if metrics is None:
+                metrics = self._routes[route] = _RouteMetrics()
+            key = (method, status)
+            metrics.requests[key] = metrics.requests.get(key, 0) + 1
+            metrics.duration.observe(duration_ms, now)
+            metrics.db_time.observe(db_ms, now)
+            metrics.queries.observe(current.queries, now)
+            if slow:
+                metrics.slow += 1
+        if slow:
+            self._record_slow(route, method, status, duration_ms, db_ms, current)
+
+    def _record_slow(self, route, method, status, duration_ms, db_ms, current):
+        statements = {}
+        for sql, elapsed in current.statements:
+            entry = statements.setdefault(fingerprint(sql), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed * 1000
+        top = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)[:_config('SLOW_SQL_TOP')]
+        entry = {
+            "at": timezone.now().isoformat(),
+            "route": route,
+            "method": method,
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "db_ms": round(db_ms, 2),
+            "queries": current.queries,
+            "sql": [{"fingerprint": sql, "count": count, "ms": round(ms, 2)} for sql, (count, ms) in top],
+        }
+        self.slow_requests.append(entry)
+        logger.warning("slow request %s %s %.1fms (db %.1fms, %d queries)",
+                       method, route, duration_ms, db_ms, current.queries)
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self.slow_requests.clear()
+
+    def render(self):
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        now = time.monotonic()
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP checkmate_requests_total Requests by route, method and status.",
+                "# TYPE checkmate_requests_total counter",
+            ]
+            for route, metrics in routes:
+                for (method, status), count in sorted(metrics.requests.items()):
+                    lines.append(
+                        f'checkmate_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}'
+                    )
+            lines += [
+                "# HELP checkmate_slow_requests_total Requests slower than the slow threshold.",
+                "# TYPE checkmate_slow_requests_total counter",
+            ]
+            lines += [f'checkmate_slow_requests_total{{route="{route}"}} {m.slow}' for route, m in routes]
+
+            for name, attr, help_text in (
+                ('checkmate_request_duration_ms', 'duration', "Total request time in milliseconds."),
+                ('checkmate_request_db_ms', 'db_time', "Database time per request in milliseconds."),
+                ('checkmate_request_queries', 'queries', "Database queries per request."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for route, metrics in routes:
+                    lines += _histogram_lines(name, route, getattr(metrics, attr))
+
+            window = _config('WINDOW_SLOTS') * _config('SLOT_SECONDS')
+            lines += [
+                f"# HELP checkmate_request_duration_ms_window Request time quantiles over the last {window}s"
+                " (bucket upper bound).",
+                "# TYPE checkmate_request_duration_ms_window gauge",
+            ]
+            for route, metrics in routes:
+                for q in (0.5, 0.95, 0.99):
+                    value = metrics.duration.window_quantile(q, now)
+                    if value is not None:
+                        lines.append(f'checkmate_request_duration_ms_window{{route="{route}",quantile="{q}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, route, histogram):
+    lines = []
+    running = 0
+    for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+        running += count
+        lines.append(f'{name}_bucket{{route="{route}",le="{bound}"}} {running}')
+    lines.append(f'{name}_sum{{route="{route}"}} {round(histogram.total, 3)}')
+    lines.append(f'{name}_count{{route="{route}"}} {running}')
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.route
+
+
+class _MeteredStream:
+    """스트리밍 응답 본문 래퍼 - 본문을 만드는 동안의 쿼리도 요청에 더하고, 다 보내거나 닫힐 때 한 번 기록"""
+
+    def __init__(self, content, record, current):
+        self._content = content
+        self._record = record
+        self._current = current
+        self._done = False
+
+    def __iter__(self):
+        self._iterator = iter(self._content)
+        return self
+
+    def __next__(self):
+        token = _current.set(self._current)
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self.close()
+            raise
+        finally:
+            _current.reset(token)
+
+    def close(self):
+        # 응답의 close() 에서도 불리므로 중간에 끊긴 연결도 기록된다
+        if not self._done:
+            self._done = True
+            self._record()
+
+
+class _AsyncMeteredStream(_MeteredStream):
+    # StreamingHttpResponse 는 iter() 가 되면 동기 본문으로 보므로 __iter__ 를 두지 않는다
+    __iter__ = None
+    __next__ = None
+
+    def __aiter__(self):
+        self._iterator = self._content.__aiter__()
+        return self
+
+    async def __anext__(self):
+        token = _current.set(self._current)
+        try:
+            return await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self.close()
+            raise
+        finally:
+            _current.reset(token)
+
+
+class MetricsMiddleware:
+    """요청별 처리 시간/DB 쿼리 수·시간을 route 단위로 집계 (동기·비동기 요청 모두 지원)
+    전체 처리 시간을 재도록 MIDDLEWARE 의 맨 앞에 둔다"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = _config('ENABLED')
+        if self.enabled:
+            connection_created.connect(_install, dispatch_uid='checkmate_metrics')
+            for connection in connections.all():
+                _install(connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        current = _RequestMetrics()
+        token = _current.set(current)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, started, current)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        current = _RequestMetrics()
+        token = _current.set(current)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, started, current)
+
+    def _finish(self, request, response, started, current):
+        # 스트리밍 응답(StreamingHttpResponse)은 본문을 다 보낼 때까지 쿼리가 이어지므로 그때 기록한다
+        # (파일 응답은 서버가 파일을 직접 보내도록 그대로 둔다)
+        if not response.streaming or getattr(response, 'file_to_stream', None) is not None:
+            self._record(request, response, started, current)
+            return response
+        stream = _AsyncMeteredStream if response.is_async else _MeteredStream
+        response.streaming_content = stream(
+            response.streaming_content, lambda: self._record(request, response, started, current), current
+        )
+        return response
+
+    @staticmethod
+    def _record(request, response, started, current):
+        duration_ms = (time.perf_counter() - started) * 1000
+        registry.record(_route(request), request.method, response.status_code, duration_ms, current)
+
+
+def _allowed(request):
+    token = _config('TOKEN')
+    if token:
+        return request.headers.get('Authorization') == f"Bearer {token}"
+    return request.META.get('REMOTE_ADDR') in _config('ALLOWED_IPS')
+
+
+def metrics_view(request):
+    """Prometheus 수집 엔드포인트"""
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def slow_requests_view(request):
+    """최근 느린 요청과 SQL 지문 (최신순)"""
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    return JsonResponse({"slow_requests": list(reversed(registry.slow_requests))},
+                        json_dumps_params={'ensure_ascii': False})
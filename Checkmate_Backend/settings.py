@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,7 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',  # 반드시 가장 위에 추가
+    'Checkmate_Backend.metrics.MetricsMiddleware',  # 전체 처리 시간을 재도록 가장 바깥에 둔다
+    'Checkmate_Backend.eventlog.RequestContextMiddleware',  # 로그용 요청 id (X-Request-ID)
+    'corsheaders.middleware.CorsMiddleware',  # 메트릭 다음, 다른 미들웨어보다 위에 둔다
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,12 +85,52 @@ WSGI_APPLICATION = 'Checkmate_Backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# CHECKMATE_DB 환경변수로 프로필 선택
+#   sqlite     : 기본 SQLite (개발용)
+#   sqlite-wal : 소규모 운영용 SQLite - WAL 저널, busy_timeout, synchronous=NORMAL, 메모리 맵 I/O
+#   postgres   : PostgreSQL - 영구 연결(CONN_MAX_AGE) + 재사용 전 연결 상태 확인
+#                PgBouncer(transaction pooling) 뒤에서 쓸 때는 CHECKMATE_DB_POOL=pgbouncer
+DB_PROFILE = os.environ.get('CHECKMATE_DB', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'checkmate'),
+            'USER': os.environ.get('POSTGRES_USER', 'checkmate'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer transaction pooling 에서는 서버 측 커서(iterator())를 쓸 수 없다
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('CHECKMATE_DB_POOL') == 'pgbouncer',
+        }
+    }
+elif DB_PROFILE == 'sqlite-wal':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'Checkmate_Backend.sqlite_tuned',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': 20,  # 잠금 대기(busy_timeout) 20초
+                'pragmas': {
+                    'journal_mode': 'WAL',          # 읽기와 쓰기가 서로를 막지 않음
+                    'synchronous': 'NORMAL',        # WAL 에서는 NORMAL 로도 커밋 내구성 유지
+                    'mmap_size': 268435456,         # 256MB 메모리 맵 I/O
+                    'cache_size': -65536,           # 페이지 캐시 64MB
+                    'temp_store': 'MEMORY',
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
     }
-}
 
 
 # Password validation
@@ -108,6 +151,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# 비밀번호 해시 프로필 - 선택한 해시가 새 비밀번호에 쓰이고, 다른 해시(또는 다른 반복 횟수)로 저장된 비밀번호는
+# 로그인 성공 시 자동으로 재해시된다. 나머지 해시는 기존 비밀번호 검증용으로만 남긴다.
+PASSWORD_HASHING = {
+    'PROFILE': os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2'),  # pbkdf2 / scrypt / argon2 (argon2-cffi 필요)
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', '600000')),
+}
+_PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'users.hashers.ConfiguredPBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHER_PROFILES[PASSWORD_HASHING['PROFILE']]] + [
+    hasher for hasher in (
+        *_PASSWORD_HASHER_PROFILES.values(),
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    ) if hasher != _PASSWORD_HASHER_PROFILES[PASSWORD_HASHING['PROFILE']]
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -156,4 +218,134 @@ SWAGGER_SETTINGS = {
     }
 }
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# 미출석 학생 결석 처리 시점
+#   'read'  : 주차별 출결 조회(WeeklyAttendanceView) 시 일괄 결석 처리 (기존 동작)
+#   'close' : 출석 세션 종료(EndAttendanceSessionView) 시 일괄 결석 처리, 조회는 읽기 전용
+ATTENDANCE_ABSENT_FILL = 'read'
+
+# 출석 체크용 활성 세션 명단 캐시 (프로세스 내, 세션 종료/수강 변경 시 즉시 무효화)
+ATTENDANCE_ROSTER_CACHE = {
+    'MAX_SESSIONS': 512,    # 보관할 최대 세션 수 (초과 시 LRU 방출, 세션당 키 2개라 캐시 항목 수는 두 배)
+    'TTL_SECONDS': 60,      # 다른 워커 프로세스의 변경이 반영되기까지의 최대 지연
+}
+
+# BLE 일괄 출석 요청 한 건에 담을 수 있는 최대 항목 수
+ATTENDANCE_BLE_BATCH_MAX = 500
+
+# 라즈베리파이(BLE 비콘) 연결 정보 및 알림 전송 설정
+RASPBERRY_PI = {
+    'HOST': os.environ.get('RASPBERRY_PI_HOST', '192.168.137.119'),
+    'PORT': int(os.environ.get('RASPBERRY_PI_PORT', 5000)),
+    'TIMEOUT': 3,               # 요청 1회 타임아웃 (초)
+    'MAX_ATTEMPTS': 5,          # 최대 전송 시도 횟수
+    'BACKOFF_SECONDS': 1,       # 재시도 간격 1, 2, 4, ... 초
+    'BACKOFF_MAX_SECONDS': 30,
+    'WORKERS': 4,               # 백그라운드 전송 스레드 수 (= 동시에 알림을 보낼 수 있는 장치 수)
+    'HEALTH_INTERVAL_SECONDS': 10,  # 백그라운드 연결 확인(/ping) 주기
+    'HEALTH_TIMEOUT': 2,
+    'HEALTH_MAX_AGE_SECONDS': 30,   # 캐시된 상태가 이보다 오래되면 요청 시점에 다시 확인
+}
+
+# 렌더링된 QR 이미지(PNG) 캐시
+QR_CACHE = {
+    'MAX_ENTRIES': 256,
+    'TTL_SECONDS': 3600,
+}
+
+# 회전형 QR 출석 토큰
+QR_TOKEN = {
+    'ROTATE_SECONDS': 30,           # 토큰(QR 이미지) 교체 주기
+    'GRACE_WINDOWS': 1,             # 직전 구간 토큰까지 허용 (스캔 직후 회전되는 경우 대비)
+    'ALLOW_STATIC_CODE': False,     # True 면 구버전 정적 세션 코드 QR 도 허용 (재사용 공격에 취약)
+}
+
+# 출석 체크 지연 쓰기 (write-behind)
+# 켜면 검증된 출석을 스풀 파일에 먼저 남기고 202 로 즉시 응답하며,
+# 백그라운드 플러셔가 FLUSH_INTERVAL_MS 또는 FLUSH_MAX_RECORDS 마다 모아서 한 트랜잭션으로 커밋한다.
+ATTENDANCE_WRITE_BEHIND = {
+    'ENABLED': os.environ.get('ATTENDANCE_WRITE_BEHIND') == '1',
+    'SPOOL_DIR': os.environ.get('ATTENDANCE_SPOOL_DIR', BASE_DIR / 'var' / 'checkin-spool'),
+    'FLUSH_INTERVAL_MS': 200,
+    'FLUSH_MAX_RECORDS': 500,
+    'FSYNC': True,              # 접수 응답 전에 스풀 파일을 디스크에 기록 (끄면 전원 장애 시 유실 가능)
+}
+
+# 교수 대시보드용 실시간 출석 이벤트 스트림 (SSE, ASGI 서버에서 사용)
+ATTENDANCE_LIVE_FEED = {
+    'BUFFER_SIZE': 1000,        # 세션별 재연결(Last-Event-ID) 용으로 보관하는 최근 이벤트 수
+    'HEARTBEAT_SECONDS': 15,    # 이벤트가 없을 때 연결 유지용 주석 전송 간격
+    'MAX_SESSIONS': 512,
+    'TTL_SECONDS': 6 * 3600,
+}
+
+# JWT 인증 시 토큰(jti)별 사용자 조회 캐시
+JWT_USER_CACHE = {
+    'MAX_TOKENS': 10000,
+    'TTL_SECONDS': 30,      # 다른 워커에서의 비활성화/비밀번호 변경이 반영되기까지의 최대 지연
+}
+
+# 로그인 - 비밀번호 해시 전용 작업 풀과 시도 횟수 제한(토큰 버킷)
+LOGIN = {
+    'HASH_WORKERS': int(os.environ.get('LOGIN_HASH_WORKERS', '0')) or (os.cpu_count() or 2),
+    'HASH_QUEUE': 256,          # 대기 중인 해시 작업이 이보다 많으면 기다리지 않고 503
+    'HASH_TIMEOUT_SECONDS': 10,
+    'RATE_LIMITS': {
+        # 키 종류 → (연속 허용 횟수, 분당 충전 횟수)
+        'username': (10, 10),
+        'ip': (600, 600),       # 강의실 학생들은 같은 공인 IP(NAT)로 접속하므로 넉넉하게
+    },
+    'MAX_BUCKETS': 100000,
+}
+
+# 요청별 처리 시간/DB 쿼리 메트릭 (metrics/ 에 Prometheus 형식으로 노출)
+METRICS = {
+    'ENABLED': os.environ.get('CHECKMATE_METRICS', '1') == '1',
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),  # 설정하면 "Authorization: Bearer <토큰>" 요청만 허용
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),            # 토큰이 없을 때 수집을 허용할 주소
+    'DURATION_BUCKETS_MS': (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+    'QUERY_BUCKETS': (1, 2, 5, 10, 20, 50, 100),
+    'WINDOW_SLOTS': 5,          # 분위수 계산용 최근 구간 = WINDOW_SLOTS × SLOT_SECONDS
+    'SLOT_SECONDS': 60,
+    'SLOW_REQUEST_MS': 500,     # 이보다 오래 걸린 요청은 SQL 지문과 함께 기록
+    'SLOW_LOG_SIZE': 100,
+    'SLOW_SQL_CAPTURE': 200,    # 요청당 보관하는 SQL 수 상한
+    'SLOW_SQL_TOP': 5,
+}
+
+# 구조화 이벤트 로그 (JSON lines, 요청 스레드는 큐에 넣기만 하고 별도 스레드가 기록)
+EVENT_LOG = {
+    'FILE': os.environ.get('CHECKMATE_LOG_FILE') or None,  # 없으면 stderr
+    'LEVEL': os.environ.get('CHECKMATE_LOG_LEVEL', 'INFO'),  # 테스트 실행 중에는 TEST_RUNNER 가 WARNING 으로 올린다
+    # 대량 이벤트 표본 비율 - 출석 체크 이벤트는 기본 10%만 남김 (세션 시작/알림/광고/종료는 모두 남김)
+    'SAMPLE_RATES': {'checkin': float(os.environ.get('CHECKMATE_LOG_CHECKIN_SAMPLE', '0.1'))},
+}
+
+# 테스트 중 이벤트 로그 수준 조정 (Checkmate_Backend/test_runner.py)
+TEST_RUNNER = 'Checkmate_Backend.test_runner.QuietEventLogRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'Checkmate_Backend.eventlog.JsonFormatter'},
+    },
+    'handlers': {
+        'events': {
+            'class': 'Checkmate_Backend.eventlog.BufferedHandler',
+            'filename': EVENT_LOG['FILE'],
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        name: {'handlers': ['events'], 'level': EVENT_LOG['LEVEL'], 'propagate': False}
+        for name in ('checkmate', 'attendance', 'ble')
+    },
+}
+
+# 수강생 명단 CSV 일괄 반영 (import_enrollment 명령 / 관리자 강의 화면)
+ATTENDANCE_ENROLLMENT = {
+    'BATCH_SIZE': 1000,                 # 한 번에 조회/생성/등록하는 행 수
+    'DEFAULT_EMAIL_DOMAIN': 'students.invalid',  # 명단에 이메일이 없는 신규 학생의 임시 이메일 도메인
+}
@@ -0,0 +1,17 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """새 연결마다 OPTIONS['pragmas'] 의 PRAGMA 를 적용하는 SQLite 백엔드"""
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # sqlite3.connect() 인자가 아니므로 분리해 둔다
+        self.pragmas = params.pop('pragmas', {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
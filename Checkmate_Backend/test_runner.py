@@ -0,0 +1,26 @@
+import logging
+import os
+
+from django.test.runner import DiscoverRunner
+
+EVENT_LOGGERS = ('checkmate', 'attendance', 'ble')
+
+
+class QuietEventLogRunner(DiscoverRunner):
+    """테스트 실행 중에는 이벤트 로그를 경고 이상만 남긴다 (CHECKMATE_LOG_LEVEL 을 지정하면 그 수준을 그대로 사용)
+    이벤트 내용을 확인하는 테스트는 assertLogs 나 자체 핸들러로 수준을 낮춰 받는다"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._event_levels = {}
+        if 'CHECKMATE_LOG_LEVEL' in os.environ:
+            return
+        for name in EVENT_LOGGERS:
+            logger = logging.getLogger(name)
+            self._event_levels[name] = logger.level
+            logger.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        for name, level in self._event_levels.items():
+            logging.getLogger(name).setLevel(level)
+        super().teardown_test_environment(**kwargs)
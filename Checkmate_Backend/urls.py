@@ -4,6 +4,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from . import metrics
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Checkmate API",
@@ -16,6 +18,8 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics.metrics_view, name='metrics'),
+    path('metrics/slow/', metrics.slow_requests_view, name='metrics-slow'),
     path('api/users/', include('users.urls')),
 
     # 🔽 Swagger UI
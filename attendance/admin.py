@@ -1,11 +1,59 @@
-from django.contrib import admin
-from .models import Lecture, AttendanceSession, AttendanceRecord
+import io
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404, render
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import Classroom, Lecture, AttendanceSession, AttendanceRecord, LectureStudentSummary
+from .utils.enrollment import import_roster
+
+@admin.register(Classroom)
+class ClassroomAdmin(admin.ModelAdmin):
+    list_display = ('name', 'pi_host', 'pi_port', 'capabilities', 'is_active', 'last_seen')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'pi_host')
 
 @admin.register(Lecture)
 class LectureAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'professor', 'total_weeks')
     search_fields = ('name', 'code', 'professor__name')
-    filter_horizontal = ('students',)
+    filter_horizontal = ('students', 'classrooms')
+    readonly_fields = ('import_roster_link',)
+
+    def get_urls(self):
+        return [
+            path('<int:lecture_id>/import-roster/', self.admin_site.admin_view(self.import_roster_view),
+                 name='attendance_lecture_import_roster'),
+        ] + super().get_urls()
+
+    @admin.display(description="수강생 명단")
+    def import_roster_link(self, obj):
+        if obj.pk is None:
+            return "-"
+        return format_html('<a href="{}">CSV 로 일괄 반영</a>',
+                           reverse('admin:attendance_lecture_import_roster', args=[obj.pk]))
+
+    def import_roster_view(self, request, lecture_id):
+        """명단 CSV 업로드 → 수강 등록 반영 (dry-run 으로 변경 내역 미리보기 가능)"""
+        lecture = get_object_or_404(Lecture, pk=lecture_id)
+        if not self.has_change_permission(request, lecture):
+            raise PermissionDenied
+        context = {**self.admin_site.each_context(request), 'opts': self.model._meta, 'lecture': lecture,
+                   'title': f"{lecture.name} 수강생 명단 반영"}
+        upload = request.FILES.get('roster') if request.method == 'POST' else None
+        if upload is not None:
+            sync = bool(request.POST.get('sync'))
+            dry_run = bool(request.POST.get('dry_run'))
+            try:
+                report = import_roster(lecture, io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''),
+                                       sync=sync, dry_run=dry_run)
+            except (ValueError, UnicodeDecodeError) as e:
+                self.message_user(request, f"명단을 읽을 수 없습니다: {e}", level=messages.ERROR)
+            else:
+                context.update(report=report, counts=report.as_dict(), sync=sync, dry_run=dry_run)
+        return render(request, 'admin/attendance/lecture/import_roster.html', context)
 
 @admin.register(AttendanceSession)
 class AttendanceSessionAdmin(admin.ModelAdmin):
@@ -14,4 +62,9 @@ class AttendanceSessionAdmin(admin.ModelAdmin):
 @admin.register(AttendanceRecord)
 class AttendanceRecordAdmin(admin.ModelAdmin):
     list_display = ('session', 'student', 'status', 'timestamp')
-    list_filter = ('status',)
\ No newline at end of file
+    list_filter = ('status',)
+
+@admin.register(LectureStudentSummary)
+class LectureStudentSummaryAdmin(admin.ModelAdmin):
+    list_display = ('lecture', 'student', 'present', 'late', 'absent', 'updated_at')
+    list_filter = ('lecture',)
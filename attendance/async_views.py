@@ -0,0 +1,284 @@
+import asyncio
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import CachedJWTAuthentication
+
+from .models import AttendanceSession, Classroom
+from .utils.checkin import arecord_checkin, checkin_message
+from .utils.live_feed import broker, event_id, parse_event_id
+from .utils.qr_token import verify_token
+from .utils.raspberry_pi import araspberry_pi_health
+from .utils.session_cache import aget_roster, aget_roster_by_id
+from .utils.summary import STATUSES
+from .utils.write_behind import checkin_queue, write_behind_enabled
+
+# ASGI 네이티브 뷰 (DRF APIView 는 동기 전용이라 일반 Django 비동기 뷰로 작성)
+# 출석 체크 경로는 views.py 의 동기 뷰와 요청/응답 형식이 같고, 이벤트 루프에서 처리되어
+# 라즈베리파이 응답 대기 같은 I/O 동안 스레드를 점유하지 않는다.
+
+
+def async_api_view(*methods):
+    """허용 메서드 검사 + CSRF 제외 (JWT 인증 API, DRF APIView 와 동일)"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view(request, *args, **kwargs)
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _request_data(request):
+    """요청 본문 → dict (DRF 뷰와 같이 JSON, 폼(urlencoded), multipart 를 받는다), 형식이 맞지 않으면 None"""
+    if request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        return request.POST
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _validated_token(auth, request, allow_query_token):
+    header = auth.get_header(request)
+    if header:
+        raw_token = auth.get_raw_token(header)
+    elif allow_query_token:
+        raw_token = request.GET.get('token', '').encode()
+    else:
+        raw_token = None
+    if not raw_token:
+        return None
+    try:
+        return auth.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+
+
+def _jwt_user(request, allow_query_token=False):
+    """Authorization 헤더(또는 ?token=)의 JWT 로 사용자 조회, 실패하면 None"""
+    auth = CachedJWTAuthentication()
+    token = _validated_token(auth, request, allow_query_token)
+    if token is None:
+        return None
+    try:
+        return auth.get_user(token)
+    except AuthenticationFailed:
+        return None
+
+
+async def _authenticate(request, allow_query_token=False):
+    """토큰 검증과 캐시 조회는 이벤트 루프에서 바로 하고, 캐시에 없을 때만 스레드에서 DB 조회"""
+    auth = CachedJWTAuthentication()
+    token = _validated_token(auth, request, allow_query_token)
+    if token is None:
+        return None
+    try:
+        user = auth.cached_user(token)
+        if user is None:
+            user = await sync_to_async(auth.get_user)(token)
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+async def _acheckin(roster, student_id, status_value='present'):
+    if write_behind_enabled():
+        # 스풀 fsync 가 이벤트 루프를 막지 않도록 스레드에서 접수
+        return await asyncio.to_thread(checkin_queue.enqueue, roster, student_id, status_value), 202
+    return await arecord_checkin(roster, student_id, status_value), 200
+
+
+@async_api_view('POST')
+async def attendance_submit(request):
+    """학생 출석 제출 (AttendanceRecordCreateView 의 비동기 버전)"""
+    user = await _authenticate(request)
+    if user is None:
+        return _json({"error": "인증이 필요합니다."}, status=401)
+    data = _request_data(request)
+    if data is None:
+        return _json({"error": "JSON 또는 폼 형식의 본문이 필요합니다."}, status=400)
+
+    session_code = data.get('session_code')
+    status_value = data.get('status', 'present')
+
+    if user.role != 'student':
+        return _json({"error": "학생만 출석할 수 있습니다."}, status=403)
+    if not session_code:
+        return _json({"error": "session_code는 필수입니다."}, status=400)
+    if status_value not in STATUSES:
+        return _json({"error": "status는 present, late, absent 중 하나여야 합니다."}, status=400)
+
+    roster = await aget_roster(str(session_code))
+    if roster is None:
+        return _json({"error": "활성화된 출석 세션이 존재하지 않습니다."}, status=404)
+    if user.id not in roster.student_ids:
+        return _json({"error": "해당 강의를 수강하지 않습니다."}, status=403)
+
+    created, status_code = await _acheckin(roster, user.id, status_value)
+    return _json({
+        "message": checkin_message("출석", created, status_code),
+        "data": {
+            "session": roster.session_id,
+            "student": user.name,
+            "status": status_value
+        }
+    }, status=status_code)
+
+
+@async_api_view('POST')
+async def qr_attendance(request):
+    """QR 출석 처리 (QRAttendanceView 의 비동기 버전)"""
+    user = await _authenticate(request)
+    if user is None:
+        return _json({"error": "인증이 필요합니다."}, status=401)
+    data = _request_data(request)
+    if data is None:
+        return _json({"error": "JSON 또는 폼 형식의 본문이 필요합니다."}, status=400)
+
+    token = str(data.get("token") or data.get("session_id"))
+    session_id = verify_token(token)
+    if session_id is not None:
+        roster = await aget_roster_by_id(session_id)
+    elif settings.QR_TOKEN['ALLOW_STATIC_CODE']:
+        roster = await aget_roster(token)
+    else:
+        return _json({"error": "만료되었거나 유효하지 않은 QR 코드입니다."}, status=403)
+
+    if roster is None:
+        return _json({"error": "세션을 찾을 수 없습니다."}, status=404)
+    if user.id not in roster.student_ids:
+        return _json({"error": "수강하지 않는 학생입니다."}, status=403)
+
+    created, status_code = await _acheckin(roster, user.id)
+    return _json({"message": checkin_message("QR 출석", created, status_code)}, status=status_code)
+
+
+@async_api_view('POST')
+async def ble_attendance(request):
+    """BLE 출석 처리 (BLEAttendanceView 의 비동기 버전, 인증 없음)"""
+    data = _request_data(request)
+    if data is None:
+        return _json({"error": "JSON 또는 폼 형식의 본문이 필요합니다."}, status=400)
+
+    roster = await aget_roster(str(data.get("session_code")))
+    if roster is None or roster.lecture_code != data.get("lecture_code"):
+        return _json({"error": "학생 또는 세션을 찾을 수 없습니다."}, status=404)
+
+    try:
+        student_id = int(data.get("student_id"))
+    except (TypeError, ValueError):
+        return _json({"error": "학생 또는 세션을 찾을 수 없습니다."}, status=404)
+
+    if student_id not in roster.student_ids:
+        return _json({"error": "수강하지 않는 학생입니다."}, status=403)
+
+    created, status_code = await _acheckin(roster, student_id)
+    return _json({"message": checkin_message("BLE 출석", created, status_code)}, status=status_code)
+
+
+@async_api_view('GET')
+async def raspberry_pi_connection_check(request):
+    """RaspberryPiConnectionCheckView 의 비동기 버전 - ?classroom= 이 없으면 기본 장치"""
+    name = request.GET.get('classroom')
+    if not name:
+        return _json(await araspberry_pi_health())
+    classroom = await Classroom.objects.filter(name=name).only('pi_host', 'pi_port').afirst()
+    if classroom is None:
+        return _json({"error": "강의실을 찾을 수 없습니다."}, status=404)
+    return _json(await araspberry_pi_health(classroom.pi_base_url, classroom.id))
+
+
+def _stream_session(request, session_code):
+    """SSE 요청 인증 + 세션 조회 → (session, 오류 응답)
+    EventSource 는 헤더를 지정할 수 없으므로 Authorization 헤더 외에 ?token= 으로도 JWT 를 받는다"""
+    user = _jwt_user(request, allow_query_token=True)
+    if user is None:
+        return None, _json({"error": "인증이 필요합니다."}, status=401)
+
+    session = AttendanceSession.objects.select_related('lecture').only(
+        'id', 'is_active', 'lecture__professor'
+    ).filter(session_code=session_code).first()
+    if session is None:
+        return None, _json({"error": "세션을 찾을 수 없습니다."}, status=404)
+    if session.lecture.professor_id != user.id:
+        return None, _json({"error": "해당 세션에 접근할 수 없습니다."}, status=403)
+    return session, None
+
+
+def _sse(name, data, seq):
+    return f"id: {event_id(seq)}\nevent: {name}\ndata: {data}\n\n"
+
+
+@async_api_view('GET')
+async def session_event_stream(request, session_code):
+    """
+    교수 대시보드용 실시간 출석 이벤트 (Server-Sent Events, ASGI 전용)
+    - attendance: {"records": [{"student_id", "status"}], "source", "at"} - 새 출석/결석 처리/수동 수정
+    - reset: 재연결 지점 이후 이벤트가 버퍼에서 밀려남 → 출석 목록을 다시 조회해야 함
+    - end: 세션 종료, 스트림도 닫힘
+    최초 연결 시에는 출석 목록(sessions/<code>/attendance/)을 한 번 조회한 뒤 이후 변경분만 받는다.
+    """
+    if not isinstance(request, ASGIRequest):
+        # WSGI 는 무한 스트림을 끝까지 읽은 뒤 응답하려 하므로 지원하지 않는다
+        return _json({"error": "실시간 스트림은 ASGI 서버에서만 제공됩니다."}, status=501)
+
+    session, error = await sync_to_async(_stream_session)(request, session_code)
+    if error is not None:
+        return error
+
+    cursor = parse_event_id(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    heartbeat = settings.ATTENDANCE_LIVE_FEED['HEARTBEAT_SECONDS']
+
+    async def stream():
+        channel, waiter = broker.subscribe(session.id)
+        _, wakeup = waiter
+        position = cursor
+        try:
+            yield "retry: 3000\n\n"
+            if not session.is_active:
+                # 이미 끝난 세션 - 남은 이벤트만 보내고 닫는다 (재시작/방출로 end 이벤트가 사라졌어도 대기하지 않음)
+                events, position = broker.since(channel, position)
+                if events is None:
+                    yield _sse('reset', '{}', position)
+                for event in events or ():
+                    yield _sse(event.name, event.data, event.seq)
+                    if event.name == 'end':
+                        return
+                yield _sse('end', '{}', position)
+                return
+            while True:
+                # 조회 전에 내려야 조회와 대기 사이에 발행된 이벤트를 놓치지 않는다
+                wakeup.clear()
+                events, position = broker.since(channel, position)
+                if events is None:
+                    yield _sse('reset', '{}', position)
+                    continue
+                for event in events:
+                    yield _sse(event.name, event.data, event.seq)
+                    if event.name == 'end':
+                        return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(session.id, channel, waiter)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx 프록시 버퍼링 해제
+    return response
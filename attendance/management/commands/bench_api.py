@@ -0,0 +1,317 @@
+import http.client
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from attendance.models import AttendanceSession
+from attendance.utils.bench import isolated_database, load_summary, make_dataset, redirect_events
+from attendance.utils.qr_token import make_token
+
+PREFIX = '/api/attendance/'
+
+# 엔드포인트 → (메서드, 경로)
+ENDPOINTS = {
+    'submit': ('POST', 'attendance/submit/'),
+    'qr': ('POST', 'attendance/qr/'),
+    'ble': ('POST', 'attendance/ble/'),
+    'statistics': ('GET', 'attendance/statistics/'),
+    'weekly': ('GET', 'weekly/'),
+    'summary': ('GET', 'attendance/summary/'),
+}
+CHECKIN_ENDPOINTS = ('submit', 'qr', 'ble')
+# 비교 시 이만큼(%) 넘게 느려진 지표는 회귀로 본다
+COMPARED_LATENCY = ('p95_ms', 'p99_ms')
+
+
+class _QuietHandler(WSGIRequestHandler):
+    # 작은 응답이 Nagle/지연 ACK 에 걸려 지연시간이 부풀지 않도록 (StreamRequestHandler.setup 에서 TCP_NODELAY)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _NoDelayConnection(http.client.HTTPConnection):
+    """클라이언트 쪽 연결도 TCP_NODELAY (keep-alive 재연결 포함)"""
+
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "출석 API 벤치마크 - 합성 데이터(강의 N개 × 수강생 M명 × W주차)로 실제 URL 경로를 JWT 인증과 함께 호출해 "
+        "엔드포인트별 요청당 쿼리 수, p50/p95/p99 지연시간, 초당 처리량을 측정 (임시 DB 사용). "
+        "--output 으로 결과를 JSON 저장, --compare 로 이전 결과와 비교"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lectures', type=int, default=2)
+        parser.add_argument('--students', type=int, default=100, help="강의당 수강생 수")
+        parser.add_argument('--weeks', type=int, default=15)
+        parser.add_argument('--requests', type=int, default=200, help="엔드포인트별 최대 요청 수")
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help="측정할 엔드포인트 (쉼표 구분)")
+        parser.add_argument('--http', action='store_true',
+                            help="테스트 클라이언트 측정 후 로컬 HTTP 서버를 띄워 동시 요청 부하도 측정")
+        parser.add_argument('--concurrency', type=int, default=8, help="--http 동시 연결 수")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="결과 JSON 저장 경로")
+        parser.add_argument('--compare', help="비교할 이전 결과 JSON - 회귀가 있으면 실패 종료")
+        parser.add_argument('--max-regression', type=float, default=25.0,
+                            help="회귀로 판단할 지연시간 증가율 %% (쿼리 수는 1개라도 늘면 회귀)")
+        parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+        parser.add_argument('--event-log', default=os.devnull,
+                            help="측정 중 stderr 로 나가는 이벤트 로그(JSON)를 보낼 파일 (기본: 버림)")
+
+    def handle(self, *args, **options):
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(endpoints) - ENDPOINTS.keys()
+        if unknown:
+            raise CommandError(f"알 수 없는 엔드포인트: {', '.join(sorted(unknown))}")
+        baseline = self.load(options['compare']) if options['compare'] else None
+
+        self.rng = random.Random(options['seed'])
+        # get_wsgi_application 은 django.setup() 으로 로깅을 다시 구성하므로 이벤트 로그를 돌리기 전에 만든다
+        self.app = get_wsgi_application() if options['http'] else None
+        results = {}
+        setup_test_environment()  # 테스트 클라이언트 호스트(testserver) 허용
+        with tempfile.TemporaryDirectory() as tmp, redirect_events(options['event_log']), override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1']
+        ):
+            if connection.vendor == 'sqlite':
+                # HTTP 서버 스레드도 같은 DB 를 보도록 파일 DB 로 측정
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+
+            with isolated_database():
+                self.prepare(options)
+                for name in endpoints:
+                    results[name] = {"client": self.run_client(name, self.make_jobs(name, options))}
+                if options['http']:
+                    with self.serve() as port:
+                        for name in endpoints:
+                            results[name]["http"] = self.run_http(
+                                name, self.make_jobs(name, options), port, options['concurrency']
+                            )
+        teardown_test_environment()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "db": connection.vendor,
+                "write_behind": settings.ATTENDANCE_WRITE_BEHIND['ENABLED'],
+                **{key: options[key] for key in ('lectures', 'students', 'weeks', 'requests', 'concurrency', 'seed')},
+            },
+            "results": results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        regressions = self.compare(baseline, report, options['max_regression']) if baseline else []
+
+        if options['json']:
+            self.stdout.write(json.dumps({**report, "regressions": regressions}, ensure_ascii=False, indent=2))
+        else:
+            self.print_table(results, baseline)
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f"회귀: {line}"))
+        if regressions:
+            raise CommandError(f"이전 결과 대비 회귀 {len(regressions)}건")
+
+    # 데이터 준비
+
+    def prepare(self, options):
+        self.lectures = make_dataset(options['lectures'], options['students'], options['weeks'], seed=options['seed'])
+        self.next_week = {lecture.id: options['weeks'] + 1 for lecture in self.lectures}
+        self.professor_tokens = {lecture.id: self.bearer(lecture.professor) for lecture in self.lectures}
+        self.students = {lecture.id: list(lecture.students.all()) for lecture in self.lectures}
+        self.student_tokens = {
+            student.id: self.bearer(student) for students in self.students.values() for student in students
+        }
+
+    @staticmethod
+    def bearer(user):
+        return f"Bearer {AccessToken.for_user(user)}"
+
+    def open_session(self, lecture):
+        """출석 체크 측정마다 새 활성 세션을 열어 모든 요청이 실제 INSERT 가 되게 한다"""
+        AttendanceSession.objects.filter(lecture=lecture, is_active=True).update(is_active=False)
+        week = self.next_week[lecture.id]
+        self.next_week[lecture.id] += 1
+        return AttendanceSession.objects.create(lecture=lecture, week=week)
+
+    def make_jobs(self, name, options):
+        """(Authorization 헤더 또는 None, 본문/쿼리) 목록"""
+        jobs = []
+        if name in CHECKIN_ENDPOINTS:
+            for lecture in self.lectures:
+                session = self.open_session(lecture)
+                for student in self.students[lecture.id]:
+                    if name == 'submit':
+                        jobs.append((self.student_tokens[student.id], {'session_code': session.session_code}))
+                    elif name == 'qr':
+                        jobs.append((self.student_tokens[student.id], {'token': make_token(session.id)}))
+                    else:
+                        jobs.append((None, {
+                            'student_id': student.id,
+                            'lecture_code': lecture.code,
+                            'session_code': session.session_code,
+                        }))
+            self.rng.shuffle(jobs)
+            return jobs[:options['requests']]
+
+        for i in range(options['requests']):
+            lecture = self.lectures[i % len(self.lectures)]
+            if name == 'statistics':
+                params = {'lecture_code': lecture.code}
+            elif name == 'weekly':
+                params = {'lecture_code': lecture.code, 'week': self.rng.randint(1, options['weeks'])}
+            else:
+                params = {}
+            jobs.append((self.professor_tokens[lecture.id], params))
+        return jobs
+
+    # 측정
+
+    @staticmethod
+    def summarize(latencies, statuses, elapsed, queries=None):
+        ok = sum(count for status, count in statuses.items() if 200 <= status < 300)
+        result = {
+            "requests": len(latencies),
+            "ok": ok,
+            "errors": {str(status): count for status, count in statuses.items() if not 200 <= status < 300},
+            **load_summary(latencies, elapsed),
+        }
+        if queries is not None:
+            result["queries"] = round(sum(queries) / len(queries), 2)
+            result["max_queries"] = max(queries)
+        return result
+
+    def run_client(self, name, jobs):
+        """테스트 클라이언트로 순차 호출 - 요청당 쿼리 수와 단일 요청 지연시간"""
+        method, path = ENDPOINTS[name]
+        client = Client()
+        latencies, queries, statuses = [], [], Counter()
+        started = time.perf_counter()
+        for authorization, data in jobs:
+            extra = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+            with CaptureQueriesContext(connection) as ctx:
+                request_started = time.perf_counter()
+                if method == 'GET':
+                    response = client.get(PREFIX + path, data, **extra)
+                else:
+                    response = client.post(PREFIX + path, data, content_type='application/json', **extra)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            queries.append(len(ctx.captured_queries))
+            statuses[response.status_code] += 1
+        return self.summarize(latencies, statuses, time.perf_counter() - started, queries)
+
+    @contextmanager
+    def serve(self):
+        """임시 DB 를 쓰는 멀티스레드 WSGI 서버를 빈 포트에 띄우고 포트를 넘겨준다"""
+        httpd = ThreadedWSGIServer(('127.0.0.1', 0), _QuietHandler, allow_reuse_address=False)
+        httpd.set_app(self.app)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            yield httpd.server_address[1]
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def run_http(self, name, jobs, port, concurrency):
+        """로컬 HTTP 서버에 동시 연결(keep-alive)로 부하 - 처리량과 동시성 하의 지연시간"""
+        method, path = ENDPOINTS[name]
+        latencies, statuses = [], Counter()
+        lock = threading.Lock()
+
+        def worker(chunk):
+            conn = _NoDelayConnection('127.0.0.1', port, timeout=30)
+            local_latencies, local_statuses = [], Counter()
+            for authorization, data in chunk:
+                headers = {'Authorization': authorization} if authorization else {}
+                if method == 'GET':
+                    url, body = f"{PREFIX}{path}?{urlencode(data)}", None
+                else:
+                    url, body = PREFIX + path, json.dumps(data)
+                    headers['Content-Type'] = 'application/json'
+                started = time.perf_counter()
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                local_latencies.append((time.perf_counter() - started) * 1000)
+                local_statuses[response.status] += 1
+            conn.close()
+            with lock:
+                latencies.extend(local_latencies)
+                statuses.update(local_statuses)
+
+        threads = [threading.Thread(target=worker, args=(jobs[i::concurrency],)) for i in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.summarize(latencies, statuses, time.perf_counter() - started)
+
+    # 저장/비교
+
+    @staticmethod
+    def load(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"이전 결과를 읽을 수 없습니다: {e}")
+
+    @staticmethod
+    def compare(baseline, report, max_regression):
+        """이전 결과 대비 회귀 목록 - 요청당 쿼리 수 증가, 지연시간 max_regression%% 초과 증가"""
+        regressions = []
+        for name, phases in report['results'].items():
+            for phase, current in phases.items():
+                previous = baseline['results'].get(name, {}).get(phase)
+                if previous is None:
+                    continue
+                if current.get('queries', 0) > previous.get('queries', current.get('queries', 0)):
+                    regressions.append(f"{name}/{phase} queries {previous['queries']} → {current['queries']}")
+                for key in COMPARED_LATENCY:
+                    if current[key] > previous[key] * (1 + max_regression / 100):
+                        regressions.append(f"{name}/{phase} {key} {previous[key]} → {current[key]}")
+        return regressions
+
+    def print_table(self, results, baseline):
+        self.stdout.write(
+            f"{'endpoint':>10} {'mode':>6} | {'req':>5} {'ok':>5} {'queries':>7} | "
+            f"{'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for name, phases in results.items():
+            for phase, row in phases.items():
+                queries = row.get('queries', '-')
+                line = (
+                    f"{name:>10} {phase:>6} | {row['requests']:>5} {row['ok']:>5} {queries:>7} | "
+                    f"{row['rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}"
+                )
+                previous = baseline and baseline['results'].get(name, {}).get(phase)
+                if previous:
+                    line += f"  (이전 p95 {previous['p95_ms']}, queries {previous.get('queries', '-')})"
+                self.stdout.write(line)
+                for error, count in row['errors'].items():
+                    self.stdout.write(f"{'':>17}   - {error}: {count}")
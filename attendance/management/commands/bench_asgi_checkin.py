@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+
+from attendance.models import AttendanceSession
+from attendance.utils.bench import isolated_database, load_summary, make_lecture, redirect_events
+from attendance.utils.session_cache import load_roster
+
+SYNC_PATH = '/api/attendance/attendance/submit/'
+ASYNC_PATH = '/api/attendance/async/attendance/submit/'
+
+
+class Command(BaseCommand):
+    help = (
+        "동시 출석 체크 처리량/지연시간 비교 - WSGI(스레드) + 동기 뷰, ASGI + 동기 뷰, ASGI + 비동기 뷰 "
+        "(실제 미들웨어·JWT 인증 경로, 임시 DB 사용)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lectures', type=int, default=4, help="모드별 동시 출석 체크 강의 수")
+        parser.add_argument('--students', type=int, default=150, help="강의당 수강생 수")
+        parser.add_argument('--concurrency', type=int, default=16, help="동시 요청 수 (WSGI 는 스레드 수)")
+        parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+        parser.add_argument('--event-log', default=os.devnull,
+                            help="측정 중 stderr 로 나가는 이벤트 로그(JSON)를 보낼 파일 (기본: 버림)")
+
+    def handle(self, *args, **options):
+        modes = (
+            ('wsgi', self.run_wsgi, SYNC_PATH),
+            ('asgi-sync', self.run_asgi, SYNC_PATH),
+            ('asgi-async', self.run_asgi, ASYNC_PATH),
+        )
+        results = []
+        setup_test_environment()  # 테스트 클라이언트 호스트(testserver) 허용
+        with tempfile.TemporaryDirectory() as tmp, redirect_events(options['event_log']):
+            if connection.vendor == 'sqlite':
+                # 여러 스레드가 같은 DB 파일을 두고 경합하도록 파일 DB 로 측정
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+
+            with isolated_database():
+                for index, (mode, run, path) in enumerate(modes):
+                    jobs = self.make_jobs(f"A{index}", options)
+                    connection.close()
+                    results.append({"mode": mode, **run(jobs, path, options['concurrency'])})
+        teardown_test_environment()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f"{'mode':>10} | {'requests':>8} {'ok':>6} | {'rps':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['mode']:>10} | {row['requests']:>8} {row['ok']:>6} | "
+                f"{row['rps']:>8} {row['p50_ms']:>8} {row['p99_ms']:>8}"
+            )
+            for error, count in row['errors'].items():
+                self.stdout.write(f"{'':>10}   - {error}: {count}")
+
+    def make_jobs(self, prefix, options):
+        """모드마다 새 강의/세션을 만들어 모든 요청이 실제 INSERT 가 되게 한다"""
+        jobs = []
+        for i in range(options['lectures']):
+            lecture = make_lecture(f"{prefix}L{i}", options['students'], weeks=1, seed=i)
+            session = AttendanceSession.objects.create(lecture=lecture, week=2)
+            load_roster(session.session_code)
+            jobs.extend(
+                (f"Bearer {AccessToken.for_user(student)}", {'session_code': session.session_code})
+                for student in lecture.students.all()
+            )
+        random.Random(0).shuffle(jobs)
+        return jobs
+
+    @staticmethod
+    def summarize(jobs, latencies, statuses, elapsed):
+        return {
+            "requests": len(jobs),
+            "ok": statuses.pop(200, 0) + statuses.pop(202, 0),
+            "errors": {str(key): count for key, count in statuses.items()},
+            **load_summary(latencies, elapsed),
+        }
+
+    def run_wsgi(self, jobs, path, concurrency):
+        latencies = []
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def worker(chunk):
+            client = Client()
+            local_latencies, local_statuses = [], Counter()
+            for authorization, body in chunk:
+                started = time.perf_counter()
+                response = client.post(path, body, content_type='application/json', HTTP_AUTHORIZATION=authorization)
+                local_latencies.append((time.perf_counter() - started) * 1000)
+                local_statuses[response.status_code] += 1
+            connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                statuses.update(local_statuses)
+
+        threads = [threading.Thread(target=worker, args=(jobs[i::concurrency],)) for i in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.summarize(jobs, latencies, statuses, time.perf_counter() - started)
+
+    def run_asgi(self, jobs, path, concurrency):
+        return async_to_sync(self._run_asgi)(jobs, path, concurrency)
+
+    async def _run_asgi(self, jobs, path, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = Counter()
+
+        async def request(authorization, body):
+            async with limit:
+                started = time.perf_counter()
+                response = await client.post(
+                    path, body, content_type='application/json', headers={'Authorization': authorization}
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request(authorization, body) for authorization, body in jobs))
+        return self.summarize(jobs, latencies, statuses, time.perf_counter() - started)
@@ -0,0 +1,143 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from attendance.models import AttendanceSession
+from attendance.utils.bench import isolated_database, load_summary, make_lecture
+from attendance.utils.session_cache import load_roster
+from attendance.utils.write_behind import checkin_queue, write_behind_enabled
+from attendance.views import AttendanceRecordCreateView
+
+
+class Command(BaseCommand):
+    help = (
+        "DB 프로필(CHECKMATE_DB)별 동시 출석 체크 처리량 비교 - 프로필마다 별도 프로세스와 임시 DB 사용"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='sqlite,sqlite-wal', help="비교할 프로필 (쉼표 구분, postgres 가능)")
+        parser.add_argument('--lectures', type=int, default=8, help="동시에 출석 체크 중인 강의 수")
+        parser.add_argument('--students', type=int, default=150, help="강의당 수강생 수")
+        parser.add_argument('--weeks', type=int, default=3, help="미리 쌓아 둘 지난 주차 수")
+        parser.add_argument('--threads', type=int, default=16, help="동시 요청 스레드 수")
+        parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+        parser.add_argument('--child', action='store_true', help="(내부용) 현재 프로필로 한 번 측정")
+        parser.add_argument('--db-file', help="(내부용) SQLite 임시 DB 파일 경로")
+
+    def handle(self, *args, **options):
+        if options['child']:
+            result = self.run_load(options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for profile in options['profiles'].split(','):
+                results.append(self.spawn(profile, options, os.path.join(tmp, f"{profile}.sqlite3")))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'profile':>10} | {'requests':>8} {'ok':>6} {'errors':>6} | {'rps':>8} {'p50 ms':>8} {'p99 ms':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['profile']:>10} | {row['requests']:>8} {row['ok']:>6} {sum(row['errors'].values()):>6} | "
+                f"{row['rps']:>8} {row['p50_ms']:>8} {row['p99_ms']:>8}"
+                + (f"  (write-behind drain {row['drain_ms']} ms)" if 'drain_ms' in row else "")
+            )
+            for error, count in row['errors'].items():
+                self.stdout.write(f"{'':>10}   - {error}: {count}")
+
+    def spawn(self, profile, options, db_file):
+        """프로필마다 설정을 새로 읽어야 하므로 자식 프로세스에서 측정"""
+        command = [
+            sys.executable, 'manage.py', 'bench_checkin_load', '--child', '--db-file', db_file,
+            *(f"--{name}={options[name]}" for name in ('lectures', 'students', 'weeks', 'threads')),
+        ]
+        proc = subprocess.run(
+            command, cwd=settings.BASE_DIR, env={**os.environ, 'CHECKMATE_DB': profile},
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"{profile} 측정 실패:\n{proc.stderr}")
+        return {"profile": profile, **json.loads(proc.stdout.strip().splitlines()[-1])}
+
+    def run_load(self, options):
+        if connection.vendor == 'sqlite':
+            # 기본 테스트 DB(메모리)는 스레드 간 잠금 경합이 실제와 달라 파일 DB 로 측정
+            connection.settings_dict['TEST']['NAME'] = options['db_file']
+
+        with isolated_database():
+            jobs = []
+            for i in range(options['lectures']):
+                lecture = make_lecture(f"LOAD{i}", options['students'], weeks=options['weeks'], seed=i)
+                session = AttendanceSession.objects.create(lecture=lecture, week=options['weeks'] + 1)
+                load_roster(session.session_code)
+                jobs.extend((student, session.session_code) for student in lecture.students.all())
+            random.Random(0).shuffle(jobs)
+            connection.close()
+
+            result = self.fire(jobs, options['threads'])
+            if write_behind_enabled():
+                # 202 응답 이후 실제 커밋까지 남은 시간
+                started = time.perf_counter()
+                checkin_queue.drain()
+                result["drain_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return result
+
+    def fire(self, jobs, n_threads):
+        factory = APIRequestFactory()
+        view = AttendanceRecordCreateView.as_view()
+        latencies = []
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def worker(chunk):
+            local_latencies = []
+            local_statuses = Counter()
+            try:
+                for student, session_code in chunk:
+                    request = factory.post('/submit/', {'session_code': session_code}, format='json')
+                    force_authenticate(request, user=student)
+                    started = time.perf_counter()
+                    try:
+                        local_statuses[view(request).status_code] += 1
+                    except Exception as e:
+                        # 잠금 대기 초과(database is locked) 등은 운영에서 500 으로 나간다
+                        local_statuses[f"{type(e).__name__}: {e}"] += 1
+                    local_latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                statuses.update(local_statuses)
+
+        threads = [threading.Thread(target=worker, args=(jobs[i::n_threads],)) for i in range(n_threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        ok = statuses.pop(200, 0) + statuses.pop(202, 0)
+        return {
+            "requests": len(jobs),
+            "ok": ok,
+            "errors": {str(key): count for key, count in statuses.items()},
+            **load_summary(latencies, elapsed),
+        }
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from attendance.models import AttendanceSession
+from attendance.utils import qr
+from attendance.utils.bench import isolated_database, make_lecture
+from attendance.views import qr_image_view
+
+
+class Command(BaseCommand):
+    help = "QR 이미지 렌더링 처리량 측정 - 캐시 미적중(cold) / 적중(warm) / 304 재검증"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0, help="구간별 측정 시간 (초)")
+
+    def _rate(self, fn, seconds):
+        count = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            fn(count)
+            count += 1
+        return count / seconds
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        factory = APIRequestFactory()
+
+        cold = self._rate(lambda i: qr.render_png(qr.qr_payload("session_code", f"BENCH_{i}")), seconds)
+
+        payload = qr.qr_payload("session_code", "BENCH_WARM")
+        qr.get_qr(payload)
+        warm = self._rate(lambda i: qr.get_qr(payload), seconds)
+
+        with isolated_database():
+            lecture = make_lecture("QRB", 1, weeks=0)
+            session = AttendanceSession.objects.create(lecture=lecture, week=1)
+            etag = [qr.session_qr(session.id).etag]
+
+            def get(**headers):
+                # QR 은 해당 강의 교수만 조회할 수 있다
+                request = factory.get('/qr/image', {'session_code': session.session_code}, **headers)
+                force_authenticate(request, user=lecture.professor)
+                return qr_image_view(request)
+
+            def view_full(i):
+                get()
+
+            def view_304(i):
+                response = get(HTTP_IF_NONE_MATCH=etag[0])
+                # 토큰 회전 경계에 걸리면 새 이미지(200)가 나오므로 ETag 갱신
+                if response.status_code != 304:
+                    etag[0] = response['ETag']
+
+            full = self._rate(view_full, seconds)
+            not_modified = self._rate(view_304, seconds)
+
+        self.stdout.write(f"cold render        : {cold:>10.1f} renders/s")
+        self.stdout.write(f"warm cache hit     : {warm:>10.1f} renders/s  (x{warm / cold:.0f})")
+        self.stdout.write(f"view 200 (cached)  : {full:>10.1f} req/s")
+        self.stdout.write(f"view 304 (ETag)    : {not_modified:>10.1f} req/s")
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from attendance.utils.bench import isolated_database, make_lecture, measure
+from attendance.views import AttendanceStatisticsView, ProfessorAttendanceSummaryView
+
+
+class Command(BaseCommand):
+    help = "수강생 수 증가에 따른 출석 통계 API 의 쿼리 수/지연시간 측정 (임시 DB 사용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='50,200,500,1000,2000', help="수강생 수 목록 (쉼표 구분)")
+        parser.add_argument('--weeks', type=int, default=15)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+
+    def handle(self, *args, **options):
+        sizes = [int(n) for n in options['sizes'].split(',')]
+        factory = APIRequestFactory()
+        results = []
+
+        with isolated_database():
+            for n in sizes:
+                lecture = make_lecture(f"B{n}", n, weeks=options['weeks'])
+
+                def call(view, path, params=None):
+                    request = factory.get(path, params or {})
+                    force_authenticate(request, user=lecture.professor)
+                    response = view(request)
+                    assert response.status_code == 200, response.data
+
+                statistics_view = AttendanceStatisticsView.as_view()
+                summary_view = ProfessorAttendanceSummaryView.as_view()
+                results.append({
+                    "students": n,
+                    "statistics": measure(
+                        lambda: call(statistics_view, '/statistics/', {'lecture_code': lecture.code}),
+                        options['repeat']
+                    ),
+                    "summary": measure(lambda: call(summary_view, '/summary/'), options['repeat']),
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f"{'students':>8} | {'stats q':>7} {'median ms':>10} {'max ms':>8} | {'summary q':>9} {'median ms':>10}")
+        for row in results:
+            st, su = row['statistics'], row['summary']
+            self.stdout.write(
+                f"{row['students']:>8} | {st['queries']:>7} {st['median_ms']:>10} {st['max_ms']:>8} | "
+                f"{su['queries']:>9} {su['median_ms']:>10}"
+            )
@@ -0,0 +1,60 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.models import Lecture
+from attendance.utils.enrollment import import_roster
+
+
+class Command(BaseCommand):
+    help = "수강생 명단 CSV(username/학번, name/이름, email/이메일, major/전공 열)를 강의 수강 등록에 반영"
+
+    def add_arguments(self, parser):
+        parser.add_argument('lecture', help="강의 코드")
+        parser.add_argument('csv_path', help="명단 CSV 파일 (UTF-8, 첫 줄은 헤더)")
+        parser.add_argument('--sync', action='store_true', help="명단에 없는 기존 수강생을 수강 취소")
+        parser.add_argument('--dry-run', action='store_true', help="변경하지 않고 반영 결과만 출력")
+        parser.add_argument('--report', help="추가/제외/건너뛴 학번 목록을 저장할 CSV 경로")
+        parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+
+    def handle(self, *args, **options):
+        try:
+            lecture = Lecture.objects.get(code=options['lecture'])
+        except Lecture.DoesNotExist:
+            raise CommandError(f"강의를 찾을 수 없습니다: {options['lecture']}")
+
+        started = time.perf_counter()
+        try:
+            with open(options['csv_path'], encoding='utf-8-sig', newline='') as lines:
+                report = import_roster(lecture, lines, sync=options['sync'], dry_run=options['dry_run'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['username', 'change', 'detail'])
+                writer.writerows(report.diff_rows())
+
+        if options['json']:
+            result = {**report.as_dict(), "elapsed_s": round(elapsed, 3), "dry_run": options['dry_run']}
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+            return
+
+        counts = report.as_dict()
+        removed_label = "수강 취소" if options['sync'] else "명단에 없음(유지)"
+        self.stdout.write(
+            f"추가 {counts['added']} / {removed_label} {counts['removed']} / 변경 없음 {counts['unchanged']} / "
+            f"신규 계정 {counts['created_users']} / 건너뜀 {counts['skipped']} ({elapsed:.2f}s)"
+        )
+        for line, username, reason in report.skipped[:20]:
+            self.stdout.write(f"  {line}행 {username}: {reason}")
+        if len(report.skipped) > 20:
+            self.stdout.write(f"  ... 외 {len(report.skipped) - 20}건 (--report 로 전체 저장)")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("dry-run: 변경 사항은 저장되지 않았습니다."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{lecture.code} 수강생 명단 반영 완료"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.models import Lecture
+from attendance.utils.summary import find_drift, rebuild
+
+
+class Command(BaseCommand):
+    help = "출석 집계 테이블(LectureStudentSummary)을 원본 기록으로 재생성하거나 불일치를 검사"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lecture', help="특정 강의 코드만 처리")
+        parser.add_argument('--check', action='store_true', help="재생성하지 않고 불일치만 검사 (불일치 시 실패 종료)")
+
+    def handle(self, *args, **options):
+        lecture = None
+        if options['lecture']:
+            try:
+                lecture = Lecture.objects.get(code=options['lecture'])
+            except Lecture.DoesNotExist:
+                raise CommandError(f"강의를 찾을 수 없습니다: {options['lecture']}")
+
+        if options['check']:
+            drift = find_drift(lecture)
+            for lecture_id, student_id, expected, actual in drift:
+                self.stdout.write(
+                    f"lecture={lecture_id} student={student_id} "
+                    f"expected(present/late/absent)={expected} actual={actual}"
+                )
+            if drift:
+                raise CommandError(f"집계 불일치 {len(drift)}건")
+            self.stdout.write(self.style.SUCCESS("집계 불일치 없음"))
+            return
+
+        created = rebuild(lecture)
+        self.stdout.write(self.style.SUCCESS(f"집계 행 {created}건 재생성 완료"))
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesession',
+            name='session_code',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='students',
+            field=models.ManyToManyField(limit_choices_to={'role': 'student'}, related_name='enrolled_lectures', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='total_weeks',
+            field=models.PositiveIntegerField(default=15),
+        ),
+        migrations.CreateModel(
+            name='AttendanceChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(max_length=10)),
+                ('new_status', models.CharField(max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_logs', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='attendance.attendancesession')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changed_logs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    # 기존 출석 기록으로 집계 테이블 초기값 채우기
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    LectureStudentSummary = apps.get_model('attendance', 'LectureStudentSummary')
+
+    rows = AttendanceRecord.objects.order_by().values('session__lecture', 'student').annotate(**{
+        status: models.Count('id', filter=models.Q(status=status))
+        for status in ('present', 'late', 'absent')
+    })
+    LectureStudentSummary.objects.bulk_create([
+        LectureStudentSummary(
+            lecture_id=row['session__lecture'],
+            student_id=row['student'],
+            present=row['present'],
+            late=row['late'],
+            absent=row['absent'],
+        ) for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0002_attendancesession_session_code_lecture_students_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LectureStudentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lecture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='attendance.lecture')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('lecture', 'student')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_lecturestudentsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', 'session', 'status'], name='attrecord_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['session', 'status'], name='attrecord_session_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancesession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['session_code', 'lecture'], name='attsession_active_code_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancesession',
+            constraint=models.UniqueConstraint(fields=('lecture', 'week'), name='unique_session_per_lecture_week'),
+        ),
+    ]
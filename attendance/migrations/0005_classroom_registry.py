@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_session_record_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Classroom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('pi_host', models.CharField(max_length=255)),
+                ('pi_port', models.PositiveIntegerField(default=5000)),
+                ('capabilities', models.JSONField(blank=True, default=list)),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='lecture',
+            name='classrooms',
+            field=models.ManyToManyField(blank=True, related_name='lectures', to='attendance.classroom'),
+        ),
+    ]
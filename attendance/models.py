@@ -1,12 +1,31 @@
 from django.db import models
 from users.models import User
 
+class Classroom(models.Model):
+    """강의실과 그 강의실에 설치된 라즈베리파이(BLE 비콘) 장치"""
+    name = models.CharField(max_length=50, unique=True)
+    pi_host = models.CharField(max_length=255)
+    pi_port = models.PositiveIntegerField(default=5000)
+    capabilities = models.JSONField(default=list, blank=True)  # 예: ["ble", "display"]
+    is_active = models.BooleanField(default=True)
+    last_seen = models.DateTimeField(null=True, blank=True)  # 마지막으로 응답한 시각 (연결 확인/알림 성공)
+
+    @property
+    def pi_base_url(self):
+        return f"http://{self.pi_host}:{self.pi_port}"
+
+    def __str__(self):
+        return f"{self.name} ({self.pi_host}:{self.pi_port})"
+
+
 class Lecture(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20, unique=True)
     total_weeks = models.PositiveIntegerField(default=15)
     professor = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'professor'})
     students = models.ManyToManyField(User, related_name='enrolled_lectures', limit_choices_to={'role': 'student'})
+    # 비어 있으면 설정(RASPBERRY_PI)의 기본 장치로 알림을 보낸다. 시험처럼 여러 강의실에서 동시에 진행되면 여러 개
+    classrooms = models.ManyToManyField(Classroom, related_name='lectures', blank=True)
 
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -19,6 +38,20 @@ class AttendanceSession(models.Model):
     is_active = models.BooleanField(default=True)
     session_code = models.CharField(max_length=20, unique=True, blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            # 주차별 세션은 하나 - .get(lecture=..., week=...) 조회의 MultipleObjectsReturned 방지
+            models.UniqueConstraint(fields=['lecture', 'week'], name='unique_session_per_lecture_week'),
+        ]
+        indexes = [
+            # 출석 체크 시 활성 세션 조회 (session_code → id, lecture_id 를 인덱스만으로 해결)
+            models.Index(
+                fields=['session_code', 'lecture'],
+                condition=models.Q(is_active=True),
+                name='attsession_active_code_idx'
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.session_code:
             self.session_code = f"{self.lecture.code}_{self.week}"
@@ -36,6 +69,12 @@ class AttendanceRecord(models.Model):
 
     class Meta:
         unique_together = ('session', 'student')
+        indexes = [
+            # 학생별 출석 기록/통계: student + session(→ lecture) + status
+            models.Index(fields=['student', 'session', 'status'], name='attrecord_student_idx'),
+            # 세션별 상태 집계
+            models.Index(fields=['session', 'status'], name='attrecord_session_status_idx'),
+        ]
 
 class AttendanceChangeLog(models.Model):
     professor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="change_logs")
@@ -43,4 +82,16 @@ class AttendanceChangeLog(models.Model):
     session = models.ForeignKey(AttendanceSession, on_delete=models.CASCADE)
     old_status = models.CharField(max_length=10)
     new_status = models.CharField(max_length=10)
-    changed_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+class LectureStudentSummary(models.Model):
+    """강의 × 학생 출석 집계 (AttendanceRecord 를 비정규화한 사본, utils/summary.py 에서 갱신)"""
+    lecture = models.ForeignKey(Lecture, on_delete=models.CASCADE, related_name='summaries')
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_summaries')
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('lecture', 'student')
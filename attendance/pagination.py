@@ -0,0 +1,49 @@
+from django.http import StreamingHttpResponse
+from drf_yasg import openapi
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 500
+
+
+class IdCursorPagination(CursorPagination):
+    """id 기준 keyset 페이지네이션 - OFFSET 없이 'id > 마지막 id' 조건으로 다음 페이지를 읽는다"""
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+
+# 목록 API 공통 swagger 파라미터
+LIST_MODE_PARAMETERS = [
+    openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="다음 페이지 커서 (응답의 next)"),
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="페이지 크기 (지정 시 페이지네이션 응답)"),
+    openapi.Parameter('stream', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description="true 면 전체 목록을 스트리밍 JSON 배열로 응답"),
+]
+
+
+def _stream_json_array(rows):
+    encoder = JSONEncoder(ensure_ascii=False)
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',' if index else '') + encoder.encode(row)
+    yield ']'
+
+
+def list_response(view, request, queryset, to_row):
+    """목록 응답 - stream=true 면 스트리밍, cursor/limit 이 있으면 keyset 페이지, 없으면 기존처럼 전체 목록"""
+    params = request.query_params
+    queryset = queryset.order_by('id')
+
+    if params.get('stream') in ('1', 'true'):
+        # DB 에서 읽는 즉시 행 단위로 내보내므로 명단 크기와 무관하게 메모리 사용량이 일정하다
+        rows = (to_row(obj) for obj in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE))
+        return StreamingHttpResponse(_stream_json_array(rows), content_type='application/json')
+
+    if 'cursor' in params or 'limit' in params:
+        paginator = IdCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=view)
+        return paginator.get_paginated_response([to_row(obj) for obj in page])
+
+    return Response([to_row(obj) for obj in queryset])
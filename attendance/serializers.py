@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from users.models import User
 from .models import AttendanceSession, Lecture, AttendanceRecord
@@ -34,6 +35,15 @@ class LectureSerializer(serializers.ModelSerializer):
         model = Lecture
         fields = ['id', 'name', 'code', 'total_weeks', 'professor_name', 'students']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """목록 직렬화 시 교수/수강생을 미리 읽어 강의 수와 무관하게 쿼리 2회로 처리"""
+        return queryset.select_related('professor').only(
+            'id', 'name', 'code', 'total_weeks', 'professor__name'
+        ).prefetch_related(
+            Prefetch('students', queryset=User.objects.only('id', 'name'))
+        )
+
     def get_students(self, obj):
         return [{"id": s.id, "name": s.name} for s in obj.students.all()]
 
@@ -0,0 +1,31 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AttendanceSession, Lecture
+from .utils import session_cache
+
+
+@receiver(m2m_changed, sender=Lecture.students.through)
+def invalidate_roster_on_enrollment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        session_cache.invalidate_lecture(instance.pk)
+    elif pk_set:
+        # user.enrolled_lectures 쪽에서 변경된 경우 pk_set 은 강의 id 목록
+        for lecture_id in pk_set:
+            session_cache.invalidate_lecture(lecture_id)
+    else:
+        session_cache.clear()
+
+
+@receiver(post_save, sender=AttendanceSession)
+def invalidate_roster_on_session_close(sender, instance, **kwargs):
+    if not instance.is_active:
+        session_cache.invalidate_session(instance.session_code)
+
+
+@receiver(post_delete, sender=AttendanceSession)
+def invalidate_roster_on_session_delete(sender, instance, **kwargs):
+    session_cache.invalidate_session(instance.session_code)
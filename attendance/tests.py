@@ -1,3 +1,1355 @@
-from django.test import TestCase
+import atexit
+import csv
+import io
+import json
+import logging
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from unittest import mock, skipIf
 
-# Create your tests here.
+import requests
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.db.utils import load_backend
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Checkmate_Backend import metrics
+from Checkmate_Backend.eventlog import BufferedHandler, JsonFormatter, log_context
+from users.models import User
+from .models import AttendanceRecord, AttendanceSession, Classroom, Lecture, LectureStudentSummary
+from .utils import qr, raspberry_pi, session_cache
+from .utils.checkin import bulk_record_checkins, record_checkin
+from .utils.enrollment import import_roster
+from .utils.export import gradebook_rows
+from .utils.live_feed import LiveFeedBroker, broker, event_id
+from .utils.raspberry_pi import HealthProber, _health_dict, notify_raspberry_pi_start, notify_raspberry_pi_stop, pi_base_url
+from .utils.roster import fill_absent
+from .utils.summary import apply_bulk_created, find_drift
+from .utils.qr_token import make_token, seconds_until_rotation, verify_token
+from .utils.write_behind import CheckinQueue, fcntl
+
+
+def make_user(username, role):
+    return User.objects.create(
+        username=username,
+        email=f"{username}@test.invalid",
+        name=f"{username} 이름",
+        role=role,
+    )
+
+
+class QueryCountStableMixin:
+    """결과 크기를 늘려도 API 쿼리 수가 변하지 않는지(N+1 이 없는지) 검사"""
+
+    def assertQueryCountStable(self, request, grow):
+        with CaptureQueriesContext(connection) as small:
+            response = request()
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', response))
+
+        grow()
+
+        with CaptureQueriesContext(connection) as large:
+            response = request()
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', response))
+
+        self.assertEqual(
+            len(small), len(large),
+            "결과 크기에 따라 쿼리 수가 증가함:\n" + "\n".join(q['sql'] for q in large.captured_queries)
+        )
+
+
+class ListEndpointQueryCountTests(QueryCountStableMixin, APITestCase):
+    def setUp(self):
+        self.professor = make_user('prof', 'professor')
+        self.student = make_user('stu', 'student')
+        self.lecture = self.add_lecture('L0')
+        self.session = AttendanceSession.objects.create(lecture=self.lecture, week=1)
+        self.serial = 0
+
+    def add_lecture(self, code):
+        lecture = Lecture.objects.create(name=code, code=code, professor=self.professor)
+        lecture.students.add(self.student)
+        return lecture
+
+    def add_students(self, count=3):
+        for _ in range(count):
+            self.serial += 1
+            student = make_user(f"extra{self.serial}", 'student')
+            self.lecture.students.add(student)
+            AttendanceRecord.objects.create(session=self.session, student=student, status='present')
+
+    def add_lectures(self, count=3):
+        for _ in range(count):
+            self.serial += 1
+            lecture = self.add_lecture(f"L{self.serial}")
+            lecture.students.add(make_user(f"extra{self.serial}", 'student'))
+
+    def get_as(self, user, path, params=None):
+        self.client.force_authenticate(user)
+        return lambda: self.client.get(path, params or {})
+
+    def test_professor_lecture_list(self):
+        self.assertQueryCountStable(self.get_as(self.professor, '/api/attendance/lectures/my/'), self.add_lectures)
+
+    def test_my_lecture_list(self):
+        self.assertQueryCountStable(self.get_as(self.student, '/api/attendance/my-lectures/'), self.add_lectures)
+
+    def test_professor_lecture_list_with_more_students(self):
+        self.assertQueryCountStable(self.get_as(self.professor, '/api/attendance/lectures/my/'), self.add_students)
+
+    def test_lecture_student_list(self):
+        self.assertQueryCountStable(
+            self.get_as(self.professor, '/api/attendance/lectures/students/', {'lecture_code': 'L0'}),
+            self.add_students
+        )
+
+    def test_session_attendance_list(self):
+        self.assertQueryCountStable(
+            self.get_as(self.professor, f'/api/attendance/sessions/{self.session.session_code}/attendance/'),
+            self.add_students
+        )
+
+    def test_lecture_session_list(self):
+        def add_sessions():
+            for week in range(2, 5):
+                AttendanceSession.objects.create(lecture=self.lecture, week=week)
+
+        self.assertQueryCountStable(
+            self.get_as(self.professor, '/api/attendance/sessions/L0/list/'),
+            add_sessions
+        )
+
+    def test_attendance_statistics(self):
+        self.assertQueryCountStable(
+            self.get_as(self.professor, '/api/attendance/attendance/statistics/', {'lecture_code': 'L0'}),
+            self.add_students
+        )
+
+    def test_professor_attendance_summary(self):
+        self.assertQueryCountStable(
+            self.get_as(self.professor, '/api/attendance/attendance/summary/'),
+            self.add_lectures
+        )
+
+
+class HotQueryIndexTests(TestCase):
+    """출석 체크/통계 경로의 주요 쿼리가 전체 테이블 스캔 없이 인덱스를 타는지 EXPLAIN 으로 검사"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+        AttendanceRecord.objects.create(session=cls.session, student=cls.student, status='present')
+
+    def assertIndexScan(self, queryset, table):
+        if connection.vendor == 'postgresql':
+            # 행 수가 적으면 플래너가 순차 스캔을 고르므로 인덱스 사용 가능 여부만 본다
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+            plan = queryset.explain()
+            self.assertNotIn(f'Seq Scan on {table}', plan, plan)
+            return
+
+        plan = queryset.explain()
+        lines = [line for line in plan.splitlines() if f' {table} ' in f'{line} ']
+        self.assertTrue(lines, plan)
+        for line in lines:
+            self.assertIn('INDEX', line, plan)
+
+    def test_active_session_lookup(self):
+        self.assertIndexScan(
+            AttendanceSession.objects.filter(session_code=self.session.session_code, is_active=True),
+            'attendance_attendancesession'
+        )
+
+    def test_session_by_lecture_and_week(self):
+        self.assertIndexScan(
+            AttendanceSession.objects.filter(lecture=self.lecture, week=1),
+            'attendance_attendancesession'
+        )
+
+    def test_student_records_in_lecture(self):
+        queryset = AttendanceRecord.objects.filter(
+            student=self.student, session__lecture=self.lecture, status='present'
+        )
+        self.assertIndexScan(queryset, 'attendance_attendancerecord')
+        self.assertIndexScan(queryset, 'attendance_attendancesession')
+
+    def test_session_records_by_status(self):
+        self.assertIndexScan(
+            AttendanceRecord.objects.filter(session=self.session, status='absent'),
+            'attendance_attendancerecord'
+        )
+
+    def test_summary_row_lookup(self):
+        self.assertIndexScan(
+            LectureStudentSummary.objects.filter(lecture=self.lecture, student=self.student),
+            'attendance_lecturestudentsummary'
+        )
+
+    def test_one_session_per_lecture_week(self):
+        with self.assertRaises(IntegrityError):
+            AttendanceSession.objects.create(lecture=self.lecture, week=1, session_code='OTHER')
+
+
+class WriteBehindCheckinTests(APITestCase):
+    def setUp(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_dir = Path(spool_dir.name)
+
+        # 플러셔 스레드는 대기만 하고, 커밋은 테스트에서 직접 호출한다
+        settings_patch = override_settings(ATTENDANCE_WRITE_BEHIND={
+            'ENABLED': True,
+            'SPOOL_DIR': self.spool_dir,
+            'FLUSH_INTERVAL_MS': 600000,
+            'FLUSH_MAX_RECORDS': 100000,
+            'FSYNC': False,
+        })
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+
+        self.queue = CheckinQueue()
+        # 임시 스풀 디렉터리가 지워진 뒤 종료 시점 커밋이 돌지 않도록
+        self.addCleanup(atexit.unregister, self.queue._shutdown)
+        for target in ('attendance.views.checkin_queue', 'attendance.utils.roster.checkin_queue'):
+            patcher = mock.patch(target, self.queue)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        session_cache.clear()
+
+        self.professor = make_user('prof', 'professor')
+        self.student = make_user('stu', 'student')
+        self.lecture = Lecture.objects.create(name='L', code='L', professor=self.professor)
+        self.lecture.students.add(self.student)
+        self.session = AttendanceSession.objects.create(lecture=self.lecture, week=1)
+
+    def submit(self):
+        self.client.force_authenticate(self.student)
+        return self.client.post('/api/attendance/attendance/submit/', {'session_code': 'L_1'}, format='json')
+
+    def checkin_state(self):
+        self.client.force_authenticate(self.student)
+        return self.client.get('/api/attendance/attendance/checkin-status/', {'session_code': 'L_1'}).data['state']
+
+    def test_checkin_is_acknowledged_then_persisted(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertFalse(AttendanceRecord.objects.exists())
+        self.assertEqual(self.checkin_state(), 'queued')
+
+        self.assertEqual(self.queue.flush(), 1)
+        self.assertEqual(self.checkin_state(), 'persisted')
+        summary = LectureStudentSummary.objects.get(lecture=self.lecture, student=self.student)
+        self.assertEqual(summary.present, 1)
+        self.assertEqual(list(self.spool_dir.glob('spool-*.jsonl'))[0].read_text(), '')
+
+    def test_duplicate_while_queued(self):
+        self.submit()
+        response = self.submit()
+        self.assertEqual(response.data['message'], '이미 출석 접수됨')
+        self.queue.flush()
+        self.assertEqual(AttendanceRecord.objects.count(), 1)
+
+    def test_absent_fill_commits_queued_checkins_first(self):
+        self.submit()
+        fill_absent(self.session)
+        self.assertEqual(AttendanceRecord.objects.get(student=self.student).status, 'present')
+
+    @skipIf(fcntl is None, "flock 이 없는 환경 (Windows)")
+    def test_orphaned_spool_is_replayed(self):
+        # 이전 프로세스가 커밋 전에 죽으면서 남긴 스풀
+        orphan = self.spool_dir / 'spool-1-dead.jsonl'
+        orphan.write_text(json.dumps({
+            "session_id": self.session.id,
+            "student_id": self.student.id,
+            "lecture_id": self.lecture.id,
+            "status": "late",
+        }) + '\n{"session_id": ')
+
+        self.assertEqual(self.queue.drain(), 1)
+        self.assertFalse(orphan.exists())
+        self.assertEqual(AttendanceRecord.objects.get(student=self.student).status, 'late')
+
+    def enqueue_both(self):
+        other = make_user('stu2', 'student')
+        self.lecture.students.add(other)
+        roster = session_cache.get_roster('L_1')
+        self.queue.enqueue(roster, self.student.id)
+        self.queue.enqueue(roster, other.id)
+        return other
+
+    def failing_for(self, student, error):
+        def commit(pairs, status):
+            if any(student_id == student.id for _, student_id in pairs):
+                raise error
+            return bulk_record_checkins(pairs, status)
+        patcher = mock.patch('attendance.utils.write_behind.bulk_record_checkins', side_effect=commit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failing_row_is_quarantined_without_blocking_others(self):
+        other = self.enqueue_both()
+        self.failing_for(other, IntegrityError('FOREIGN KEY constraint failed'))
+
+        with self.assertLogs('checkmate.events', 'ERROR'):
+            self.assertEqual(self.queue.flush(), 2)
+        self.assertEqual(AttendanceRecord.objects.get().student_id, self.student.id)
+        quarantined = json.loads((self.spool_dir / 'quarantine.jsonl').read_text())
+        self.assertEqual((quarantined['student_id'], quarantined['session_code']), (other.id, 'L_1'))
+        self.assertEqual(self.queue.stats()['pending'], 0)
+        self.assertEqual(self.queue.stats()['quarantined'], 1)
+        self.assertEqual(self.queue.flush(), 0)
+        # 세션 종료(결석 처리)도 막히지 않는다
+        self.assertEqual(fill_absent(self.session), 1)
+
+    def test_database_error_keeps_batch_queued(self):
+        other = self.enqueue_both()
+        self.failing_for(other, OperationalError('database is locked'))
+
+        with self.assertRaises(OperationalError):
+            self.queue.flush()
+        self.assertEqual(self.queue.stats()['pending'], 1)
+        self.assertFalse((self.spool_dir / 'quarantine.jsonl').exists())
+        self.assertTrue(self.queue.is_queued(self.session.id, other.id))
+
+    @skipIf(fcntl is None, "flock 이 없는 환경 (Windows)")
+    def test_drain_commits_checkins_spooled_by_other_workers(self):
+        self.queue.drain()
+        # 살아 있는 다른 워커 프로세스의 스풀 (잠금 보유)
+        spool = open(self.spool_dir / 'spool-2-live.jsonl', 'a', encoding='utf-8')
+        self.addCleanup(spool.close)
+        fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        spool.write(json.dumps({
+            "session_id": self.session.id, "student_id": self.student.id,
+            "lecture_id": self.lecture.id, "status": "present", "session_code": "L_1",
+        }) + "\n")
+        spool.flush()
+
+        self.assertEqual(self.checkin_state(), 'queued')
+        fill_absent(self.session)
+        self.assertEqual(AttendanceRecord.objects.get(student=self.student).status, 'present')
+        self.assertTrue((self.spool_dir / 'spool-2-live.jsonl').exists())
+        self.assertEqual(self.checkin_state(), 'persisted')
+
+
+class LiveFeedStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        session_cache.clear()
+
+    def stream_path(self, user):
+        return f'/api/attendance/sessions/L_1/events/?token={AccessToken.for_user(user)}'
+
+    async def read_events(self, response, count):
+        chunks = []
+        iterator = response.streaming_content.__aiter__()
+        try:
+            for _ in range(count):
+                chunks.append(await iterator.__anext__())
+        finally:
+            await iterator.aclose()
+        return [chunk.decode() for chunk in chunks]
+
+    def test_checkin_is_published_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_checkin(session_cache.get_roster('L_1'), self.student.id)
+        channel = broker._channel(self.session.id)
+        self.assertEqual(json.loads(channel.events[-1].data)['records'], [
+            {"student_id": self.student.id, "status": "present"}
+        ])
+
+    async def test_resume_from_last_event_id(self):
+        broker.publish(self.session.id, 'attendance', {"records": [{"student_id": 1, "status": "present"}]})
+        broker.publish(self.session.id, 'attendance', {"records": [{"student_id": 2, "status": "late"}]})
+        last_seen = broker._channel(self.session.id).seq - 1
+
+        response = await self.async_client.get(
+            self.stream_path(self.professor), headers={'Last-Event-ID': event_id(last_seen)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        retry, event = await self.read_events(response, 2)
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertIn(f"id: {event_id(last_seen + 1)}\n", event)
+        self.assertIn('"student_id": 2', event)
+
+    async def test_stale_event_id_gets_reset(self):
+        response = await self.async_client.get(self.stream_path(self.professor), headers={'Last-Event-ID': '0-1'})
+        _, event = await self.read_events(response, 2)
+        self.assertIn('event: reset', event)
+
+    async def test_reconnect_to_ended_session_closes_stream(self):
+        # 서버 재시작 전의 id 로 재연결 - 버퍼에 end 이벤트가 없어도 끝난 세션이면 스트림을 닫는다
+        await AttendanceSession.objects.filter(pk=self.session.pk).aupdate(is_active=False)
+        response = await self.async_client.get(self.stream_path(self.professor), headers={'Last-Event-ID': '0-1'})
+        events = [chunk.decode() async for chunk in response.streaming_content]
+        self.assertEqual([event.split('event: ')[1].split('\n')[0] for event in events[1:]], ['reset', 'end'])
+
+    async def test_subscribed_channel_survives_eviction(self):
+        with override_settings(ATTENDANCE_LIVE_FEED={**settings.ATTENDANCE_LIVE_FEED, 'MAX_SESSIONS': 1}):
+            feed = LiveFeedBroker()
+        channel, waiter = feed.subscribe(1)
+        feed.publish(1, 'attendance', {})
+        feed.publish(2, 'attendance', {})  # 캐시 한도 1 - 구독자가 없었다면 세션 1 채널이 방출됨
+        self.assertIs(feed._channel(1), channel)
+        self.assertEqual(channel.seq, 1)
+
+        feed.unsubscribe(1, channel, waiter)
+        self.assertIs(feed._channel(1), channel)
+        feed.publish(2, 'attendance', {})
+        self.assertIsNot(feed._channel(1), channel)
+
+    async def test_only_lecture_professor(self):
+        other = await User.objects.acreate(username='other', email='other@test.invalid', name='o', role='professor')
+        response = await self.async_client.get(self.stream_path(other))
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.get('/api/attendance/sessions/L_1/events/')
+        self.assertEqual(response.status_code, 401)
+
+
+class AsyncCheckinViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.outsider = make_user('out', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        session_cache.clear()
+
+    def submit(self, user):
+        return self.async_client.post(
+            '/api/attendance/async/attendance/submit/', {'session_code': 'L_1'},
+            content_type='application/json', headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        )
+
+    async def test_submit_matches_sync_view(self):
+        response = await self.submit(self.student)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], '출석 완료')
+
+        response = await self.submit(self.student)
+        self.assertEqual(response.json()['message'], '이미 출석 처리됨')
+        self.assertEqual(await AttendanceRecord.objects.filter(session=self.session).acount(), 1)
+        summary = await LectureStudentSummary.objects.aget(lecture=self.lecture, student=self.student)
+        self.assertEqual(summary.present, 1)
+
+    async def test_submit_requires_enrollment_and_token(self):
+        response = await self.submit(self.outsider)
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.post(
+            '/api/attendance/async/attendance/submit/', {'session_code': 'L_1'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_ble_checkin(self):
+        response = await self.async_client.post('/api/attendance/async/attendance/ble/', {
+            'student_id': self.student.id, 'lecture_code': 'L', 'session_code': 'L_1'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], 'BLE 출석 완료')
+
+    async def test_form_and_multipart_bodies_like_drf_views(self):
+        response = await self.async_client.post('/api/attendance/async/attendance/ble/', {
+            'student_id': self.student.id, 'lecture_code': 'L', 'session_code': 'L_1'
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        response = await self.async_client.post(
+            '/api/attendance/async/attendance/submit/', 'session_code=L_1',
+            content_type='application/x-www-form-urlencoded',
+            headers={'Authorization': f'Bearer {AccessToken.for_user(self.student)}'}
+        )
+        self.assertEqual(response.json()['message'], '이미 출석 처리됨')
+        response = await self.async_client.post(
+            '/api/attendance/async/attendance/ble/', 'not json', content_type='text/plain'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class RaspberryPiHealthTests(TestCase):
+    def setUp(self):
+        self.http = mock.Mock()
+        patcher = mock.patch('attendance.utils.raspberry_pi._client', return_value=self.http)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        def slow_pong(url, timeout):
+            time.sleep(0.1)
+            return mock.Mock(status_code=200, json=lambda: {'message': 'pong'})
+        self.http.get.side_effect = slow_pong
+
+    def test_concurrent_refreshes_share_one_probe(self):
+        prober = HealthProber('http://pi.invalid')
+        threads = [threading.Thread(target=prober.refresh) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.http.get.call_count, 1)
+        self.assertTrue(prober.status['connected'])
+        self.assertGreater(prober.status['latency_ms'], 0)
+
+    def test_fresh_status_is_served_from_cache(self):
+        prober = HealthProber('http://pi.invalid')
+        prober.get()
+        prober.get()
+        self.assertEqual(self.http.get.call_count, 1)
+
+    def test_unexpected_reply_is_reported_not_raised(self):
+        self.http.get.side_effect = None
+        self.http.get.return_value = mock.Mock(status_code=503)
+        status = HealthProber('http://pi.invalid').refresh()
+        self.assertFalse(status['connected'])
+        self.assertEqual(status['error'], 'HTTP 503')
+
+    def test_non_object_json_reply_is_not_connected(self):
+        self.http.get.side_effect = None
+        for body in (['pong'], 'pong', None):
+            self.http.get.return_value = mock.Mock(status_code=200, json=lambda body=body: body)
+            status = HealthProber('http://pi.invalid').refresh()
+            self.assertFalse(status['connected'])
+            self.assertEqual(status['error'], 'unexpected reply')
+
+    def test_waiter_gets_unknown_status_when_first_probe_is_slow(self):
+        release = threading.Event()
+
+        def hanging(url, timeout):
+            release.wait(5)
+            return mock.Mock(status_code=200, json=lambda: {'message': 'pong'})
+        self.http.get.side_effect = hanging
+        prober = HealthProber('http://pi.invalid')
+        leader = threading.Thread(target=prober.refresh)
+        leader.start()
+        self.addCleanup(leader.join)
+        self.addCleanup(release.set)
+        while prober._inflight is None:
+            time.sleep(0.001)
+
+        with override_settings(RASPBERRY_PI={**settings.RASPBERRY_PI, 'HEALTH_TIMEOUT': -0.9}):
+            status = prober.refresh()
+        self.assertFalse(status['connected'])
+        self.assertEqual(status['error'], 'unknown')
+        self.assertIn('age_seconds', _health_dict(prober, status))
+
+    def test_probe_thread_survives_unexpected_errors(self):
+        prober = HealthProber('http://pi.invalid')
+        calls = []
+
+        def refresh():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('boom')
+            raise SystemExit  # 두 번째 주기에서 루프 종료
+        with mock.patch.object(prober, 'refresh', side_effect=refresh), \
+                override_settings(RASPBERRY_PI={**settings.RASPBERRY_PI, 'HEALTH_INTERVAL_SECONDS': 0}), \
+                self.assertLogs('checkmate.events', 'ERROR'), self.assertRaises(SystemExit):
+            prober._run()
+        self.assertEqual(len(calls), 2)
+
+    def test_response_marks_classroom_seen_by_id(self):
+        raspberry_pi._seen.clear()
+        self.addCleanup(raspberry_pi._seen.clear)
+        # URL 로 바꾸면 호스트 표기가 달라지는 강의실도 id 로 기록
+        upper = Classroom.objects.create(name='A101', pi_host='PI-A101.Campus')
+        ipv6 = Classroom.objects.create(name='B202', pi_host='[fe80::1]')
+        prober = HealthProber(upper.pi_base_url)
+        prober.classroom_ids.add(upper.id)
+        prober.refresh()
+
+        self.http.post.return_value = mock.Mock(status_code=202)
+        delivery = raspberry_pi.Delivery('start', 'L_1', ipv6.name, ipv6.pi_base_url, '/api/ble/advertise/', {},
+                                         ipv6.id)
+        with mock.patch('attendance.utils.raspberry_pi.health_prober'):
+            raspberry_pi.NotificationDispatcher()._attempt(delivery)
+        self.assertEqual(delivery.status, 'delivered')
+
+        for classroom in (upper, ipv6):
+            classroom.refresh_from_db()
+            self.assertIsNotNone(classroom.last_seen)
+
+
+    async def test_async_check_targets_requested_classroom(self):
+        classroom = await Classroom.objects.acreate(name='A101', pi_host='10.0.0.11')
+        with mock.patch('attendance.async_views.araspberry_pi_health', return_value={'connected': True}) as health:
+            response = await self.async_client.get('/api/attendance/async/raspi-check/', {'classroom': 'A101'})
+            self.assertEqual(response.status_code, 200)
+            health.assert_awaited_once_with(classroom.pi_base_url, classroom.id)
+
+            response = await self.async_client.get('/api/attendance/async/raspi-check/', {'classroom': 'Z999'})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(health.await_count, 1)
+
+class RaspberryPiRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        patcher = mock.patch('attendance.utils.raspberry_pi._dispatcher')
+        self.dispatcher = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lecture_without_classroom_uses_default_device(self):
+        deliveries = notify_raspberry_pi_start(self.session)
+        self.assertEqual([d.base_url for d in deliveries], [pi_base_url()])
+
+    def test_multi_room_session_fans_out_per_device(self):
+        self.lecture.classrooms.add(
+            Classroom.objects.create(name='A101', pi_host='10.0.0.11'),
+            Classroom.objects.create(name='B202', pi_host='10.0.0.12', pi_port=5001),
+            Classroom.objects.create(name='OFF', pi_host='10.0.0.13', is_active=False),
+        )
+        starts = notify_raspberry_pi_start(self.session)
+        self.assertEqual(
+            sorted((d.device, d.url) for d in starts),
+            [('A101', 'http://10.0.0.11:5000/api/ble/advertise/'), ('B202', 'http://10.0.0.12:5001/api/ble/advertise/')]
+        )
+        self.assertEqual(self.dispatcher.submit.call_count, 2)
+
+        # 종료 알림은 같은 장치의 미전송 시작 알림만 취소
+        stops = notify_raspberry_pi_stop(self.session)
+        self.assertEqual({d.device for d in stops}, {'A101', 'B202'})
+        self.assertEqual({d.status for d in starts}, {'cancelled'})
+
+
+class EnrollmentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.kept = make_user('kept', 'student')
+        cls.dropped = make_user('dropped', 'student')
+        cls.lecture.students.add(cls.kept, cls.dropped)
+
+    def roster(self, *rows):
+        return io.StringIO("\n".join(("학번,이름,이메일", *rows)) + "\n")
+
+    def test_import_diff_and_batched_queries(self):
+        session_code = AttendanceSession.objects.create(lecture=self.lecture, week=1).session_code
+        session_cache.load_roster(session_code)
+        lines = self.roster('kept,,', 'new1,새학생1,', 'new2,새학생2,new2@example.com', 'prof,,', 'new1,중복,', ',x,')
+        with override_settings(ATTENDANCE_ENROLLMENT={**settings.ATTENDANCE_ENROLLMENT, 'BATCH_SIZE': 100}):
+            with CaptureQueriesContext(connection) as ctx:
+                report = import_roster(self.lecture, lines, sync=True)
+
+        self.assertEqual(sorted(report.added), ['new1', 'new2'])
+        self.assertEqual(report.removed, ['dropped'])
+        self.assertEqual(report.unchanged, 1)
+        self.assertEqual(sorted(report.created_users), ['new1', 'new2'])
+        self.assertEqual(sorted(reason for _, _, reason in report.skipped), ["명단 내 중복", "학번 없음", "학생 계정이 아님"])
+        # 행 수와 무관한 쿼리 수 (배치 1개 + 제외 처리)
+        self.assertLessEqual(len(ctx.captured_queries), 12)
+
+        self.assertEqual(
+            set(self.lecture.students.values_list('username', flat=True)), {'kept', 'new1', 'new2'}
+        )
+        new1 = User.objects.get(username='new1')
+        self.assertEqual((new1.role, new1.email, new1.has_usable_password()), ('student', 'new1@students.invalid', False))
+        # bulk_create 는 m2m 시그널이 없으므로 명단 캐시를 직접 무효화해야 한다
+        self.assertIsNone(session_cache._rosters.get(session_code))
+
+    def test_dry_run_and_additive_mode_leave_enrollment(self):
+        report = import_roster(self.lecture, self.roster('kept,,', 'new1,새학생1,'), dry_run=True)
+        self.assertEqual((report.added, report.removed), (['new1'], ['dropped']))
+        self.assertFalse(User.objects.filter(username='new1').exists())
+
+        import_roster(self.lecture, self.roster('kept,,'))
+        self.assertEqual(self.lecture.students.count(), 2)
+
+    def test_missing_username_column_rejected(self):
+        with self.assertRaises(ValueError):
+            import_roster(self.lecture, io.StringIO("name\nx\n"))
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        session_cache.clear()
+        metrics.registry.reset()
+        # 미들웨어보다 먼저 열린 테스트 DB 연결에도 계측을 건다 (비동기 클라이언트는 다른 스레드에서 미들웨어를 만든다)
+        metrics._install(connection)
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_counts_queries_per_route_and_exposes_prometheus_text(self):
+        self.client.post('/api/attendance/attendance/submit/', {'session_code': 'L_1'},
+                         content_type='application/json', **self.auth(self.student))
+        self.client.get('/api/attendance/weekly/', {'lecture_code': 'L', 'week': 1}, **self.auth(self.professor))
+
+        text = self.client.get('/metrics/').content.decode()
+        self.assertIn('checkmate_requests_total{route="submit-attendance",method="POST",status="200"} 1', text)
+        # 이름 없는 경로는 URL 패턴으로 구분
+        self.assertIn('route="api/attendance/weekly/"', text)
+        self.assertIn('checkmate_request_queries_count{route="submit-attendance"} 1', text)
+        queries = re.search(r'checkmate_request_queries_sum\{route="submit-attendance"\} ([\d.]+)', text)
+        self.assertGreater(float(queries.group(1)), 0)
+
+    def test_slow_requests_keep_sql_fingerprints(self):
+        with override_settings(METRICS={**settings.METRICS, 'SLOW_REQUEST_MS': 0}), \
+                self.assertLogs('checkmate.metrics', 'WARNING'):
+            self.client.get('/api/attendance/attendance/statistics/', {'lecture_code': 'L'}, **self.auth(self.professor))
+            slow = self.client.get('/metrics/slow/').json()['slow_requests']
+
+        entry = next(item for item in slow if item['route'] == 'attendance-statistics')
+        self.assertGreater(entry['queries'], 0)
+        self.assertTrue(entry['sql'])
+        self.assertFalse(any('IN (%s,' in item['fingerprint'] for item in entry['sql']))
+
+    def test_metrics_endpoint_requires_token_when_configured(self):
+        with override_settings(METRICS={**settings.METRICS, 'TOKEN': 'secret'}):
+            self.assertEqual(self.client.get('/metrics/').status_code, 403)
+            response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+
+    def test_streaming_response_is_recorded_when_body_is_sent(self):
+        AttendanceRecord.objects.create(session=self.session, student=self.student)
+        path = '/api/attendance/sessions/L_1/attendance/'
+        queries = re.compile(r'checkmate_request_queries_sum\{route="session-attendance-list"\} ([\d.]+)')
+        self.client.get(path, **self.auth(self.professor))
+        buffered = float(queries.search(metrics.registry.render()).group(1))
+
+        response = self.client.get(path, {'stream': 'true'}, **self.auth(self.professor))
+        self.assertIn('session-attendance-list"} 1\n', metrics.registry.render())
+        self.assertEqual(json.loads(b''.join(response.streaming_content))[0]['student_name'], 'stu 이름')
+        text = metrics.registry.render()
+        self.assertIn('checkmate_request_queries_count{route="session-attendance-list"} 2', text)
+        # 본문을 만들며 실행한 목록 조회까지 같은 요청으로 집계
+        self.assertEqual(float(queries.search(text).group(1)), buffered * 2)
+
+        # 본문을 다 읽지 않고 닫힌 응답도 기록
+        self.client.get(path, {'stream': 'true'}, **self.auth(self.professor)).close()
+        self.assertIn('checkmate_request_queries_count{route="session-attendance-list"} 3', metrics.registry.render())
+
+    async def test_async_view_queries_are_attributed_to_route(self):
+        await self.async_client.post(
+            '/api/attendance/async/attendance/submit/', {'session_code': 'L_1'},
+            content_type='application/json', headers={'Authorization': f'Bearer {AccessToken.for_user(self.student)}'}
+        )
+        text = metrics.registry.render()
+        self.assertIn('checkmate_requests_total{route="submit-attendance-async",method="POST",status="200"} 1', text)
+        self.assertNotIn('checkmate_request_queries_sum{route="submit-attendance-async"} 0', text)
+
+
+class EventLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+
+    def setUp(self):
+        session_cache.clear()
+        patcher = mock.patch('attendance.utils.raspberry_pi._dispatcher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.stream = io.StringIO()
+        self.handler = BufferedHandler()
+        self.handler.target = logging.StreamHandler(self.stream)
+        self.handler.setFormatter(JsonFormatter())
+        # 상위 checkmate 로거에 설정된 stderr 핸들러로 전파하지 않고 이 핸들러로만 받는다
+        events = logging.getLogger('checkmate.events')
+        events.addHandler(self.handler)
+        self.addCleanup(events.removeHandler, self.handler)
+        patcher = mock.patch.object(events, 'propagate', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        level = events.level
+        events.setLevel(logging.INFO)
+        self.addCleanup(events.setLevel, level)
+
+    def events(self):
+        self.handler.flush()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    # 표본 추출되는 출석 체크 이벤트는 빼고 본다
+    @override_settings(EVENT_LOG={**settings.EVENT_LOG, 'SAMPLE_RATES': {'checkin': 0.0}})
+    def test_session_lifecycle_shares_session_and_request_ids(self):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.professor)}'}
+        response = self.client.post('/api/attendance/sessions/start/', {'lecture_code': 'L', 'week': 1},
+                                    content_type='application/json', HTTP_X_REQUEST_ID='trace-1', **auth)
+        self.assertEqual(response['X-Request-ID'], 'trace-1')
+        self.client.post('/api/attendance/attendance/submit/', {'session_code': 'L_1'}, content_type='application/json',
+                         HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.student)}')
+        self.client.post('/api/attendance/sessions/end/', {'session_id': 'L_1'}, content_type='application/json', **auth)
+
+        events = [event for event in self.events() if event.get('session') == 'L_1']
+        # 디스패처를 막아 두었으므로 시작 알림은 전송 전에 종료 알림에 의해 취소된다
+        self.assertEqual([event['event'] for event in events], ['session.started', 'pi.notify.cancelled', 'session.ended'])
+        self.assertEqual(events[0]['request_id'], 'trace-1')
+
+    def test_checkin_events_are_sampled(self):
+        session = AttendanceSession.objects.create(lecture=self.lecture, week=1)
+        roster = session_cache.get_roster(session.session_code)
+        with override_settings(EVENT_LOG={**settings.EVENT_LOG, 'SAMPLE_RATES': {'checkin': 1.0}}):
+            record_checkin(roster, self.student.id)
+        AttendanceRecord.objects.all().delete()
+        with override_settings(EVENT_LOG={**settings.EVENT_LOG, 'SAMPLE_RATES': {'checkin': 0.0}}):
+            record_checkin(roster, self.student.id)
+
+        self.assertEqual([event['event'] for event in self.events()], ['checkin.recorded'])
+
+
+class BLEBatchCheckinTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.other = make_user('stu2', 'student')
+        cls.outsider = make_user('out', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student, cls.other)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        session_cache.clear()
+
+    def post_batch(self, items):
+        return self.client.post('/api/attendance/attendance/ble/batch/', {'items': items},
+                                content_type='application/json')
+
+    def test_results_per_item(self):
+        AttendanceRecord.objects.create(session=self.session, student=self.other, status='present')
+        response = self.post_batch([
+            {'student_id': self.student.id, 'session_code': 'L_1', 'observed_at': '2024-03-04T10:00:00'},
+            {'student_id': self.student.id, 'session_code': 'L_1'},
+            {'student_id': self.other.id, 'session_code': 'L_1'},
+            {'student_id': self.outsider.id, 'session_code': 'L_1'},
+            {'student_id': self.student.id, 'session_code': 'NOPE'},
+            {'student_id': 'abc', 'session_code': 'L_1'},
+            'garbage',
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual([item['result'] for item in response.json()['results']], [
+            'created', 'duplicate', 'duplicate', 'not_enrolled', 'session_not_found', 'invalid', 'invalid'
+        ])
+        self.assertEqual(LectureStudentSummary.objects.get(lecture=self.lecture, student=self.student).present, 1)
+
+    def test_impossible_date_only_invalidates_that_item(self):
+        response = self.post_batch([
+            {'student_id': self.student.id, 'session_code': 'L_1', 'observed_at': '2024-02-30 10:00'},
+            {'student_id': self.other.id, 'session_code': 'L_1', 'observed_at': '2024-02-29 10:00'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['result'] for item in response.json()['results']], ['invalid', 'created'])
+
+    def test_rows_inserted_concurrently_are_not_counted(self):
+        roster = session_cache.get_roster('L_1')
+        # 기존 기록 조회 이후, 삽입 직전에 단건 출석이 먼저 기록한 상황 - 조회 결과를 비워 삽입 충돌을 재현
+        AttendanceRecord.objects.create(session=self.session, student=self.other, status='late')
+
+        with mock.patch('django.db.models.query.QuerySet.values_list', return_value=[]), \
+                self.captureOnCommitCallbacks(execute=True):
+            created = bulk_record_checkins([(roster, self.student.id), (roster, self.other.id)])
+
+        self.assertEqual(created, {(self.session.id, self.student.id)})
+        self.assertEqual(AttendanceRecord.objects.get(student=self.other).status, 'late')
+        self.assertFalse(LectureStudentSummary.objects.filter(student=self.other).exists())
+        channel = broker._channel(self.session.id)
+        self.assertEqual(json.loads(channel.events[-1].data)['records'], [
+            {"student_id": self.student.id, "status": "present"}
+        ])
+
+
+class AttendanceSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.other = make_user('stu2', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student, cls.other)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        session_cache.clear()
+
+    def summary(self, student):
+        row = LectureStudentSummary.objects.get(lecture=self.lecture, student=student)
+        return row.present, row.late, row.absent
+
+    def manual_update(self, student, status):
+        return self.client.post('/api/attendance/attendance/manual-update/', {
+            'lecture_code': 'L', 'week': 1, 'student_username': student.username, 'status': status,
+        }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.professor)}')
+
+    def test_checkin_and_manual_update_adjust_counts(self):
+        response = self.client.post('/api/attendance/attendance/submit/', {'session_code': 'L_1', 'status': 'late'},
+                                    content_type='application/json',
+                                    HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.student)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary(self.student), (0, 1, 0))
+
+        self.assertEqual(self.manual_update(self.student, 'present').status_code, 200)
+        self.assertEqual(self.summary(self.student), (1, 0, 0))
+        # 같은 상태로 다시 수정하면 변화 없음
+        self.manual_update(self.student, 'present')
+        self.assertEqual(self.summary(self.student), (1, 0, 0))
+
+        self.manual_update(self.other, 'absent')
+        self.assertEqual(self.summary(self.other), (0, 0, 1))
+        self.assertEqual(find_drift(self.lecture), [])
+
+    def test_bulk_created_rows_racing_with_another_insert_are_still_counted(self):
+        LectureStudentSummary.objects.create(lecture=self.lecture, student=self.student, present=1)
+        # 기존 행 조회 이후 다른 요청이 같은 행을 만든 상황 - 조회 결과를 비워 bulk_create 충돌을 재현
+        with mock.patch('django.db.models.query.QuerySet.values_list', return_value=[]):
+            apply_bulk_created(self.lecture.id, [self.student.id, self.other.id], 'present')
+        self.assertEqual(self.summary(self.student), (2, 0, 0))
+        self.assertEqual(self.summary(self.other), (1, 0, 0))
+
+    def test_rebuild_check_reports_and_fixes_drift(self):
+        roster = session_cache.get_roster('L_1')
+        bulk_record_checkins([(roster, self.student.id), (roster, self.other.id)])
+        call_command('rebuild_attendance_summary', '--check', stdout=io.StringIO())
+
+        LectureStudentSummary.objects.filter(student=self.other).update(present=5)
+        out = io.StringIO()
+        with self.assertRaisesMessage(CommandError, '집계 불일치 1건'):
+            call_command('rebuild_attendance_summary', '--check', '--lecture', 'L', stdout=out)
+        self.assertIn(f"student={self.other.id} expected(present/late/absent)=(1, 0, 0) actual=(5, 0, 0)",
+                      out.getvalue())
+
+        call_command('rebuild_attendance_summary', stdout=io.StringIO())
+        self.assertEqual(self.summary(self.other), (1, 0, 0))
+        call_command('rebuild_attendance_summary', '--check', stdout=io.StringIO())
+
+
+@mock.patch('attendance.utils.raspberry_pi._dispatcher', mock.Mock())
+class AbsentFillModeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.present = make_user('stu', 'student')
+        cls.missing = make_user('stu2', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.present, cls.missing)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+        AttendanceRecord.objects.create(session=cls.session, student=cls.present, status='present')
+
+    def setUp(self):
+        session_cache.clear()
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.professor)}'}
+
+    def weekly(self):
+        response = self.client.get('/api/attendance/weekly/', {'lecture_code': 'L', 'week': 1}, **self.auth)
+        return {row['student_id']: row['status'] for row in response.json()['records']}
+
+    def end_session(self):
+        return self.client.post('/api/attendance/sessions/end/', {'session_id': 'L_1'},
+                                content_type='application/json', **self.auth)
+
+    def absent_records(self):
+        return list(AttendanceRecord.objects.filter(status='absent').values_list('student_id', flat=True))
+
+    @override_settings(ATTENDANCE_ABSENT_FILL='read')
+    def test_read_mode_fills_on_weekly_view(self):
+        self.assertEqual(self.end_session().status_code, 200)
+        self.assertEqual(self.absent_records(), [])
+
+        expected = {self.present.id: 'present', self.missing.id: 'absent'}
+        self.assertEqual(self.weekly(), expected)
+        self.assertEqual(self.absent_records(), [self.missing.id])
+        # 두 번째 조회는 이미 채워져 있으므로 새로 기록하지 않는다
+        self.assertEqual(self.weekly(), expected)
+        self.assertEqual(LectureStudentSummary.objects.get(student=self.missing).absent, 1)
+
+    @override_settings(ATTENDANCE_ABSENT_FILL='close')
+    def test_close_mode_fills_on_session_end_and_weekly_is_read_only(self):
+        # 종료 전 조회는 기록을 만들지 않고 결석으로 보여주기만 한다
+        self.assertEqual(self.weekly(), {self.present.id: 'present', self.missing.id: 'absent'})
+        self.assertEqual(self.absent_records(), [])
+
+        self.assertEqual(self.end_session().status_code, 200)
+        self.assertEqual(self.absent_records(), [self.missing.id])
+        self.assertEqual(fill_absent(self.session), 0)
+        self.assertEqual(LectureStudentSummary.objects.get(student=self.missing).absent, 1)
+
+
+class RosterCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.late_joiner = make_user('stu2', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+
+    def setUp(self):
+        session_cache.clear()
+        self.session = AttendanceSession.objects.create(lecture=self.lecture, week=1)
+
+    def test_cached_roster_needs_no_queries(self):
+        roster = session_cache.get_roster('L_1')
+        self.assertEqual(roster.student_ids, {self.student.id})
+        with self.assertNumQueries(0):
+            self.assertIs(session_cache.get_roster('L_1'), roster)
+            self.assertIs(session_cache.get_roster_by_id(self.session.id), roster)
+
+    def test_enrollment_changes_invalidate_roster(self):
+        session_cache.get_roster('L_1')
+        self.lecture.students.add(self.late_joiner)
+        self.assertIn(self.late_joiner.id, session_cache.get_roster('L_1').student_ids)
+
+        # 학생 쪽(역방향)에서 바꿔도 무효화
+        self.late_joiner.enrolled_lectures.remove(self.lecture)
+        self.assertNotIn(self.late_joiner.id, session_cache.get_roster_by_id(self.session.id).student_ids)
+
+    def test_closed_or_deleted_session_is_dropped_under_both_keys(self):
+        session_cache.get_roster('L_1')
+        self.session.is_active = False
+        self.session.save()
+        self.assertIsNone(session_cache._rosters.get('L_1'))
+        self.assertIsNone(session_cache._rosters.get(('id', self.session.id)))
+        self.assertIsNone(session_cache.get_roster('L_1'))
+
+        other = AttendanceSession.objects.create(lecture=self.lecture, week=2)
+        other_id = other.id
+        session_cache.get_roster_by_id(other_id)
+        other.delete()
+        self.assertIsNone(session_cache._rosters.get('L_2'))
+        self.assertIsNone(session_cache._rosters.get(('id', other_id)))
+
+
+@override_settings(RASPBERRY_PI={**settings.RASPBERRY_PI, 'MAX_ATTEMPTS': 4, 'BACKOFF_SECONDS': 1,
+                                 'BACKOFF_MAX_SECONDS': 3})
+class NotificationDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.http = mock.Mock()
+        self.device = mock.Mock(deliveries=Counter())
+        for target, kwargs in (
+            ('attendance.utils.raspberry_pi._client', {'return_value': self.http}),
+            ('attendance.utils.raspberry_pi.health_prober', {'return_value': self.device}),
+            ('attendance.utils.raspberry_pi._mark_seen', {}),
+            # 전송 스레드 없이 재시도 예약 큐만 확인
+            ('attendance.utils.raspberry_pi.NotificationDispatcher._start', {}),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.dispatcher = raspberry_pi.NotificationDispatcher()
+
+    def delivery(self):
+        return raspberry_pi.Delivery('start', 'L_1', 'A101', 'http://pi.invalid', '/api/ble/advertise/', {})
+
+    def scheduled(self):
+        return [(round(due - time.monotonic()), delivery) for due, _, delivery in sorted(self.dispatcher._queue)]
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        self.http.post.return_value = mock.Mock(status_code=503)
+        delivery = self.delivery()
+        with self.assertLogs('checkmate.events', 'WARNING') as logs:
+            # 1, 2, 4 초 → 상한 3 초
+            for expected_delay in (1, 2, 3):
+                self.dispatcher._attempt(delivery)
+                self.assertEqual(self.scheduled(), [(expected_delay, delivery)])
+                self.dispatcher._queue.clear()
+            self.dispatcher._attempt(delivery)
+
+        self.assertEqual(self.dispatcher._queue, [])
+        self.assertEqual((delivery.status, delivery.attempts, delivery.last_error), ('failed', 4, 'HTTP 503'))
+        self.assertEqual(self.device.deliveries, Counter(retried=3, failed=1))
+        self.assertEqual(len([line for line in logs.output if 'ERROR' in line]), 1)
+
+    def test_retry_succeeds_and_request_id_is_forwarded(self):
+        self.http.post.side_effect = [requests.ConnectionError('refused'), mock.Mock(status_code=202)]
+        with log_context(request_id='trace-1'):
+            delivery = self.delivery()
+        with self.assertLogs('checkmate.events', 'WARNING'):
+            self.dispatcher._attempt(delivery)
+        self.assertEqual(delivery.last_error, 'refused')
+        self.dispatcher._attempt(delivery)
+
+        self.assertEqual((delivery.status, delivery.attempts), ('delivered', 2))
+        self.assertEqual(self.http.post.call_args.kwargs['headers'], {'X-Request-ID': 'trace-1'})
+
+    def test_earliest_due_delivery_runs_first_and_cancelled_ones_are_skipped(self):
+        later, cancelled, due = self.delivery(), self.delivery(), self.delivery()
+        self.dispatcher.submit(later, delay=60)
+        self.dispatcher.submit(cancelled)
+        self.dispatcher.submit(due)
+        cancelled.finish('cancelled')
+
+        self.assertIs(self.dispatcher._next_due(), cancelled)
+        self.assertIs(self.dispatcher._next_due(), due)
+        with mock.patch.object(self.dispatcher, '_next_due', side_effect=[cancelled, due, SystemExit]), \
+                mock.patch.object(self.dispatcher, '_attempt') as attempt, self.assertRaises(SystemExit):
+            self.dispatcher._run()
+        attempt.assert_called_once_with(due)
+        self.assertEqual(self.scheduled(), [(60, later)])
+
+    def test_unexpected_error_fails_the_delivery_and_keeps_the_worker_running(self):
+        broken, ok = self.delivery(), self.delivery()
+        self.http.post.side_effect = [RuntimeError('boom'), mock.Mock(status_code=200)]
+        with mock.patch.object(self.dispatcher, '_next_due', side_effect=[broken, ok, SystemExit]), \
+                self.assertLogs('checkmate.events', 'ERROR') as logs, self.assertRaises(SystemExit):
+            self.dispatcher._run()
+
+        self.assertEqual(broken.status, 'failed')
+        self.assertEqual(broken.last_error, 'RuntimeError: boom')
+        self.assertEqual(ok.status, 'delivered')
+        self.assertEqual(len(logs.output), 1)
+
+
+class QRCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.other_professor = make_user('prof2', 'professor')
+        cls.student = make_user('stu', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.lecture.students.add(cls.student)
+        cls.session = AttendanceSession.objects.create(lecture=cls.lecture, week=1)
+
+    def setUp(self):
+        session_cache.clear()
+        qr._rendered.clear()
+        # 토큰 회전 구간을 고정
+        self.now = 1_000_000.0
+        patcher = mock.patch('attendance.utils.qr_token.time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def auth(user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def image(self, user=None, **headers):
+        if user is not False:
+            headers.update(self.auth(user or self.professor))
+        return self.client.get('/api/attendance/qr/image', {'session_code': 'L_1'}, **headers)
+
+    def generate(self, user):
+        return self.client.get('/api/attendance/attendance/qr/generate/', {'session_id': 'L_1'}, **self.auth(user))
+
+    def test_only_the_lecture_professor_gets_the_live_token(self):
+        # 학생/다른 교수/비로그인 사용자가 QR(유효 토큰)을 받아 원격으로 출석하지 못하도록
+        self.assertEqual(self.image(False).status_code, 401)
+        for user in (self.student, self.other_professor):
+            self.assertEqual(self.image(user).status_code, 403)
+            response = self.generate(user)
+            self.assertEqual(response.status_code, 403)
+            self.assertNotIn('qr_image_base64', response.json())
+        self.assertEqual(self.image().status_code, 200)
+        self.assertEqual(self.generate(self.professor).status_code, 200)
+
+    def test_image_revalidates_with_etag_until_token_rotates(self):
+        with mock.patch('attendance.utils.qr.render_png', wraps=qr.render_png) as render:
+            first = self.image()
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first['Content-Type'], 'image/png')
+            self.assertEqual(first['Cache-Control'], 'no-cache')
+            etag = first['ETag']
+
+            revalidated = self.image(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated.content, b'')
+            self.assertEqual(revalidated['ETag'], etag)
+            self.assertEqual(self.image(HTTP_IF_NONE_MATCH=f'"stale", {etag}').status_code, 304)
+            self.assertEqual(render.call_count, 1)
+
+            self.now += settings.QR_TOKEN['ROTATE_SECONDS']
+            rotated = self.image(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(rotated.status_code, 200)
+            self.assertNotEqual(rotated['ETag'], etag)
+            self.assertEqual(render.call_count, 2)
+
+    def test_generate_view_shares_etag_with_image(self):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.professor)}'}
+        response = self.client.get('/api/attendance/attendance/qr/generate/', {'session_id': 'L_1'}, **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['qr_image_base64'], qr.session_qr(self.session.id).base64)
+        self.assertEqual(response['ETag'], self.image()['ETag'])
+
+        response = self.client.get('/api/attendance/attendance/qr/generate/', {'session_id': 'L_1'},
+                                   HTTP_IF_NONE_MATCH=response['ETag'], **auth)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(QR_TOKEN={**settings.QR_TOKEN, 'ROTATE_SECONDS': 30, 'GRACE_WINDOWS': 1})
+class QRTokenTests(SimpleTestCase):
+    issued_at = 1_000_020.0  # 구간 시작(1_000_020 = 30 × 33_334) 시각
+
+    def verify_after(self, token, seconds):
+        return verify_token(token, at=self.issued_at + seconds)
+
+    def test_token_is_valid_for_its_window_and_the_grace_window(self):
+        token = make_token(7, at=self.issued_at)
+        self.assertEqual(self.verify_after(token, 0), 7)
+        self.assertEqual(self.verify_after(token, 29), 7)
+        self.assertEqual(self.verify_after(token, 59), 7)
+        # 허용 구간이 지나면 만료
+        self.assertIsNone(self.verify_after(token, 60))
+        # 미래 구간 토큰도 거부
+        self.assertIsNone(self.verify_after(token, -1))
+        self.assertNotEqual(make_token(7, at=self.issued_at + 30), token)
+
+    def test_forged_or_malformed_tokens_are_rejected(self):
+        session_id, bucket, signature = make_token(7, at=self.issued_at).split('.')
+        for token in (
+            f"8.{bucket}.{signature}",                  # 다른 세션
+            f"{session_id}.{int(bucket) - 1}.{signature}",  # 다른 구간
+            f"{session_id}.{bucket}.{signature[:-1]}x",
+            f"{session_id}.{bucket}",
+            "L_1",
+            None,
+        ):
+            self.assertIsNone(verify_token(token, at=self.issued_at), token)
+
+    def test_seconds_until_rotation(self):
+        self.assertEqual(seconds_until_rotation(at=self.issued_at), 30)
+        self.assertEqual(seconds_until_rotation(at=self.issued_at + 0.5), 29)
+        self.assertEqual(seconds_until_rotation(at=self.issued_at + 29), 1)
+
+
+class ListPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor)
+        cls.empty = Lecture.objects.create(name='E', code='E', professor=cls.professor)
+        cls.lecture.students.add(*(make_user(f"stu{i}", 'student') for i in range(5)))
+
+    def setUp(self):
+        self.client.force_authenticate(self.professor)
+
+    def students(self, lecture_code='L', **params):
+        return self.client.get('/api/attendance/lectures/students/', {'lecture_code': lecture_code, **params})
+
+    def test_cursor_pages_follow_next_without_gaps_or_duplicates(self):
+        everything = [row['id'] for row in self.students().json()]
+        self.assertEqual(everything, sorted(everything))
+
+        page = self.students(limit=2).json()
+        seen = [row['id'] for row in page['results']]
+        # 페이지를 넘기는 중에 추가된 학생도 빠지거나 중복되지 않는다
+        late = make_user('late', 'student')
+        self.lecture.students.add(late)
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            self.assertLessEqual(len(page['results']), 2)
+            seen += [row['id'] for row in page['results']]
+        self.assertEqual(seen, everything + [late.id])
+
+    def test_stream_matches_full_list(self):
+        response = self.students(stream='true')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), self.students().json())
+
+        empty = self.students('E', stream='1')
+        self.assertEqual(b''.join(empty.streaming_content), b'[]')
+
+
+class GradebookExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor = make_user('prof', 'professor')
+        cls.first = make_user('stu1', 'student')
+        cls.dropped = make_user('stu2', 'student')
+        cls.absent = make_user('stu3', 'student')
+        cls.last = make_user('stu4', 'student')
+        cls.lecture = Lecture.objects.create(name='L', code='L', professor=cls.professor, total_weeks=4)
+        cls.lecture.students.add(cls.first, cls.dropped, cls.absent, cls.last)
+        sessions = {week: AttendanceSession.objects.create(lecture=cls.lecture, week=week) for week in (1, 2, 3)}
+        for student, week, status in (
+            (cls.first, 1, 'present'), (cls.first, 3, 'late'),
+            (cls.dropped, 1, 'present'), (cls.dropped, 2, 'present'),
+            (cls.last, 2, 'absent'), (cls.last, 3, 'present'),
+        ):
+            AttendanceRecord.objects.create(session=sessions[week], student=student, status=status)
+        # 수강을 취소한 학생의 기록은 남아 있어도 출석부에 나오지 않는다
+        cls.lecture.students.remove(cls.dropped)
+
+    def test_rows_merge_students_with_their_records(self):
+        with self.assertNumQueries(3):
+            rows = list(gradebook_rows(self.lecture))
+        self.assertEqual(rows, [
+            ['학번', '이름', '1주차', '2주차', '3주차', '4주차', '출석', '지각', '결석', '출석률'],
+            ['stu1', 'stu1 이름', '출석', '', '지각', '', 1, 1, 0, 37.5],
+            ['stu3', 'stu3 이름', '', '', '', '', 0, 0, 0, 0.0],
+            ['stu4', 'stu4 이름', '', '결석', '출석', '', 1, 0, 1, 25.0],
+        ])
+
+    def test_csv_download_streams_the_same_rows(self):
+        response = self.client.get('/api/attendance/attendance/export/', {'lecture_code': 'L'},
+                                   HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.professor)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="L_attendance.csv"')
+        text = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(text.startswith('﻿'))
+        rows = list(csv.reader(io.StringIO(text[1:])))
+        self.assertEqual(rows[0][:3], ['학번', '이름', '1주차'])
+        self.assertEqual([row[0] for row in rows[1:]], ['stu1', 'stu3', 'stu4'])
+        self.assertEqual(rows[1][-1], '37.5')
+
+
+class SQLiteTunedBackendTests(SimpleTestCase):
+    def connect(self, options):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'Checkmate_Backend.sqlite_tuned',
+            'NAME': str(Path(tmp.name) / 'tuned.sqlite3'),
+            'OPTIONS': options,
+        }
+        wrapper = load_backend('Checkmate_Backend.sqlite_tuned').DatabaseWrapper(settings_dict, alias='tuned')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_every_new_connection(self):
+        wrapper = self.connect({'timeout': 5, 'pragmas': {
+            'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -2048, 'temp_store': 'MEMORY',
+        }})
+        for _ in range(2):
+            self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+            self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+            self.assertEqual(self.pragma(wrapper, 'cache_size'), -2048)
+            self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)  # MEMORY
+            self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+            # 재연결해도 다시 적용
+            wrapper.close()
+
+    def test_without_pragmas_behaves_like_sqlite_backend(self):
+        wrapper = self.connect({})
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
@@ -2,12 +2,13 @@ from django.urls import path
 from .views import (
     StartAttendanceSessionView, EndAttendanceSessionView,
     StudentAttendanceStatsView, MyAttendanceRecordsView, AttendanceStatisticsView,
-    AttendanceRecordCreateView, ManualAttendanceUpdateView,
+    AttendanceRecordCreateView, ManualAttendanceUpdateView, CheckinStatusView,
     LectureCreateView, ProfessorLectureListView, LectureSessionListView,
-    BLEAttendanceView, QRAttendanceView, QRCodeGenerateView,
+    BLEAttendanceView, BLEBatchAttendanceView, QRAttendanceView, QRCodeGenerateView,
     SessionAttendanceListView, StudentSearchView, ProfessorAttendanceSummaryView,
-    RaspberryPiConnectionCheckView, MyLectureListView, WeeklyAttendanceView, LectureStudentListView, qr_image_view
+    RaspberryPiConnectionCheckView, RaspberryPiDeliveryStatusView, RaspberryPiDeviceListView, MyLectureListView, WeeklyAttendanceView, LectureStudentListView, AttendanceExportView, qr_image_view
 )
+from . import async_views
 
 urlpatterns = [
     # 세션 관리
@@ -15,6 +16,7 @@ urlpatterns = [
     path('sessions/end/', EndAttendanceSessionView.as_view(), name='end-attendance-session'),
     path('sessions/<str:lecture_code>/list/', LectureSessionListView.as_view(), name='lecture-sessions'),
     path('sessions/<str:session_code>/attendance/', SessionAttendanceListView.as_view(), name='session-attendance-list'),
+    path('sessions/<str:session_code>/events/', async_views.session_event_stream, name='session-event-stream'),
 
     # 강의 관련
     path('lectures/create/', LectureCreateView.as_view(), name='create-lecture'),
@@ -22,6 +24,7 @@ urlpatterns = [
 
     # 출석 처리
     path('attendance/submit/', AttendanceRecordCreateView.as_view(), name='submit-attendance'),
+    path('attendance/checkin-status/', CheckinStatusView.as_view(), name='checkin-status'),
     path('attendance/manual-update/', ManualAttendanceUpdateView.as_view(), name='manual-attendance-update'),
 
     # 출석 통계
@@ -29,12 +32,16 @@ urlpatterns = [
     path('attendance/my-records/', MyAttendanceRecordsView.as_view(), name='my-attendance-records'),
     path('attendance/stats/<str:lecture_code>/', StudentAttendanceStatsView.as_view(), name='student-attendance-stats'),
     path('attendance/summary/', ProfessorAttendanceSummaryView.as_view(), name='attendance-summary'),
+    path('attendance/export/', AttendanceExportView.as_view(), name='attendance-export'),
 
     # BLE / QR 출석
     path('attendance/ble/', BLEAttendanceView.as_view(), name='ble-attendance'),
+    path('attendance/ble/batch/', BLEBatchAttendanceView.as_view(), name='ble-attendance-batch'),
     path('attendance/qr/', QRAttendanceView.as_view(), name='qr-attendance'),
     path('attendance/qr/generate/', QRCodeGenerateView.as_view(), name='generate-qr'),
     path('raspi-check/', RaspberryPiConnectionCheckView.as_view(), name='raspi-check'),
+    path('raspi-devices/', RaspberryPiDeviceListView.as_view(), name='raspi-devices'),
+    path('raspi-deliveries/<str:delivery_id>/', RaspberryPiDeliveryStatusView.as_view(), name='raspi-delivery-status'),
 
     # 학생 검색
     path('students/search/', StudentSearchView.as_view(), name='search-students'),
@@ -45,5 +52,11 @@ urlpatterns = [
 
     path('lectures/students/', LectureStudentListView.as_view(), name='lecture-students'),
 
-    path('qr/image', qr_image_view, name='qr-image-view')
+    path('qr/image', qr_image_view, name='qr-image-view'),
+
+    # ASGI 네이티브(비동기) 출석 체크 - 요청/응답 형식은 위 동기 API 와 동일
+    path('async/attendance/submit/', async_views.attendance_submit, name='submit-attendance-async'),
+    path('async/attendance/qr/', async_views.qr_attendance, name='qr-attendance-async'),
+    path('async/attendance/ble/', async_views.ble_attendance, name='ble-attendance-async'),
+    path('async/raspi-check/', async_views.raspberry_pi_connection_check, name='raspi-check-async'),
 ]
\ No newline at end of file
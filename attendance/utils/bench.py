@@ -0,0 +1,124 @@
+import logging
+import math
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Checkmate_Backend.eventlog import BufferedHandler
+from users.models import User
+from attendance.models import Lecture, AttendanceSession, AttendanceRecord
+from attendance.utils.summary import rebuild
+
+# 실제 데이터 분포와 비슷한 상태 비율 (출석 85%, 지각 10%, 결석 5%)
+STATUS_MIX = (('present', 0.85), ('late', 0.10), ('absent', 0.05))
+
+
+@contextmanager
+def isolated_database():
+    """벤치마크 전용 임시 테스트 DB를 만들고 끝나면 제거 (운영 데이터는 건드리지 않음)"""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+
+@contextmanager
+def redirect_events(path):
+    """요청마다 남는 이벤트 로그가 결과 출력에 섞이지 않도록 측정 중에는 stderr 대신 path 로 보낸다
+    (로그 기록 비용은 그대로 측정에 포함, CHECKMATE_LOG_FILE 로 이미 파일에 쓰는 경우는 건드리지 않음)"""
+    handlers = {
+        handler
+        for name in ('checkmate', 'attendance', 'ble')
+        for handler in logging.getLogger(name).handlers
+        if isinstance(handler, BufferedHandler)
+        and type(handler.target) is logging.StreamHandler
+    }
+    if not handlers:
+        yield
+        return
+    with open(path, 'a', encoding='utf-8') as stream:
+        previous = {handler: handler.target.setStream(stream) for handler in handlers}
+        try:
+            yield
+        finally:
+            for handler, original in previous.items():
+                handler.flush()
+                handler.target.setStream(original)
+
+
+def make_lecture(code, n_students, weeks=15, seed=0):
+    """합성 강의 생성: 교수 1명, 수강생 n명, 주차별 세션과 출석 기록"""
+    rng = random.Random(seed)
+    statuses, weights = zip(*STATUS_MIX)
+
+    professor = User.objects.create(
+        username=f"{code}_prof", email=f"{code}_prof@bench.invalid",
+        name=f"{code} 교수", role='professor', password='!'
+    )
+    lecture = Lecture.objects.create(name=f"{code} 강의", code=code, total_weeks=weeks, professor=professor)
+
+    User.objects.bulk_create([
+        User(
+            username=f"{code}_s{i}", email=f"{code}_s{i}@bench.invalid",
+            name=f"학생{i}", role='student', password='!'
+        ) for i in range(n_students)
+    ], batch_size=500)
+    students = list(User.objects.filter(username__startswith=f"{code}_s").values_list('id', flat=True))
+    lecture.students.add(*students)
+
+    sessions = [
+        AttendanceSession.objects.create(lecture=lecture, week=week, is_active=False)
+        for week in range(1, weeks + 1)
+    ]
+    AttendanceRecord.objects.bulk_create([
+        AttendanceRecord(session=session, student_id=student_id, status=rng.choices(statuses, weights)[0])
+        for session in sessions
+        for student_id in students
+    ], batch_size=2000)
+    rebuild(lecture)
+    return lecture
+
+
+def make_dataset(n_lectures, n_students, weeks=15, seed=0, prefix='D'):
+    """합성 데이터셋: 강의 n개 (강의마다 교수 1명, 수강생 n명, 주차별 출석 기록)"""
+    return [make_lecture(f"{prefix}{i}", n_students, weeks=weeks, seed=seed + i) for i in range(n_lectures)]
+
+
+def measure(fn, repeat=5):
+    """fn 을 repeat 회 실행해 회당 쿼리 수와 지연시간(ms) 중앙값/최댓값을 반환"""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(ctx.captured_queries)
+    return {
+        "queries": queries,
+        "median_ms": round(statistics.median(timings), 2),
+        "max_ms": round(max(timings), 2),
+    }
+
+
+def percentile(sorted_values, q):
+    """정렬된 값의 q 분위수 (nearest-rank)"""
+    return sorted_values[max(math.ceil(len(sorted_values) * q) - 1, 0)]
+
+
+def load_summary(latencies, elapsed):
+    """동시 요청 부하 결과 요약 - 초당 처리량과 지연시간(ms) 분위수"""
+    latencies = sorted(latencies)
+    return {
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
@@ -0,0 +1,89 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+
+from Checkmate_Backend.eventlog import log_event
+from attendance.models import AttendanceRecord, AttendanceSession
+from .live_feed import publish_records
+from .summary import apply_bulk_created, apply_status_change
+
+
+def checkin_message(label, created, status_code):
+    """출석 체크 응답 메시지 - 200 은 기록 완료, 202 는 지연 쓰기 모드의 접수"""
+    if not created:
+        return "이미 출석 처리됨" if status_code == 200 else "이미 출석 접수됨"
+    return f"{label} 완료" if status_code == 200 else f"{label} 접수됨"
+
+
+def record_checkin(roster, student_id, status='present'):
+    """검증이 끝난 출석을 기록, 새로 기록했으면 True (이미 출석했으면 False)
+    기록 INSERT 와 집계 갱신은 한 트랜잭션으로 묶는다"""
+    try:
+        with transaction.atomic():
+            AttendanceRecord.objects.create(session_id=roster.session_id, student_id=student_id, status=status)
+            apply_status_change(roster.lecture_id, student_id, new_status=status)
+    except IntegrityError:
+        return False
+
+    publish_records(roster.session_id, [(student_id, status)], 'checkin')
+    log_event('checkin.recorded', sample='checkin', session=roster.session_code, student=student_id, status=status)
+    return True
+
+
+async def arecord_checkin(roster, student_id, status='present'):
+    """record_checkin 의 비동기 버전 - 이미 출석한 경우(BLE 재감지 등)는 SELECT 1회로 끝난다"""
+    if await AttendanceRecord.objects.filter(session_id=roster.session_id, student_id=student_id).aexists():
+        return False
+    return await sync_to_async(record_checkin)(roster, student_id, status)
+
+
+@transaction.atomic
+def bulk_record_checkins(pairs, status='present'):
+    """(roster, student_id) 목록을 한 트랜잭션으로 기록 - 세션 잠금 1회 + 기존 기록 조회 1회 + bulk_create 1회
+    새로 기록된 (session_id, student_id) 집합을 반환"""
+    pairs = {(roster.session_id, student_id): roster for roster, student_id in pairs}
+    if not pairs:
+        return set()
+
+    # 같은 세션의 일괄 기록끼리는 세션 행 잠금으로 직렬화 - 조회와 삽입 사이에 다른 배치가 끼어들지 않는다
+    session_ids = {session_id for session_id, _ in pairs}
+    list(AttendanceSession.objects.select_for_update().filter(id__in=session_ids).values_list('id', flat=True))
+
+    student_ids = {student_id for _, student_id in pairs}
+    existing = set(AttendanceRecord.objects.filter(
+        session_id__in=session_ids,
+        student_id__in=student_ids
+    ).values_list('session_id', 'student_id'))
+
+    new_keys = pairs.keys() - existing
+    if not new_keys:
+        return set()
+    try:
+        with transaction.atomic():
+            AttendanceRecord.objects.bulk_create([
+                AttendanceRecord(session_id=session_id, student_id=student_id, status=status)
+                for session_id, student_id in new_keys
+            ])
+        created = new_keys
+    except IntegrityError:
+        # 잠금을 거치지 않는 단건 출석(record_checkin)이 먼저 기록한 행이 있음 - 한 건씩 삽입해 실제로 넣은 행만 남긴다
+        created = set()
+        for session_id, student_id in new_keys:
+            try:
+                with transaction.atomic():
+                    AttendanceRecord.objects.create(session_id=session_id, student_id=student_id, status=status)
+            except IntegrityError:
+                continue
+            created.add((session_id, student_id))
+
+    by_lecture = {}
+    by_session = {}
+    for session_id, student_id in created:
+        by_lecture.setdefault(pairs[(session_id, student_id)].lecture_id, []).append(student_id)
+        by_session.setdefault(session_id, []).append((student_id, status))
+    for lecture_id, lecture_student_ids in by_lecture.items():
+        apply_bulk_created(lecture_id, lecture_student_ids, status)
+    for session_id, records in by_session.items():
+        publish_records(session_id, records, 'checkin')
+        session_code = pairs[(session_id, records[0][0])].session_code
+        log_event('checkin.batch_recorded', session=session_code, count=len(records), status=status)
+    return created
@@ -0,0 +1,169 @@
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from users.models import User
+from attendance.models import Lecture
+from .session_cache import invalidate_lecture
+
+# 학사 시스템 수강생 명단(CSV) 일괄 반영.
+# 행을 BATCH_SIZE 단위로 읽어 학번 → 사용자 조회(in_bulk), 없는 학생 생성(bulk_create),
+# 수강 등록(through 모델 bulk_create) 을 배치마다 몇 번의 쿼리로 처리한다. 행 수와 무관하게 메모리는 배치 크기만큼만 쓴다.
+# bulk_create 는 m2m_changed 시그널을 보내지 않으므로 명단 캐시는 마지막에 직접 무효화한다.
+
+# CSV 헤더 → User 필드 (내보내기 파일의 한글 헤더도 그대로 받는다)
+COLUMNS = {
+    'username': 'username', '학번': 'username',
+    'name': 'name', '이름': 'name',
+    'email': 'email', '이메일': 'email',
+    'major': 'major', '전공': 'major',
+}
+
+
+def _config(key):
+    return settings.ATTENDANCE_ENROLLMENT[key]
+
+
+class EnrollmentReport:
+    """명단 반영 결과 - 기존 수강생 대비 추가/제외/유지 학번과 건너뛴 행"""
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.unchanged = 0
+        self.created_users = []
+        self.skipped = []  # (줄 번호, 학번, 사유)
+
+    def as_dict(self):
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "unchanged": self.unchanged,
+            "created_users": len(self.created_users),
+            "skipped": len(self.skipped),
+        }
+
+    def diff_rows(self):
+        """(학번, 변경, 비고) - 보고서 CSV 용"""
+        yield from ((username, 'added', '') for username in self.added)
+        yield from ((username, 'removed', '') for username in self.removed)
+        yield from ((username, 'skipped', f"{line}행: {reason}") for line, username, reason in self.skipped)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _rows(lines):
+    """CSV 줄 → (줄 번호, {필드: 값}) - 알 수 없는 열은 무시"""
+    reader = csv.DictReader(lines)
+    fields = {header: COLUMNS[header.strip()] for header in reader.fieldnames or () if header.strip() in COLUMNS}
+    if 'username' not in fields.values():
+        raise ValueError("CSV 에 username(학번) 열이 필요합니다.")
+    for row in reader:
+        yield reader.line_num, {field: (row.get(header) or '').strip() for header, field in fields.items()}
+
+
+def import_roster(lecture, lines, sync=False, dry_run=False):
+    """수강생 명단을 강의에 반영하고 EnrollmentReport 반환
+    sync=True 면 명단에 없는 기존 수강생을 수강 취소, dry_run=True 면 변경 없이 결과만 계산"""
+    report = EnrollmentReport()
+    try:
+        with transaction.atomic():
+            _import(lecture, _rows(lines), sync, report)
+            if dry_run:
+                raise _Rollback
+    except _Rollback:
+        pass
+    else:
+        if report.added or (sync and report.removed):
+            invalidate_lecture(lecture.id)
+    return report
+
+
+def _import(lecture, rows, sync, report):
+    through = Lecture.students.through
+    enrolled = set(through.objects.filter(lecture=lecture).values_list('user_id', flat=True))
+    seen = set()
+    batch_size = _config('BATCH_SIZE')
+
+    while batch := list(islice(rows, batch_size)):
+        rows_by_username = {}
+        for line, row in batch:
+            username = row.get('username')
+            if not username:
+                report.skipped.append((line, '', "학번 없음"))
+            elif username in rows_by_username:
+                report.skipped.append((line, username, "명단 내 중복"))
+            else:
+                rows_by_username[username] = (line, row)
+
+        users = User.objects.only('id', 'username', 'role').in_bulk(rows_by_username, field_name='username')
+        _create_missing(rows_by_username, users, report)
+
+        batch_ids = {}
+        for username, (line, row) in rows_by_username.items():
+            user = users.get(username)
+            if user is None:
+                continue
+            if user.role != 'student':
+                report.skipped.append((line, username, "학생 계정이 아님"))
+                continue
+            batch_ids[user.id] = username
+
+        new_ids = batch_ids.keys() - enrolled
+        through.objects.bulk_create(
+            [through(lecture_id=lecture.id, user_id=user_id) for user_id in new_ids],
+            ignore_conflicts=True
+        )
+        report.added.extend(batch_ids[user_id] for user_id in new_ids)
+        report.unchanged += len(batch_ids) - len(new_ids)
+        enrolled |= new_ids
+        seen |= batch_ids.keys()
+
+    removed_ids = list(enrolled - seen)
+    for start in range(0, len(removed_ids), batch_size):
+        chunk = removed_ids[start:start + batch_size]
+        report.removed.extend(User.objects.filter(id__in=chunk).values_list('username', flat=True))
+        if sync:
+            through.objects.filter(lecture=lecture, user_id__in=chunk).delete()
+
+
+def _create_missing(rows_by_username, users, report):
+    """명단에는 있지만 계정이 없는 학생을 비밀번호 없이(로그인 불가) 생성하고 users 에 채운다"""
+    domain = _config('DEFAULT_EMAIL_DOMAIN')
+    candidates = {}
+    for username, (line, row) in rows_by_username.items():
+        if username in users:
+            continue
+        if not row.get('name'):
+            report.skipped.append((line, username, "신규 학생인데 이름 없음"))
+            continue
+        candidates[username] = row.get('email') or f"{username}@{domain}"
+
+    taken = set(User.objects.filter(email__in=candidates.values()).values_list('email', flat=True))
+    new_users = []
+    for username, email in candidates.items():
+        line, row = rows_by_username[username]
+        if email in taken:
+            report.skipped.append((line, username, f"이메일 중복 ({email})"))
+            continue
+        taken.add(email)
+        new_users.append(User(
+            username=username,
+            email=email,
+            name=row['name'],
+            major=row.get('major', ''),
+            role='student',
+            password=make_password(None),
+        ))
+
+    User.objects.bulk_create(new_users)
+    # DB 에 따라 bulk_create 가 pk 를 채우지 않으므로 다시 조회
+    users.update(User.objects.only('id', 'username', 'role').in_bulk(
+        [user.username for user in new_users], field_name='username'
+    ))
+    report.created_users.extend(user.username for user in new_users)
@@ -0,0 +1,83 @@
+import csv
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+from django.db.models import Max
+
+from attendance.models import AttendanceRecord, AttendanceSession
+from .stats import attendance_rate
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def gradebook_rows(lecture):
+    """학생 × 주차 출결표를 헤더부터 한 행씩 생성
+    수강생(id 순)과 출석 기록(학생 id, 주차 순) 두 커서를 병합하므로 기록 수와 무관하게 메모리 사용량이 일정하다."""
+    labels = dict(AttendanceRecord._meta.get_field('status').choices)
+    last_week = AttendanceSession.objects.filter(lecture=lecture).aggregate(w=Max('week'))['w'] or 0
+    weeks = range(1, max(lecture.total_weeks, last_week) + 1)
+
+    yield ['학번', '이름', *[f"{week}주차" for week in weeks], '출석', '지각', '결석', '출석률']
+
+    students = lecture.students.order_by('id').values_list('id', 'username', 'name').iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    records = AttendanceRecord.objects.filter(session__lecture=lecture).order_by(
+        'student_id', 'session__week'
+    ).values_list('student_id', 'session__week', 'status').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    groups = groupby(records, key=itemgetter(0))
+    current = next(groups, None)
+    for student_id, username, name in students:
+        # 수강을 취소한 학생의 기록은 건너뛴다
+        while current is not None and current[0] < student_id:
+            current = next(groups, None)
+
+        statuses = {}
+        if current is not None and current[0] == student_id:
+            statuses = {week: status for _, week, status in current[1]}
+            current = next(groups, None)
+
+        counts = {status: 0 for status in labels}
+        for status in statuses.values():
+            counts[status] += 1
+
+        yield [
+            username,
+            name,
+            *[labels.get(statuses.get(week), '') for week in weeks],
+            counts['present'],
+            counts['late'],
+            counts['absent'],
+            attendance_rate(counts['present'], counts['late'], lecture.total_weeks),
+        ]
+
+
+class _Echo:
+    """csv.writer 가 쓴 한 줄을 그대로 돌려주는 가짜 버퍼"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield '﻿'  # 엑셀에서 한글이 깨지지 않도록 UTF-8 BOM
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows):
+    """openpyxl write-only 모드로 행을 바로 임시 파일에 기록하고 파일 객체를 반환 (openpyxl 필요)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('출석부')
+    for row in rows:
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from Checkmate_Backend.lru import TTLCache
+
+# 세션별 실시간 출석 이벤트 (프로세스 내 pub/sub).
+# 출석 기록 경로(동기 스레드)가 커밋 후 이벤트를 발행하면, 세션을 구독 중인 SSE 스트림(이벤트 루프)을 깨운다.
+# 세션마다 최근 이벤트를 링 버퍼에 보관해 재연결 시 Last-Event-ID 이후 이벤트를 이어서 보낸다.
+# 워커 프로세스 간에는 공유되지 않으므로 다른 워커에서 처리된 출석은 보이지 않는다 (대시보드는 단일 ASGI 워커 기준).
+
+Event = namedtuple('Event', 'seq name data')
+
+# 이벤트 id 는 "<프로세스 시작 시각>-<세션 내 순번>" - 서버 재시작 전의 id 로 재연결하면 reset 을 보낸다
+_EPOCH = format(int(time.time() * 1000), 'x')
+
+
+def _config(key):
+    return settings.ATTENDANCE_LIVE_FEED[key]
+
+
+class _Channel:
+    def __init__(self):
+        self.events = deque(maxlen=_config('BUFFER_SIZE'))
+        self.seq = 0
+        self.waiters = set()
+
+
+class LiveFeedBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = TTLCache(maxsize=_config('MAX_SESSIONS'), ttl=_config('TTL_SECONDS'))
+        # 구독자가 있는 채널은 캐시 방출(TTL/MAX_SESSIONS)과 무관하게 유지 - 마지막 구독자가 떠나면 캐시로 돌려보낸다
+        self._pinned = {}
+
+    def _channel(self, session_id):
+        channel = self._pinned.get(session_id) or self._channels.get(session_id)
+        if channel is None:
+            channel = _Channel()
+            self._channels.set(session_id, channel)
+        return channel
+
+    def publish(self, session_id, name, data):
+        with self._lock:
+            channel = self._channel(session_id)
+            channel.seq += 1
+            channel.events.append(Event(channel.seq, name, json.dumps(data, ensure_ascii=False)))
+            waiters = list(channel.waiters)
+
+        for loop, wakeup in waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # 구독자의 이벤트 루프가 이미 닫힘
+                pass
+
+    def subscribe(self, session_id):
+        """현재 이벤트 루프에서 깨어날 asyncio.Event 를 등록하고 (채널, 깨우기 이벤트) 반환"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            channel = self._channel(session_id)
+            channel.waiters.add(waiter)
+            self._pinned[session_id] = channel
+        return channel, waiter
+
+    def unsubscribe(self, session_id, channel, waiter):
+        with self._lock:
+            channel.waiters.discard(waiter)
+            if not channel.waiters and self._pinned.get(session_id) is channel:
+                del self._pinned[session_id]
+                self._channels.set(session_id, channel)
+
+    def since(self, channel, cursor):
+        """cursor 이후 이벤트와 새 cursor 반환, 버퍼에서 밀려나 이어 보낼 수 없으면 events 는 None"""
+        with self._lock:
+            if cursor is None:
+                return [], channel.seq
+            oldest = channel.events[0].seq if channel.events else channel.seq + 1
+            if cursor > channel.seq or cursor < oldest - 1:
+                return None, channel.seq
+            return [event for event in channel.events if event.seq > cursor], channel.seq
+
+
+broker = LiveFeedBroker()
+
+
+def event_id(seq):
+    return f"{_EPOCH}-{seq}"
+
+
+def parse_event_id(value):
+    """Last-Event-ID → 순번, 형식이 틀리거나 이전 프로세스의 id 면 -1 (reset 대상)"""
+    if not value:
+        return None
+    epoch, _, seq = value.partition('-')
+    if epoch != _EPOCH or not seq.isdigit():
+        return -1
+    return int(seq)
+
+
+def publish_records(session_id, records, source):
+    """출석 기록 변경 이벤트 - 트랜잭션 안에서 호출되면 커밋 후에 발행 (롤백되면 발행하지 않음)"""
+    records = [{"student_id": student_id, "status": status} for student_id, status in records]
+    if not records:
+        return
+    data = {"records": records, "source": source, "at": timezone.now().isoformat()}
+    transaction.on_commit(lambda: broker.publish(session_id, 'attendance', data))
+
+
+def publish_session_end(session_id):
+    transaction.on_commit(lambda: broker.publish(session_id, 'end', {"at": timezone.now().isoformat()}))
@@ -0,0 +1,70 @@
+import base64
+import hashlib
+from collections import namedtuple
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.utils.http import parse_etags
+
+from Checkmate_Backend.lru import TTLCache
+from .qr_token import make_token
+
+# QR 이미지는 페이로드 문자열만으로 결정되므로 PNG 렌더링 결과를 LRU 로 재사용한다
+RenderedQR = namedtuple('RenderedQR', 'png base64 etag')
+
+_rendered = TTLCache(
+    maxsize=settings.QR_CACHE['MAX_ENTRIES'],
+    ttl=settings.QR_CACHE['TTL_SECONDS'],
+)
+
+
+def qr_payload(param, value):
+    return f"checkmate://attendance?{param}={value}"
+
+
+def render_png(payload):
+    image = qrcode.make(payload)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def get_qr(payload):
+    """페이로드의 QR 이미지 (캐시 적중 시 렌더링 없음)"""
+    rendered = _rendered.get(payload)
+    if rendered is None:
+        png = render_png(payload)
+        rendered = RenderedQR(
+            png=png,
+            base64=base64.b64encode(png).decode(),
+            etag=f'"{hashlib.sha256(png).hexdigest()[:32]}"',
+        )
+        _rendered.set(payload, rendered)
+    return rendered
+
+
+def session_qr(session_id):
+    """세션의 현재 시간 구간 토큰을 담은 QR (구간이 바뀌면 새 페이로드로 렌더링)"""
+    return get_qr(qr_payload('token', make_token(session_id)))
+
+
+def prerender_session(session_id):
+    """세션 시작 시 현재 구간의 QR 을 미리 렌더링"""
+    session_qr(session_id)
+
+
+def is_not_modified(request, etag):
+    """If-None-Match 가 현재 ETag 와 일치하면 True (304 응답 대상)"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def set_cache_headers(response, etag):
+    # 프로젝터가 주기적으로 새로고침해도 매번 재검증하되 내용이 같으면 304 로 끝나도록
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,46 @@
+import base64
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+# 회전형 QR 토큰: "<세션 id>.<시간 구간>.<서명>"
+# 서명은 SECRET_KEY 기반 HMAC 이라 DB 조회 없이 메모리에서 검증하며,
+# 시간 구간(ROTATE_SECONDS)이 지난 토큰은 GRACE_WINDOWS 만큼만 허용해 캡처한 QR 의 재사용을 막는다.
+_SALT = 'attendance.qr-token'
+
+
+def _bucket(at=None):
+    return int((time.time() if at is None else at) // settings.QR_TOKEN['ROTATE_SECONDS'])
+
+
+def _sign(session_id, bucket):
+    digest = salted_hmac(_SALT, f"{session_id}.{bucket}", algorithm='sha256').digest()
+    return base64.urlsafe_b64encode(digest[:16]).rstrip(b'=').decode()
+
+
+def make_token(session_id, at=None):
+    bucket = _bucket(at)
+    return f"{session_id}.{bucket}.{_sign(session_id, bucket)}"
+
+
+def verify_token(token, at=None):
+    """유효한 토큰이면 세션 id, 위조/만료/형식 오류면 None"""
+    try:
+        session_id, bucket, signature = str(token).split('.')
+        session_id, bucket = int(session_id), int(bucket)
+    except ValueError:
+        return None
+
+    current = _bucket(at)
+    if not current - settings.QR_TOKEN['GRACE_WINDOWS'] <= bucket <= current:
+        return None
+    if not constant_time_compare(signature, _sign(session_id, bucket)):
+        return None
+    return session_id
+
+
+def seconds_until_rotation(at=None):
+    rotate = settings.QR_TOKEN['ROTATE_SECONDS']
+    now = time.time() if at is None else at
+    return int(rotate - now % rotate) or rotate
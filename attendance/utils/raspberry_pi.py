@@ -1,43 +1,395 @@
-from attendance.models import AttendanceSession  # Add this import at the top
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+
 import requests
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from Checkmate_Backend.eventlog import REQUEST_ID_HEADER, current_request_id, log_context, log_event
+from Checkmate_Backend.lru import TTLCache
+from attendance.models import Classroom
+
+# 라즈베리파이 알림은 요청 스레드에서 보내지 않는다.
+# notify_* 는 강의에 연결된 강의실 장치마다 전송 상태 핸들(Delivery)을 만들어 백그라운드 디스패처에 넘기고 즉시 반환하며,
+# 디스패처 스레드들이 장치별 keep-alive 커넥션 풀로 동시에 전송하고 실패 시 지수 백오프로 재시도한다.
+# 강의실이 지정되지 않은 강의는 설정(RASPBERRY_PI)의 기본 장치로 보낸다.
+
+
+def _config(key):
+    return settings.RASPBERRY_PI[key]
+
+
+def pi_base_url():
+    return f"http://{_config('HOST')}:{_config('PORT')}"
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client(base_url):
+    """장치별 keep-alive 커넥션 풀"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = requests.Session()
+            client.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=_config('WORKERS')))
+        return client
+
+
+_seen = TTLCache(maxsize=1024, ttl=60)
+
+
+def _mark_seen(classroom_ids):
+    """장치가 응답했음을 해당 강의실들의 Classroom.last_seen 에 기록 (강의실당 최대 1분에 한 번)
+    pi_host 는 대소문자/IPv6 대괄호 등 URL 로 바꾸면 달라질 수 있으므로 URL 이 아니라 강의실 id 로 찾는다"""
+    classroom_ids = [pk for pk in classroom_ids if pk is not None and not _seen.get(pk)]
+    if not classroom_ids:
+        return
+    for pk in classroom_ids:
+        _seen.set(pk, True)
+    close_old_connections()
+    try:
+        Classroom.objects.filter(pk__in=classroom_ids).update(last_seen=timezone.now())
+    except DatabaseError:
+        # 백그라운드 스레드의 부가 기록이므로 실패해도 전송/상태 확인에는 영향 없음
+        pass
+
+
+class Delivery:
+    """라즈베리파이 알림 1건의 전송 상태 (pending → delivered | failed | cancelled)"""
+
+    def __init__(self, kind, session_code, device, base_url, path, payload, classroom_id=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.session_code = session_code
+        self.device = device
+        self.classroom_id = classroom_id  # 기본 장치면 None
+        self.base_url = base_url
+        self.url = f"{base_url}{path}"
+        self.payload = payload
+        self.request_id = current_request_id()  # 알림을 만든 요청 - 장치로 전달해 양쪽 로그를 잇는다
+        self.status = 'pending'
+        self.attempts = 0
+        self.last_error = None
+        self.created_at = timezone.now()
+        self.finished_at = None
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.last_error = error
+        self.finished_at = timezone.now()
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "session_code": self.session_code,
+            "device": self.device,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class NotificationDispatcher:
+    """재시도 예약 큐(next_attempt 시각 기준 힙)를 소비하는 백그라운드 전송 스레드 풀"""
+
+    def __init__(self):
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def submit(self, delivery, delay=0):
+        with self._cond:
+            heapq.heappush(self._queue, (time.monotonic() + delay, next(self._seq), delivery))
+            self._cond.notify()
+            if not self._threads:
+                self._start()
+
+    def _start(self):
+        # 관리 명령 등에서 불필요한 스레드가 뜨지 않도록 첫 전송 시점에 시작
+        for i in range(_config('WORKERS')):
+            thread = threading.Thread(target=self._run, name=f"raspi-notify-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_due(self):
+        with self._cond:
+            while True:
+                if self._queue:
+                    wait = self._queue[0][0] - time.monotonic()
+                    if wait <= 0:
+                        return heapq.heappop(self._queue)[2]
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            delivery = self._next_due()
+            if delivery.status != 'pending':
+                continue
+            with log_context(request_id=delivery.request_id):
+                try:
+                    self._attempt(delivery)
+                except Exception as e:
+                    # 예상하지 못한 오류로 전송 스레드가 멈추면 이후 알림이 모두 큐에 쌓인다
+                    delivery.finish('failed', f"{type(e).__name__}: {e}")
+                    log_event('pi.notify.error', level=logging.ERROR, exc_info=True,
+                              session=delivery.session_code, kind=delivery.kind, delivery=delivery.id)
+
+    def _attempt(self, delivery):
+        delivery.attempts += 1
+        device = health_prober(delivery.base_url, delivery.classroom_id)
+        headers = {REQUEST_ID_HEADER: delivery.request_id} if delivery.request_id else None
+        fields = {"session": delivery.session_code, "kind": delivery.kind, "device": delivery.device,
+                  "delivery": delivery.id, "attempt": delivery.attempts}
+        started = time.perf_counter()
+        try:
+            response = _client(delivery.base_url).post(
+                delivery.url, json=delivery.payload, headers=headers, timeout=_config('TIMEOUT')
+            )
+            # BLE 광고 워커는 명령을 큐에 넣고 202 로 응답한다
+            if 200 <= response.status_code < 300:
+                delivery.finish('delivered')
+                device.deliveries['delivered'] += 1
+                log_event('pi.notify.delivered', ms=round((time.perf_counter() - started) * 1000, 1), **fields)
+                _mark_seen([delivery.classroom_id])
+                return
+            error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+
+        if delivery.attempts >= _config('MAX_ATTEMPTS'):
+            delivery.finish('failed', error)
+            device.deliveries['failed'] += 1
+            log_event('pi.notify.failed', level=logging.ERROR, error=error, **fields)
+            return
+
+        device.deliveries['retried'] += 1
+        delivery.last_error = error
+        backoff = min(_config('BACKOFF_SECONDS') * 2 ** (delivery.attempts - 1), _config('BACKOFF_MAX_SECONDS'))
+        log_event('pi.notify.retry', level=logging.WARNING, error=error, backoff=backoff, **fields)
+        self.submit(delivery, delay=backoff)
+
+
+_dispatcher = NotificationDispatcher()
+_deliveries = TTLCache(maxsize=1024, ttl=3600)
+_pending_starts = TTLCache(maxsize=1024, ttl=3600)
+
+
+def _enqueue(kind, session_code, device, base_url, path, payload, classroom_id=None):
+    delivery = Delivery(kind, session_code, device, base_url, path, payload, classroom_id)
+    _deliveries.set(delivery.id, delivery)
+    _dispatcher.submit(delivery)
+    return delivery
+
+
+def get_delivery(delivery_id):
+    return _deliveries.get(delivery_id)
+
+
+def session_devices(session):
+    """세션 강의가 진행되는 강의실 장치 [(강의실 이름, base_url, 강의실 id)] - 지정된 강의실이 없으면 기본 장치"""
+    classrooms = session.lecture.classrooms.filter(is_active=True).only('name', 'pi_host', 'pi_port')
+    return [
+        (classroom.name, classroom.pi_base_url, classroom.id) for classroom in classrooms
+    ] or [(None, pi_base_url(), None)]
 
-RASPBERRY_PI_IP = "192.168.137.119"
-RASPBERRY_PI_PORT = 5000
 
 def notify_raspberry_pi_start(session):
+    """강의실 장치마다 BLE 광고 시작 알림 (장치 간 동시 전송), Delivery 목록 반환"""
     session_code = f"{session.lecture.code}_{session.week}"
     payload = {
         "session_id": session_code,
         "professor_username": session.lecture.professor.username
     }
-    try:
-        response = requests.post(
-            f"http://{RASPBERRY_PI_IP}:{RASPBERRY_PI_PORT}/api/ble/advertise/",
-            json=payload,
-            timeout=3
-        )
-        return response.status_code == 200
-    except requests.RequestException:
-        return False
+    deliveries = []
+    for device, base_url, classroom_id in session_devices(session):
+        delivery = _enqueue('start', session_code, device, base_url, "/api/ble/advertise/", payload, classroom_id)
+        _pending_starts.set((session_code, base_url), delivery)
+        deliveries.append(delivery)
+    return deliveries
 
-def notify_raspberry_pi_stop(session_id):
-    try:
-        session = AttendanceSession.objects.get(id=session_id)
-        session_code = f"{session.lecture.code}_{session.week}"
-        response = requests.post(
-            f"http://{RASPBERRY_PI_IP}:{RASPBERRY_PI_PORT}/api/ble/stop/",
-            json={"session_id": session_code},
-            timeout=3
+
+def notify_raspberry_pi_stop(session):
+    """강의실 장치마다 BLE 광고 종료 알림, Delivery 목록 반환"""
+    session_code = f"{session.lecture.code}_{session.week}"
+    deliveries = []
+    for device, base_url, classroom_id in session_devices(session):
+        # 아직 재시도 중인 시작 알림이 종료 알림보다 늦게 도착하지 않도록 취소
+        start = _pending_starts.pop((session_code, base_url))
+        if start is not None and start.status == 'pending':
+            start.finish('cancelled')
+            log_event('pi.notify.cancelled', session=session_code, kind='start', device=device, delivery=start.id)
+        deliveries.append(
+            _enqueue('stop', session_code, device, base_url, "/api/ble/stop/", {"session_id": session_code},
+                     classroom_id)
         )
-        return response.status_code == 200
-    except AttendanceSession.DoesNotExist:
-        return False
-    except requests.RequestException:
-        return False
+    return deliveries
+
+
+def _unknown_status():
+    """아직 확인 결과가 없을 때 (첫 확인이 대기 시간 안에 끝나지 않은 경우)"""
+    return {
+        "connected": False,
+        "latency_ms": None,
+        "checked_at": timezone.now(),
+        "error": "unknown",
+    }
+
+
+class HealthProber:
+    """장치 하나의 /ping 결과 캐시와 알림 전송 통계
+    백그라운드 스레드가 주기적으로 확인하고, 요청은 캐시된 상태를 바로 반환한다.
+    캐시가 비었거나 오래됐을 때 동시에 들어온 요청들은 진행 중인 확인 하나를 함께 기다린다 (single-flight)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.classroom_ids = set()  # 이 장치를 쓰는 강의실 (last_seen 기록 대상)
+        self._lock = threading.Lock()
+        self._inflight = None
+        self._thread = None
+        self.status = None
+        self.probes = 0
+        self.consecutive_failures = 0
+        self.last_ok_at = None
+        self.deliveries = Counter()
+
+    def _probe(self):
+        self.probes += 1
+        started = time.perf_counter()
+        try:
+            response = _client(self.base_url).get(f"{self.base_url}/ping", timeout=_config('HEALTH_TIMEOUT'))
+            if response.status_code != 200:
+                connected, error = False, f"HTTP {response.status_code}"
+            else:
+                # 200 이어도 {"message": "pong"} 이 아니면(목록/문자열 JSON 등) 연결 안 됨으로 본다
+                body = response.json()
+                connected = isinstance(body, dict) and body.get('message') == 'pong'
+                error = None if connected else "unexpected reply"
+        except (requests.RequestException, ValueError) as e:
+            connected, error = False, str(e)
+
+        if connected:
+            self.consecutive_failures = 0
+            self.last_ok_at = timezone.now()
+            _mark_seen(list(self.classroom_ids))
+        else:
+            self.consecutive_failures += 1
+        return {
+            "connected": connected,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "checked_at": timezone.now(),
+            "error": error,
+        }
+
+    def refresh(self):
+        """지금 확인 - 이미 진행 중인 확인이 있으면 새로 보내지 않고 그 결과를 기다린다"""
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            # requests 의 timeout 은 연결/읽기에 각각 적용되므로 첫 확인이 이보다 오래 걸릴 수 있다
+            inflight.wait(_config('HEALTH_TIMEOUT') + 1)
+            return self.status or _unknown_status()
+
+        try:
+            self.status = self._probe()
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+        return self.status
+
+    def is_fresh(self):
+        status = self.status
+        max_age = _config('HEALTH_MAX_AGE_SECONDS')
+        return status is not None and (timezone.now() - status['checked_at']).total_seconds() <= max_age
+
+    def get(self):
+        return self.status if self.is_fresh() else self.refresh()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="raspi-health", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # 예상하지 못한 오류로 확인 스레드가 멈추면 상태가 다시 갱신되지 않는다
+                log_event('pi.health.probe_failed', level=logging.ERROR, exc_info=True, device=self.base_url)
+            time.sleep(_config('HEALTH_INTERVAL_SECONDS'))
+
+
+_probers = {}
+_probers_lock = threading.Lock()
+
+
+def health_prober(base_url=None, classroom_id=None):
+    """base_url 별 상태 확인기 (첫 조회 시 백그라운드 확인 시작), classroom_id 가 있으면 last_seen 기록 대상에 추가"""
+    base_url = base_url or pi_base_url()
+    with _probers_lock:
+        prober = _probers.get(base_url)
+        if prober is None:
+            prober = _probers[base_url] = HealthProber(base_url)
+        if classroom_id is not None:
+            prober.classroom_ids.add(classroom_id)
+    prober.start()
+    return prober
+
+
+def _health_dict(prober, status):
+    return {
+        **status,
+        "checked_at": status['checked_at'].isoformat(),
+        "age_seconds": round((timezone.now() - status['checked_at']).total_seconds(), 1),
+        "consecutive_failures": prober.consecutive_failures,
+        "last_ok_at": prober.last_ok_at.isoformat() if prober.last_ok_at else None,
+        "deliveries": dict(prober.deliveries),
+    }
+
+
+def raspberry_pi_health(base_url=None, classroom_id=None):
+    """캐시된 연결 상태 (connected, latency_ms, checked_at, error, age_seconds, 전송 통계)"""
+    prober = health_prober(base_url, classroom_id)
+    return _health_dict(prober, prober.get())
+
+
+async def araspberry_pi_health(base_url=None, classroom_id=None):
+    """이벤트 루프를 막지 않는 raspberry_pi_health - 캐시가 신선하면 바로 반환"""
+    prober = health_prober(base_url, classroom_id)
+    status = prober.status if prober.is_fresh() else await asyncio.to_thread(prober.refresh)
+    return _health_dict(prober, status)
+
+
+def cached_health(base_url, classroom_id=None):
+    """기다리지 않고 캐시만 조회 (아직 확인 전이면 None) - 여러 장치 목록 조회용"""
+    prober = health_prober(base_url, classroom_id)
+    return _health_dict(prober, prober.status) if prober.status else None
+
 
 def check_raspberry_pi_connection():
-    try:
-        response = requests.get("http://192.168.137.119:5000/ping", timeout=2)
-        return response.status_code == 200 and response.json().get('message') == 'pong'
-    except requests.RequestException:
-        return False
\ No newline at end of file
+    return health_prober().get()['connected']
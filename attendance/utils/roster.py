@@ -0,0 +1,48 @@
+from django.db.models import FilteredRelation, Q, Value
+from django.db.models.functions import Coalesce
+
+from Checkmate_Backend.eventlog import log_event
+from attendance.models import AttendanceRecord
+from .live_feed import publish_records
+from .summary import apply_bulk_created
+from .write_behind import checkin_queue, write_behind_enabled
+
+
+def fill_absent(session):
+    """출석 기록이 없는 수강생을 결석으로 일괄 기록 (수강생 수와 무관하게 쿼리 수 고정), 새로 기록한 수 반환"""
+    if write_behind_enabled():
+        # 접수만 되고 아직 커밋되지 않은 출석이 결석으로 기록되지 않도록 먼저 반영
+        checkin_queue.drain()
+    missing = list(
+        session.lecture.students
+        .exclude(attendancerecord__session=session)
+        .values_list('id', flat=True)
+    )
+    if not missing:
+        return 0
+
+    AttendanceRecord.objects.bulk_create([
+        AttendanceRecord(session=session, student_id=student_id, status='absent')
+        for student_id in missing
+    ], ignore_conflicts=True)
+
+    # 조회와 삽입 사이에 출석한 학생은 충돌로 건너뛰므로, 실제로 결석이 기록된 학생만 집계에 반영
+    inserted = list(AttendanceRecord.objects.filter(
+        session=session,
+        student_id__in=missing,
+        status='absent'
+    ).values_list('student_id', flat=True))
+    apply_bulk_created(session.lecture_id, inserted, 'absent')
+    publish_records(session.id, [(student_id, 'absent') for student_id in inserted], 'absent_fill')
+    log_event('session.absent_filled', session=session.session_code, count=len(inserted))
+    return len(inserted)
+
+
+def session_roster(session):
+    """수강생 전원과 해당 세션 출석 상태를 JOIN 한 번으로 조회 (기록이 없으면 결석으로 표시)"""
+    return list(
+        session.lecture.students.order_by('id').annotate(
+            record=FilteredRelation('attendancerecord', condition=Q(attendancerecord__session=session)),
+            status=Coalesce('record__status', Value('absent')),
+        ).values('id', 'name', 'status')
+    )
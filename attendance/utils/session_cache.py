@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+from django.conf import settings
+
+from Checkmate_Backend.lru import TTLCache
+from attendance.models import AttendanceSession
+
+# 활성 세션 코드 → 강의 정보 + 수강생 id 집합
+# 출석 체크 시 세션/수강 여부 검증을 DB 조회 없이 처리하기 위한 프로세스 내 캐시.
+# 워커 프로세스 간에는 공유되지 않으므로 TTL 이 다른 워커의 세션 종료·수강 변경 반영 지연의 상한이 된다.
+SessionRoster = namedtuple('SessionRoster', 'session_id session_code lecture_id lecture_code professor_id student_ids')
+
+# 세션 하나가 코드와 ('id', 세션 id) 두 키를 차지하므로 키 수 기준으로 두 배 크기
+_rosters = TTLCache(
+    maxsize=settings.ATTENDANCE_ROSTER_CACHE['MAX_SESSIONS'] * 2,
+    ttl=settings.ATTENDANCE_ROSTER_CACHE['TTL_SECONDS'],
+)
+
+
+def _session_lookup(session_code, session_id):
+    lookup = {'session_code': session_code} if session_id is None else {'id': session_id}
+    return AttendanceSession.objects.select_related('lecture').only(
+        'id', 'session_code', 'lecture__id', 'lecture__code', 'lecture__professor_id'
+    ).filter(is_active=True, **lookup)
+
+
+def _cache_roster(session, student_ids):
+    roster = SessionRoster(
+        session_id=session.id,
+        session_code=session.session_code,
+        lecture_id=session.lecture.id,
+        lecture_code=session.lecture.code,
+        professor_id=session.lecture.professor_id,
+        student_ids=frozenset(student_ids),
+    )
+    # 세션 코드(출석 제출/BLE)와 세션 id(QR 토큰) 양쪽으로 조회할 수 있도록 두 키로 보관
+    _rosters.set(roster.session_code, roster)
+    _rosters.set(('id', roster.session_id), roster)
+    return roster
+
+
+def load_roster(session_code=None, session_id=None):
+    """DB 에서 활성 세션과 수강생 명단을 읽어 캐시에 채운다 (쿼리 2회), 활성 세션이 없으면 None"""
+    try:
+        session = _session_lookup(session_code, session_id).get()
+    except AttendanceSession.DoesNotExist:
+        return None
+    return _cache_roster(session, session.lecture.students.values_list('id', flat=True))
+
+
+async def aload_roster(session_code=None, session_id=None):
+    """load_roster 의 비동기 버전 (ASGI 뷰용)"""
+    try:
+        session = await _session_lookup(session_code, session_id).aget()
+    except AttendanceSession.DoesNotExist:
+        return None
+    return _cache_roster(session, [
+        student_id async for student_id in session.lecture.students.values_list('id', flat=True)
+    ])
+
+
+def get_roster(session_code):
+    """활성 세션 명단 조회 - 캐시 적중 시 쿼리 0회"""
+    return _rosters.get(session_code) or load_roster(session_code)
+
+
+def get_roster_by_id(session_id):
+    return _rosters.get(('id', session_id)) or load_roster(session_id=session_id)
+
+
+async def aget_roster(session_code):
+    return _rosters.get(session_code) or await aload_roster(session_code)
+
+
+async def aget_roster_by_id(session_id):
+    return _rosters.get(('id', session_id)) or await aload_roster(session_id=session_id)
+
+
+def invalidate_session(session_code):
+    _rosters.discard_if(lambda key, roster: roster.session_code == session_code)
+
+
+def invalidate_lecture(lecture_id):
+    """수강생 변경 시 해당 강의의 캐시된 세션 명단을 모두 제거"""
+    _rosters.discard_if(lambda code, roster: roster.lecture_id == lecture_id)
+
+
+def clear():
+    _rosters.clear()
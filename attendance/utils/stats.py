@@ -0,0 +1,67 @@
+from django.db.models import Count, FilteredRelation, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from attendance.models import Lecture, LectureStudentSummary
+from .summary import STATUSES
+
+# 출석 통계는 LectureStudentSummary(강의 × 학생 집계 행)만 읽는다.
+# 누적 주차 수와 무관하게 학생당 한 행을 조회하며, 원본 재집계는 summary.py 담당
+
+
+def attendance_rate(present, late, total):
+    """출석률(%) 계산 - 지각은 0.5회 출석으로 인정"""
+    return round((present + late * 0.5) / total * 100, 1) if total else 0
+
+
+def student_lecture_stats(lecture, student):
+    """한 학생의 특정 강의 출석 집계 (집계 행 1건 조회)"""
+    counts = LectureStudentSummary.objects.filter(
+        lecture=lecture,
+        student=student
+    ).values(*STATUSES).first() or dict.fromkeys(STATUSES, 0)
+    counts['attendance_rate'] = attendance_rate(counts['present'], counts['late'], lecture.total_weeks)
+    return counts
+
+
+def lecture_student_stats(lecture):
+    """강의 수강생 전원의 출석 집계 (수강생 수와 무관하게 쿼리 1회)"""
+    students = lecture.students.order_by('id').annotate(
+        summary=FilteredRelation('attendance_summaries', condition=Q(attendance_summaries__lecture=lecture)),
+        **{status: Coalesce(f'summary__{status}', 0) for status in STATUSES}
+    ).values('id', 'name', *STATUSES)
+
+    return [
+        {
+            "student_id": s['id'],
+            "name": s['name'],
+            "present": s['present'],
+            "late": s['late'],
+            "absent": s['absent'],
+            "attendance_rate": attendance_rate(s['present'], s['late'], lecture.total_weeks),
+        } for s in students
+    ]
+
+
+def _subquery(queryset, group_by, aggregate):
+    """상관 서브쿼리 집계 - 바깥 쿼리에 GROUP BY 를 만들지 않는다"""
+    values = queryset.order_by().values(group_by).annotate(v=aggregate).values('v')
+    return Coalesce(Subquery(values, output_field=IntegerField()), 0)
+
+
+def professor_lecture_stats(professor):
+    """교수 담당 강의별 출석 요약 (강의 수와 무관하게 쿼리 1회)"""
+    # 수강생 수와 상태별 합계를 각각 서브쿼리로 세야 JOIN 끼리 곱해지지 않는다
+    enrolled = Lecture.students.through.objects.filter(lecture=OuterRef('pk'))
+    summaries = LectureStudentSummary.objects.filter(lecture=OuterRef('pk'))
+
+    lectures = Lecture.objects.filter(professor=professor).order_by('id').annotate(
+        total_students=_subquery(enrolled, 'lecture', Count('*')),
+        **{status: _subquery(summaries, 'lecture', Sum(status)) for status in STATUSES}
+    ).values('id', 'name', 'code', 'total_weeks', 'total_students', *STATUSES)
+
+    results = []
+    for lec in lectures:
+        total = lec['total_students'] * lec['total_weeks']
+        lec['attendance_rate'] = attendance_rate(lec['present'], lec['late'], total)
+        results.append(lec)
+    return results
@@ -0,0 +1,112 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord, LectureStudentSummary
+
+STATUSES = ('present', 'late', 'absent')
+
+
+def apply_status_change(lecture_id, student_id, old_status=None, new_status=None):
+    """출석 기록 생성(old_status=None) 또는 상태 변경 시 집계 행을 증감"""
+    deltas = {}
+    if old_status:
+        deltas[old_status] = F(old_status) - 1
+    if new_status:
+        deltas[new_status] = F(new_status) + 1
+    if not deltas:
+        return
+
+    rows = LectureStudentSummary.objects.filter(lecture_id=lecture_id, student_id=student_id)
+    if rows.update(**deltas, updated_at=timezone.now()):
+        return
+
+    # 첫 기록 - 행 생성 (동시에 생성되면 unique 제약에 걸리므로 다시 증감)
+    try:
+        with transaction.atomic():
+            LectureStudentSummary.objects.create(
+                lecture_id=lecture_id,
+                student_id=student_id,
+                **({new_status: 1} if new_status else {})
+            )
+    except IntegrityError:
+        rows.update(**deltas, updated_at=timezone.now())
+
+
+def apply_bulk_created(lecture_id, student_ids, status):
+    """같은 상태의 출석 기록이 여러 학생에게 새로 생긴 경우 (학생 수와 무관하게 쿼리 3회)"""
+    student_ids = set(student_ids)
+    if not student_ids:
+        return
+
+    rows = LectureStudentSummary.objects.filter(lecture_id=lecture_id, student_id__in=student_ids)
+    existing = set(rows.values_list('student_id', flat=True))
+    if existing:
+        rows.update(**{status: F(status) + 1}, updated_at=timezone.now())
+
+    missing = student_ids - existing
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            LectureStudentSummary.objects.bulk_create([
+                LectureStudentSummary(lecture_id=lecture_id, student_id=student_id, **{status: 1})
+                for student_id in missing
+            ])
+    except IntegrityError:
+        # 조회 이후 다른 요청이 일부 행을 먼저 생성 - 학생별로 다시 증감 (없으면 생성)
+        for student_id in missing:
+            apply_status_change(lecture_id, student_id, new_status=status)
+
+
+def expected_summaries(lecture=None):
+    """AttendanceRecord 를 (강의, 학생) 으로 그룹 집계한 기준값 - {(lecture_id, student_id): (present, late, absent)}"""
+    records = AttendanceRecord.objects.all()
+    if lecture is not None:
+        records = records.filter(session__lecture=lecture)
+
+    rows = records.order_by().values('session__lecture', 'student').annotate(**{
+        status: Count('id', filter=Q(status=status)) for status in STATUSES
+    })
+    return {
+        (row['session__lecture'], row['student']): tuple(row[s] for s in STATUSES)
+        for row in rows
+    }
+
+
+def find_drift(lecture=None):
+    """집계 테이블과 원본 기록이 어긋난 (lecture_id, student_id, 기대값, 실제값) 목록"""
+    expected = expected_summaries(lecture)
+
+    summaries = LectureStudentSummary.objects.all()
+    if lecture is not None:
+        summaries = summaries.filter(lecture=lecture)
+    actual = {
+        (row[0], row[1]): tuple(row[2:])
+        for row in summaries.values_list('lecture_id', 'student_id', *STATUSES)
+    }
+
+    zero = (0, 0, 0)
+    return [
+        (key[0], key[1], expected.get(key, zero), actual.get(key, zero))
+        for key in sorted(expected.keys() | actual.keys())
+        if expected.get(key, zero) != actual.get(key, zero)
+    ]
+
+
+@transaction.atomic
+def rebuild(lecture=None):
+    """원본 기록으로부터 집계 테이블을 처음부터 다시 생성, 생성한 행 수를 반환"""
+    summaries = LectureStudentSummary.objects.all()
+    if lecture is not None:
+        summaries = summaries.filter(lecture=lecture)
+    summaries.delete()
+
+    created = LectureStudentSummary.objects.bulk_create([
+        LectureStudentSummary(
+            lecture_id=lecture_id,
+            student_id=student_id,
+            **dict(zip(STATUSES, counts))
+        ) for (lecture_id, student_id), counts in expected_summaries(lecture).items()
+    ], batch_size=1000)
+    return len(created)
@@ -0,0 +1,330 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from Checkmate_Backend.eventlog import log_event
+from .checkin import bulk_record_checkins
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 등 flock 이 없는 환경 - 프로세스 간 잠금 없이 동작 (다른 스풀은 모두 살아 있는 것으로 보고 넘겨받지 않는다)
+    fcntl = None
+
+# 지연 쓰기 모드의 출석 체크 큐.
+# 요청 스레드는 검증된 출석을 스풀 파일(append-only JSON lines)에 남기고 메모리 큐에 넣은 뒤 바로 반환한다.
+# 플러셔 스레드가 주기적으로 큐를 비워 bulk_record_checkins 로 한 트랜잭션에 커밋하고, 커밋된 항목은 스풀에서 지운다.
+# 프로세스가 죽으면 스풀 파일이 남고, 다음에 큐를 여는 프로세스가 (파일 잠금이 풀린) 남의 스풀을 넘겨받아 재처리한다.
+# 재처리로 같은 출석이 두 번 들어와도 bulk_record_checkins 가 기존 기록을 건너뛰므로 중복 기록/집계는 생기지 않는다.
+# 같은 SPOOL_DIR 을 쓰는 워커 프로세스끼리는 서로의 스풀을 읽을 수 있으므로, 세션 종료 전 drain() 과 접수 상태 조회는
+# 다른 워커에 접수된 출석까지 본다 (SPOOL_DIR 은 같은 호스트의 워커들이 공유하는 경로여야 한다).
+# 일괄 커밋이 실패하면 한 건씩 다시 커밋하고, 데이터 오류(삭제된 세션/학생의 FK 위반 등)로 계속 실패하는 항목은
+# quarantine.jsonl 로 격리해 뒤따르는 출석이 막히지 않게 한다.
+
+logger = logging.getLogger(__name__)
+
+_Target = namedtuple('_Target', 'session_id lecture_id session_code')
+
+
+def _config(key):
+    return settings.ATTENDANCE_WRITE_BEHIND[key]
+
+
+def write_behind_enabled():
+    return _config('ENABLED')
+
+
+def _try_lock(file):
+    """파일에 배타 잠금을 걸고 True, 다른 프로세스가 잡고 있으면 False (잠금을 쓸 수 없는 환경이면 항상 False)"""
+    if fcntl is None:
+        return False
+    try:
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class CheckinQueue:
+    """(session_id, student_id) → (lecture_id, status, session_code) 대기열과 그 스풀 파일"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._inflight = {}
+        self._spool = None
+        self._spool_path = None
+        self._thread = None
+        self.flushed = 0
+        self.quarantined = 0
+        self.last_flush_at = None
+        self.last_error = None
+
+    def _ensure_started(self):
+        """첫 사용 시 스풀 파일을 열고 남겨진 스풀을 넘겨받은 뒤 플러셔를 시작 (_cond 보유 상태에서 호출)"""
+        if self._thread is not None:
+            return
+        spool_dir = Path(_config('SPOOL_DIR'))
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        self._spool_path = spool_dir / f"spool-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        self._spool = self._open_locked(self._spool_path)
+        self._adopt_orphans()
+
+        self._thread = threading.Thread(target=self._run, name="checkin-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self._shutdown)
+
+    @staticmethod
+    def _open_locked(path):
+        # 살아 있는 프로세스의 스풀은 잠겨 있으므로 다른 프로세스가 넘겨받지 않는다
+        spool = open(path, 'a', encoding='utf-8')
+        _try_lock(spool)
+        return spool
+
+    @staticmethod
+    def _read(spool):
+        entries = {}
+        for line in spool:
+            try:
+                row = json.loads(line)
+                entries[(row['session_id'], row['student_id'])] = (
+                    row['lecture_id'], row['status'], row.get('session_code')
+                )
+            except (ValueError, KeyError):
+                # 기록 도중 죽어서 잘린 마지막 줄
+                continue
+        return entries
+
+    def _foreign_spools(self):
+        return [path for path in sorted(self._spool_path.parent.glob('spool-*.jsonl')) if path != self._spool_path]
+
+    def _adopt_orphans(self):
+        """잠금이 풀린(프로세스가 죽은) 스풀을 넘겨받고, 살아 있는 다른 프로세스의 스풀 경로 목록을 반환 (_cond 보유 상태에서 호출)"""
+        live = []
+        for path in self._foreign_spools():
+            try:
+                orphan = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with orphan:
+                if not _try_lock(orphan):
+                    live.append(path)
+                    continue
+                try:
+                    # 잠금을 얻는 사이 주인이 스풀을 교체(_compact)했다면 연 파일은 이미 지워진 이전 파일이다
+                    if os.fstat(orphan.fileno()).st_ino != os.stat(path).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                entries = self._read(orphan)
+                # 내 스풀에 먼저 옮겨 적은 뒤 지워야 어느 시점에 죽어도 유실되지 않는다
+                entries = {key: entry for key, entry in entries.items() if key not in self._pending}
+                self._write(entries)
+                self._pending.update(entries)
+                path.unlink()
+            logger.info("스풀 %s 에서 미처리 출석 %d건 복구", path.name, len(entries))
+        return live
+
+    def _write(self, entries):
+        if not entries:
+            return
+        self._spool.writelines(
+            json.dumps({
+                "session_id": s, "student_id": u, "lecture_id": lecture_id, "status": status, "session_code": code
+            }) + "\n"
+            for (s, u), (lecture_id, status, code) in entries.items()
+        )
+        self._spool.flush()
+        if _config('FSYNC'):
+            os.fsync(self._spool.fileno())
+
+    def _compact(self):
+        """커밋된 항목을 스풀에서 제거 - 아직 대기 중인 항목만 남긴다 (_cond 보유 상태에서 호출)"""
+        if not self._pending:
+            self._spool.truncate(0)
+            return
+        # 잠금을 건 임시 파일로 교체해야 교체 순간 다른 프로세스가 넘겨받지 않는다
+        tmp_path = self._spool_path.with_suffix('.tmp')
+        old_spool = self._spool
+        self._spool = self._open_locked(tmp_path)
+        self._write(self._pending)
+        os.replace(tmp_path, self._spool_path)
+        old_spool.close()
+
+    def enqueue(self, roster, student_id, status='present'):
+        """출석을 접수하고 새로 접수했으면 True (이미 대기 중이면 False) - DB 에 접근하지 않는다"""
+        key = (roster.session_id, student_id)
+        with self._cond:
+            self._ensure_started()
+            if key in self._pending or key in self._inflight:
+                return False
+            entry = {key: (roster.lecture_id, status, roster.session_code)}
+            self._write(entry)
+            self._pending.update(entry)
+            if len(self._pending) >= _config('FLUSH_MAX_RECORDS'):
+                self._cond.notify()
+        return True
+
+    def is_queued(self, session_id, student_id):
+        key = (session_id, student_id)
+        with self._cond:
+            return key in self._pending or key in self._inflight
+
+    def is_spooled(self, session_id, student_id):
+        """다른 워커 프로세스의 스풀에 접수되어 있는지 (스풀 파일을 읽으므로 DB 에 기록이 없을 때만 확인)"""
+        with self._cond:
+            self._ensure_started()
+            paths = self._foreign_spools()
+        for path in paths:
+            try:
+                with open(path, encoding='utf-8') as spool:
+                    if (session_id, student_id) in self._read(spool):
+                        return True
+            except FileNotFoundError:
+                continue
+        return False
+
+    @staticmethod
+    def _commit(entries):
+        """한 트랜잭션으로 커밋하고 새로 기록된 건수를 반환"""
+        by_status = {}
+        for (session_id, student_id), (lecture_id, status, session_code) in entries.items():
+            by_status.setdefault(status, []).append((_Target(session_id, lecture_id, session_code), student_id))
+        with transaction.atomic():
+            return sum(len(bulk_record_checkins(pairs, status)) for status, pairs in by_status.items())
+
+    def _commit_rows(self, batch):
+        """일괄 커밋이 실패한 배치를 한 건씩 커밋 → (재시도할 항목, 격리할 항목, 마지막 오류)
+        데이터 오류는 같은 항목으로 다시 시도해도 실패하므로 격리하고, 그 밖의 오류(DB 연결 끊김 등)는 나머지를 모두 재시도로 돌린다"""
+        retry, quarantine, error = {}, {}, None
+        items = list(batch.items())
+        for index, (key, entry) in enumerate(items):
+            try:
+                self._commit({key: entry})
+            except (IntegrityError, DataError) as e:
+                quarantine[key] = (entry, f"{type(e).__name__}: {e}")
+            except Exception as e:
+                retry.update(items[index:])
+                error = e
+                break
+        return retry, quarantine, error
+
+    def _quarantine(self, entries):
+        path = self._spool_path.parent / 'quarantine.jsonl'
+        with open(path, 'a', encoding='utf-8') as quarantine:
+            quarantine.writelines(
+                json.dumps({
+                    "session_id": s, "student_id": u, "lecture_id": lecture_id, "status": status,
+                    "session_code": code, "error": error, "at": timezone.now().isoformat(),
+                }) + "\n"
+                for (s, u), ((lecture_id, status, code), error) in entries.items()
+            )
+        for (session_id, student_id), ((_, _, code), error) in entries.items():
+            log_event('checkin.quarantined', level=logging.ERROR, session=code, student=student_id, error=error)
+        self.quarantined += len(entries)
+
+    def flush(self):
+        """대기 중인 출석을 한 트랜잭션으로 커밋하고 커밋(또는 격리)한 건수를 반환
+        DB 오류로 커밋하지 못한 항목은 대기열로 되돌리고 예외를 다시 던진다"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            retry, quarantine, error = {}, {}, None
+            try:
+                self._commit(batch)
+            except Exception:
+                retry, quarantine, error = self._commit_rows(batch)
+            if quarantine:
+                # 스풀에서 지우기 전에 격리 파일에 먼저 남긴다
+                self._quarantine(quarantine)
+
+            with self._cond:
+                # 커밋 실패분은 다시 대기열로 (스풀에는 그대로 남고, 커밋/격리된 항목은 스풀에서 지운다)
+                self._pending = {**retry, **self._pending}
+                self._inflight = {}
+                self._compact()
+            done = len(batch) - len(retry)
+            self.flushed += done - len(quarantine)
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}"
+                raise error
+            self.last_flush_at = timezone.now()
+            self.last_error = None
+            return done
+
+    def drain(self):
+        """세션 종료 등 기록이 모두 반영돼야 하는 시점에 호출 - 이 프로세스와 다른 워커 프로세스에 접수된 출석을 지금 커밋
+        다른 프로세스의 스풀은 읽기만 하며, 그 프로세스가 나중에 같은 항목을 커밋해도 기존 기록으로 건너뛴다"""
+        with self._cond:
+            self._ensure_started()
+            live = self._adopt_orphans()
+        count = self.flush()
+        for path in live:
+            try:
+                with open(path, encoding='utf-8') as spool:
+                    entries = self._read(spool)
+            except FileNotFoundError:
+                continue
+            if not entries:
+                continue
+            try:
+                self._commit(entries)
+                count += len(entries)
+            except Exception:
+                # 실패한 항목은 주인 프로세스가 재시도/격리한다
+                retry, quarantine, error = self._commit_rows(entries)
+                count += len(entries) - len(retry) - len(quarantine)
+                if error is not None:
+                    raise error
+        return count
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= _config('FLUSH_MAX_RECORDS'),
+                    timeout=_config('FLUSH_INTERVAL_MS') / 1000,
+                )
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("출석 일괄 커밋 실패 - 다음 주기에 재시도")
+
+    def _shutdown(self):
+        try:
+            self.flush()
+            with self._cond:
+                if not self._pending:
+                    self._spool_path.unlink(missing_ok=True)
+        except Exception:
+            # 스풀에 남아 있으므로 다음 프로세스가 재처리한다
+            logger.exception("종료 전 출석 커밋 실패")
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending) + len(self._inflight)
+        return {
+            "pending": pending,
+            "flushed": self.flushed,
+            "quarantined": self.quarantined,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+            "last_error": self.last_error,
+        }
+
+
+checkin_queue = CheckinQueue()
@@ -1,5 +1,8 @@
-import requests
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework import generics, status
 from rest_framework.response import Response
@@ -7,20 +10,35 @@ from rest_framework.views import APIView
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-import qrcode
-print("QR module loaded from:", qrcode.__file__)
-import base64
-from io import BytesIO
-
+from Checkmate_Backend.eventlog import log_event
+from users.authentication import CachedJWTAuthentication
 from users.models import User
-from .models import AttendanceSession, Lecture, AttendanceRecord
+from .models import AttendanceSession, Classroom, Lecture, AttendanceRecord
 from .serializers import (
     AttendanceSessionSerializer,
     LectureCreateSerializer,
     LectureSerializer,
     AttendanceRecordSerializer
 )
-from .utils.raspberry_pi import notify_raspberry_pi_start, notify_raspberry_pi_stop, check_raspberry_pi_connection
+from .utils.raspberry_pi import notify_raspberry_pi_start, notify_raspberry_pi_stop, raspberry_pi_health, cached_health, get_delivery
+from .utils.stats import student_lecture_stats, lecture_student_stats, professor_lecture_stats
+from .pagination import LIST_MODE_PARAMETERS, list_response
+from .utils.summary import STATUSES, apply_status_change
+from .utils.roster import fill_absent, session_roster
+from .utils.export import gradebook_rows, iter_csv, write_xlsx
+from .utils.session_cache import get_roster, get_roster_by_id, load_roster, invalidate_session
+from .utils.checkin import bulk_record_checkins, checkin_message, record_checkin
+from .utils.write_behind import checkin_queue, write_behind_enabled
+from .utils.live_feed import publish_records, publish_session_end
+from .utils.qr import session_qr, prerender_session, is_not_modified, set_cache_headers
+from .utils.qr_token import verify_token, seconds_until_rotation
+
+
+def _checkin(roster, student_id, status_value='present'):
+    """(새로 처리했는지, HTTP 상태) - 지연 쓰기 모드면 큐에 접수만 하고 202, 아니면 바로 기록하고 200"""
+    if write_behind_enabled():
+        return checkin_queue.enqueue(roster, student_id, status_value), 202
+    return record_checkin(roster, student_id, status_value), 200
 
 
 # 출석 시작 (세션 생성)
@@ -48,20 +66,27 @@ class StartAttendanceSessionView(APIView):
         except Lecture.DoesNotExist:
             return Response({"error": "해당 강의를 찾을 수 없습니다."}, status=404)
 
-        session = AttendanceSession.objects.create(
-            lecture=lecture,
-            week=week,
-            is_active=True
-        )
-
-        # ✅ 교수 username 포함해서 전송
-        success = notify_raspberry_pi_start(session)
-        if not success:
-            return Response({
-                "session": AttendanceSessionSerializer(session).data,
-                "warning": "세션은 생성되었지만 라즈베리파이에 연결할 수 없음"
-            }, status=207)
-        return Response(AttendanceSessionSerializer(session).data, status=201)
+        try:
+            with transaction.atomic():
+                session = AttendanceSession.objects.create(
+                    lecture=lecture,
+                    week=week,
+                    is_active=True
+                )
+        except IntegrityError:
+            return Response({"error": "해당 주차의 세션이 이미 존재합니다."}, status=409)
+        # 출석 체크 폭주 전에 수강생 명단 캐시와 QR 이미지를 미리 준비해 둔다
+        load_roster(session.session_code)
+        prerender_session(session.id)
+
+        # ✅ 교수 username 포함해서 전송 (백그라운드 전송, 결과는 raspi-deliveries/<id>/ 로 조회)
+        deliveries = [delivery.as_dict() for delivery in notify_raspberry_pi_start(session)]
+        log_event('session.started', session=session.session_code, lecture=lecture.code, week=session.week,
+                  devices=[delivery['device'] for delivery in deliveries])
+        data = AttendanceSessionSerializer(session).data
+        data["pi_deliveries"] = deliveries  # 강의실 장치별
+        data["pi_delivery"] = deliveries[0]
+        return Response(data, status=201)
 
 # 출석 종료 (is_active → False)
 class EndAttendanceSessionView(APIView):
@@ -88,14 +113,18 @@ class EndAttendanceSessionView(APIView):
 
         session.is_active = False
         session.save()
+        invalidate_session(session.session_code)
+        publish_session_end(session.id)
+
+        if settings.ATTENDANCE_ABSENT_FILL == 'close':
+            fill_absent(session)
 
-        success = notify_raspberry_pi_stop(session.id)
-        if not success:
-            return Response({
-                "session": AttendanceSessionSerializer(session).data,
-                "warning": "세션은 종료되었지만 라즈베리파이에 연결할 수 없음"
-            }, status=207)
-        return Response(AttendanceSessionSerializer(session).data, status=200)
+        deliveries = [delivery.as_dict() for delivery in notify_raspberry_pi_stop(session)]
+        log_event('session.ended', session=session.session_code)
+        data = AttendanceSessionSerializer(session).data
+        data["pi_deliveries"] = deliveries
+        data["pi_delivery"] = deliveries[0]
+        return Response(data, status=200)
 
 # 출석통계 API
 class StudentAttendanceStatsView(APIView):
@@ -120,27 +149,15 @@ class StudentAttendanceStatsView(APIView):
         except Lecture.DoesNotExist:
             return Response({"error": "강의를 찾을 수 없습니다."}, status=404)
 
-        # 해당 강의의 출석 기록 필터
-        records = AttendanceRecord.objects.filter(
-            student=user,
-            session__lecture=lecture
-        )
-
-        total_weeks = lecture.total_weeks
-        attended = records.filter(status="present").count()
-        late = records.filter(status="late").count()
-        absent = records.filter(status="absent").count()
-        total_recorded = attended + late + absent
-
-        rate = (attended + late * 0.5) / total_weeks * 100 if total_weeks > 0 else 0
+        stats = student_lecture_stats(lecture, user)
 
         return Response({
             "lecture": lecture.name,
-            "total_weeks": total_weeks,
-            "attended": attended,
-            "late": late,
-            "absent": absent,
-            "attendance_rate": round(rate, 1)
+            "total_weeks": lecture.total_weeks,
+            "attended": stats['present'],
+            "late": stats['late'],
+            "absent": stats['absent'],
+            "attendance_rate": stats['attendance_rate']
         })
 
 class LectureCreateView(generics.CreateAPIView):
@@ -156,6 +173,7 @@ class AttendanceRecordCreateView(APIView):
     - 해당 학생이 수강 중인지 검증 후 출석 처리
     """
     permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]  # 사용자 id/role/name 만 쓰므로 조회 결과 캐시
 
     @swagger_auto_schema(
         operation_summary="학생 출석 제출",
@@ -181,30 +199,29 @@ class AttendanceRecordCreateView(APIView):
         if not session_code:
             return Response({"error": "session_code는 필수입니다."}, status=400)
 
-        try:
-            session = AttendanceSession.objects.get(session_code=session_code, is_active=True)
-        except AttendanceSession.DoesNotExist:
+        if status_value not in STATUSES:
+            return Response({"error": "status는 present, late, absent 중 하나여야 합니다."}, status=400)
+
+        # 활성 세션/수강생 명단은 캐시에서 조회 (적중 시 DB 조회 없음)
+        roster = get_roster(session_code)
+        if roster is None:
             return Response({"error": "활성화된 출석 세션이 존재하지 않습니다."}, status=404)
 
         # 3. 수강 여부 확인
-        if not session.lecture.students.filter(id=user.id).exists():
+        if user.id not in roster.student_ids:
             return Response({"error": "해당 강의를 수강하지 않습니다."}, status=403)
 
         # 4. 출석 기록 생성 또는 확인
-        record, created = AttendanceRecord.objects.get_or_create(
-            session=session,
-            student=user,
-            defaults={'status': status_value}
-        )
+        created, status_code = _checkin(roster, user.id, status_value)
 
         return Response({
-            "message": "출석 완료" if created else "이미 출석 처리됨",
+            "message": checkin_message("출석", created, status_code),
             "data": {
-                "session": session.id,
+                "session": roster.session_id,
                 "student": user.name,
                 "status": status_value
             }
-        }, status=200)
+        }, status=status_code)
 
 class AttendanceStatisticsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -228,29 +245,21 @@ class AttendanceStatisticsView(APIView):
         except Lecture.DoesNotExist:
             return Response({"error": "강의를 찾을 수 없습니다."}, status=404)
 
-        total_weeks = lecture.total_weeks
         data = {
             "lecture": lecture.name,
-            "total_weeks": total_weeks,
+            "total_weeks": lecture.total_weeks,
             "students": []
         }
 
-        for student in lecture.students.all():
-            records = AttendanceRecord.objects.filter(student=student, session__lecture=lecture)
-            present = records.filter(status='출석').count()
-            late = records.filter(status='지각').count()
-            absent = records.filter(status='결석').count()
-            total = present + late + absent
-
-            attendance_rate = round((present + late * 0.5) / total_weeks * 100, 1) if total_weeks else 0
-
+        # 저장값(present/late/absent) 기준으로 수강생 전원을 한 번에 집계
+        for stats in lecture_student_stats(lecture):
             data["students"].append({
-                "student_id": student.id,
-                "name": student.name,
-                "출석": present,
-                "지각": late,
-                "결석": absent,
-                "출석률": attendance_rate
+                "student_id": stats['student_id'],
+                "name": stats['name'],
+                "출석": stats['present'],
+                "지각": stats['late'],
+                "결석": stats['absent'],
+                "출석률": stats['attendance_rate']
             })
 
         return Response(data)
@@ -333,6 +342,9 @@ class ManualAttendanceUpdateView(APIView):
         if not lecture_code or not week or not student_username or not status_value:
             return Response({"error": "lecture_code, week, student_username, status는 필수입니다."}, status=400)
 
+        if status_value not in STATUSES:
+            return Response({"error": "status는 present, late, absent 중 하나여야 합니다."}, status=400)
+
         try:
             lecture = Lecture.objects.get(code=lecture_code, professor=request.user)
             session = AttendanceSession.objects.get(lecture=lecture, week=week)
@@ -357,7 +369,9 @@ class ManualAttendanceUpdateView(APIView):
             student=student,
             defaults={'status': status_value}
         )
-        if not created and record.status != status_value:
+        if created:
+            apply_status_change(lecture.id, student.id, new_status=status_value)
+        elif record.status != status_value:
             from .models import AttendanceChangeLog
             AttendanceChangeLog.objects.create(
                 professor=request.user,
@@ -366,8 +380,10 @@ class ManualAttendanceUpdateView(APIView):
                 old_status=record.status,
                 new_status=status_value
             )
+            apply_status_change(lecture.id, student.id, old_status=record.status, new_status=status_value)
             record.status = status_value
             record.save()
+        publish_records(session.id, [(student.id, status_value)], 'manual')
 
         return Response({
             "message": "출석 상태 수정 완료" if not created else "출석 기록 생성 및 설정 완료",
@@ -388,7 +404,7 @@ class ProfessorLectureListView(APIView):
         if professor.role != 'professor':
             return Response({"error": "접근 권한이 없습니다."}, status=403)
 
-        lectures = Lecture.objects.filter(professor=professor)
+        lectures = LectureSerializer.setup_eager_loading(Lecture.objects.filter(professor=professor))
         serializer = LectureSerializer(lectures, many=True)
         return Response(serializer.data)
 
@@ -454,28 +470,15 @@ class ProfessorAttendanceSummaryView(APIView):
             return Response({"error": "접근 권한이 없습니다."}, status=403)
 
         data = []
-        lectures = Lecture.objects.filter(professor=professor)
-
-        for lecture in lectures:
-            total_weeks = lecture.total_weeks
-            total_students = lecture.students.count()
-            total_records = AttendanceRecord.objects.filter(session__lecture=lecture)
-
-            present = total_records.filter(status='present').count()
-            late = total_records.filter(status='late').count()
-            absent = total_records.filter(status='absent').count()
-            total = total_students * total_weeks
-
-            rate = round((present + late * 0.5) / total * 100, 1) if total else 0
-
+        for lecture in professor_lecture_stats(professor):
             data.append({
-                "lecture": lecture.name,
-                "출석률": rate,
-                "출석": present,
-                "지각": late,
-                "결석": absent,
-                "총 학생": total_students,
-                "총 주차": total_weeks
+                "lecture": lecture['name'],
+                "출석률": lecture['attendance_rate'],
+                "출석": lecture['present'],
+                "지각": lecture['late'],
+                "결석": lecture['absent'],
+                "총 학생": lecture['total_students'],
+                "총 주차": lecture['total_weeks']
             })
 
         return Response(data)
@@ -491,7 +494,8 @@ class SessionAttendanceListView(APIView):
             description="세션 코드 (예: CS101_2)",
             type=openapi.TYPE_STRING,
             required=True
-        )
+        ),
+        *LIST_MODE_PARAMETERS
     ])
 
     def get(self, request, session_code):
@@ -505,9 +509,10 @@ class SessionAttendanceListView(APIView):
         if session.lecture.professor != professor:
             return Response({"error": "해당 세션에 접근할 수 없습니다."}, status=403)
 
-        records = AttendanceRecord.objects.filter(session=session)
-        serializer = AttendanceRecordSerializer(records, many=True)
-        return Response(serializer.data)
+        records = AttendanceRecord.objects.filter(session=session).select_related('student').only(
+            'id', 'student__id', 'student__name', 'status', 'timestamp'
+        )
+        return list_response(self, request, records, lambda record: AttendanceRecordSerializer(record).data)
 
 
 # BLE 응답 출석 처리
@@ -531,57 +536,143 @@ class BLEAttendanceView(APIView):
         lecture_code = request.data.get("lecture_code")
         session_code = request.data.get("session_code")
 
+        roster = get_roster(session_code)
+        if roster is None or roster.lecture_code != lecture_code:
+            return Response({"error": "학생 또는 세션을 찾을 수 없습니다."}, status=404)
+
         try:
-            student = User.objects.get(id=student_id)
-            session = AttendanceSession.objects.get(session_code=session_code, lecture__code=lecture_code)
-        except (User.DoesNotExist, AttendanceSession.DoesNotExist):
+            student_id = int(student_id)
+        except (TypeError, ValueError):
             return Response({"error": "학생 또는 세션을 찾을 수 없습니다."}, status=404)
 
-        if not session.lecture.students.filter(id=student.id).exists():
+        if student_id not in roster.student_ids:
             return Response({"error": "수강하지 않는 학생입니다."}, status=403)
 
-        record, created = AttendanceRecord.objects.get_or_create(
-            session=session,
-            student=student,
-            defaults={"status": "present"}
+        created, status_code = _checkin(roster, student_id)
+
+        return Response({"message": checkin_message("BLE 출석", created, status_code)}, status=status_code)
+
+
+# BLE 일괄 출석 처리 (라즈베리파이 스캐너가 감지한 학생들을 한 번에 전송)
+class BLEBatchAttendanceView(APIView):
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="BLE 일괄 출석 처리",
+        operation_description="항목별 결과(result): created, duplicate, not_enrolled, session_not_found, invalid. "
+                              "observed_at 은 형식만 검증하며 출석 시각은 서버 수신 시각으로 기록됩니다.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["items"],
+            properties={
+                "items": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        required=["student_id", "session_code"],
+                        properties={
+                            "student_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            "session_code": openapi.Schema(type=openapi.TYPE_STRING),
+                            "observed_at": openapi.Schema(type=openapi.TYPE_STRING, format="date-time"),
+                        }
+                    )
+                ),
+            }
         )
+    )
+    def post(self, request):
+        items = request.data.get("items")
+        if not isinstance(items, list) or not items:
+            return Response({"error": "items 목록은 필수입니다."}, status=400)
 
-        return Response({"message": "BLE 출석 완료" if created else "이미 출석 처리됨"})
+        if len(items) > settings.ATTENDANCE_BLE_BATCH_MAX:
+            return Response({"error": f"한 번에 최대 {settings.ATTENDANCE_BLE_BATCH_MAX}건까지 처리할 수 있습니다."}, status=400)
+
+        results = []
+        accepted = {}
+        for index, item in enumerate(items):
+            result = {"index": index}
+            results.append(result)
+            if not isinstance(item, dict):
+                result["result"] = "invalid"
+                continue
+
+            session_code = item.get("session_code")
+            observed_at = item.get("observed_at")
+            result.update(student_id=item.get("student_id"), session_code=session_code)
+            try:
+                student_id = int(item.get("student_id"))
+            except (TypeError, ValueError):
+                result["result"] = "invalid"
+                continue
+            try:
+                # 형식은 맞지만 존재하지 않는 날짜(2024-02-30 등)는 ValueError
+                observed_ok = not observed_at or parse_datetime(str(observed_at)) is not None
+            except ValueError:
+                observed_ok = False
+            if not session_code or not observed_ok:
+                result["result"] = "invalid"
+                continue
+
+            # 세션별 명단은 캐시에서 조회하므로 배치 크기와 무관하게 검증 비용이 일정하다
+            roster = get_roster(str(session_code))
+            if roster is None:
+                result["result"] = "session_not_found"
+            elif student_id not in roster.student_ids:
+                result["result"] = "not_enrolled"
+            elif (roster.session_id, student_id) in accepted:
+                result["result"] = "duplicate"
+            else:
+                accepted[(roster.session_id, student_id)] = (roster, result)
+
+        created = bulk_record_checkins([(roster, key[1]) for key, (roster, _) in accepted.items()])
+        for key, (_, result) in accepted.items():
+            result["result"] = "created" if key in created else "duplicate"
+
+        return Response({
+            "created": len(created),
+            "results": results
+        })
 
 
 # QR 스캔 출석 처리
 class QRAttendanceView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]  # 사용자 id/role/name 만 쓰므로 조회 결과 캐시
 
     @swagger_auto_schema(
         operation_summary="QR 출석 처리",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
-            required=["session_id"],
+            required=["token"],
             properties={
-                "session_id": openapi.Schema(type=openapi.TYPE_STRING, description="세션 코드 (예: CS101_2)"),
+                "token": openapi.Schema(type=openapi.TYPE_STRING, description="QR 에 담긴 회전형 출석 토큰"),
+                "session_id": openapi.Schema(type=openapi.TYPE_STRING, description="(구버전) token 과 동일하게 처리"),
             }
         )
     )
     def post(self, request):
         user = request.user
-        session_id = str(request.data.get("session_id"))
-
-        try:
-            session = AttendanceSession.objects.get(session_code=session_id)
-        except AttendanceSession.DoesNotExist:
+        token = str(request.data.get("token") or request.data.get("session_id"))
+
+        # 서명/시간 구간 검증은 메모리에서 처리하고 세션 명단은 캐시에서 조회 (DB 는 출석 INSERT 만)
+        session_id = verify_token(token)
+        if session_id is not None:
+            roster = get_roster_by_id(session_id)
+        elif settings.QR_TOKEN['ALLOW_STATIC_CODE']:
+            roster = get_roster(token)
+        else:
+            return Response({"error": "만료되었거나 유효하지 않은 QR 코드입니다."}, status=403)
+
+        if roster is None:
             return Response({"error": "세션을 찾을 수 없습니다."}, status=404)
 
-        if not session.lecture.students.filter(id=user.id).exists():
+        if user.id not in roster.student_ids:
             return Response({"error": "수강하지 않는 학생입니다."}, status=403)
 
-        record, created = AttendanceRecord.objects.get_or_create(
-            session=session,
-            student=user,
-            defaults={"status": "present"}
-        )
+        created, status_code = _checkin(roster, user.id)
 
-        return Response({"message": "QR 출석 완료" if created else "이미 출석 처리됨"})
+        return Response({"message": checkin_message("QR 출석", created, status_code)}, status=status_code)
 
 
 # QR 코드 생성 뷰
@@ -603,24 +694,122 @@ class QRCodeGenerateView(APIView):
         session_id = request.query_params.get("session_id")
         if not session_id:
             return Response({"error": "session_id는 필수입니다."}, status=400)
-        session_id = str(session_id)
+        roster = get_roster(str(session_id))
+        if roster is None:
+            return Response({"error": "활성화된 세션을 찾을 수 없습니다."}, status=404)
+        if roster.professor_id != request.user.id:
+            return Response({"error": "해당 강의 교수만 QR 코드를 조회할 수 있습니다."}, status=403)
 
-        qr = qrcode.make(f"checkmate://attendance?session_id={session_id}")
-        buffered = BytesIO()
-        qr.save(buffered, format="PNG")
-        qr_base64 = base64.b64encode(buffered.getvalue()).decode()
+        qr = session_qr(roster.session_id)
+        if is_not_modified(request, qr.etag):
+            return set_cache_headers(Response(status=304), qr.etag)
 
-        return Response({"qr_image_base64": qr_base64})
+        return set_cache_headers(Response({
+            "qr_image_base64": qr.base64,
+            "refresh_in": seconds_until_rotation()
+        }), qr.etag)
 
 
 class RaspberryPiConnectionCheckView(APIView):
+    @swagger_auto_schema(
+        operation_summary="라즈베리파이 연결 상태",
+        operation_description="백그라운드에서 주기적으로 확인한 캐시 상태를 반환합니다 (connected, latency_ms, checked_at, error, age_seconds). "
+                              "classroom 을 지정하지 않으면 기본 장치를 확인합니다.",
+        manual_parameters=[
+            openapi.Parameter('classroom', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="강의실 이름"),
+        ]
+    )
     def get(self, request):
-        try:
-            response = requests.get("http://192.168.137.119:5000/ping", timeout=2)
-            if response.status_code == 200:
-                return Response({"connected": True})
-        except requests.RequestException:
-            return Response({"connected": False})
+        name = request.query_params.get('classroom')
+        if not name:
+            return Response(raspberry_pi_health())
+        classroom = Classroom.objects.filter(name=name).only('pi_host', 'pi_port').first()
+        if classroom is None:
+            return Response({"error": "강의실을 찾을 수 없습니다."}, status=404)
+        return Response(raspberry_pi_health(classroom.pi_base_url, classroom.id))
+
+
+# 강의실별 라즈베리파이 장치 목록과 상태 (캐시만 조회, 확인 전인 장치는 health=null)
+class RaspberryPiDeviceListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(operation_summary="강의실 라즈베리파이 장치 목록/상태")
+    def get(self, request):
+        classrooms = Classroom.objects.filter(is_active=True).order_by('name')
+        return Response([
+            {
+                "classroom": classroom.name,
+                "url": classroom.pi_base_url,
+                "capabilities": classroom.capabilities,
+                "last_seen": classroom.last_seen,
+                "health": cached_health(classroom.pi_base_url, classroom.id),
+            } for classroom in classrooms
+        ])
+
+
+# 라즈베리파이 알림 전송 상태 조회 (세션 시작/종료 응답의 pi_delivery.id)
+class RaspberryPiDeliveryStatusView(APIView):
+    @swagger_auto_schema(operation_summary="라즈베리파이 알림 전송 상태 조회")
+    def get(self, request, delivery_id):
+        delivery = get_delivery(delivery_id)
+        if delivery is None:
+            return Response({"error": "전송 기록을 찾을 수 없습니다."}, status=404)
+        return Response(delivery.as_dict())
+
+
+# 출석 저장 여부 조회 (지연 쓰기 모드에서 202 로 접수된 출석이 DB 에 반영됐는지 확인)
+class CheckinStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]  # 사용자 id/role/name 만 쓰므로 조회 결과 캐시
+
+    @swagger_auto_schema(
+        operation_summary="출석 저장 여부 조회",
+        operation_description="state: persisted(저장됨), queued(접수됨, 저장 대기), not_found(기록 없음). "
+                              "학생은 본인만, 교수는 student_id 로 다른 학생을 조회할 수 있습니다.",
+        manual_parameters=[
+            openapi.Parameter('session_code', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('student_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="교수 전용"),
+        ]
+    )
+    def get(self, request):
+        user = request.user
+        session_code = request.query_params.get('session_code')
+        if not session_code:
+            return Response({"error": "session_code는 필수입니다."}, status=400)
+
+        student_id = user.id
+        if user.role == 'professor' and request.query_params.get('student_id'):
+            try:
+                student_id = int(request.query_params['student_id'])
+            except ValueError:
+                return Response({"error": "student_id가 올바르지 않습니다."}, status=400)
+
+        session = AttendanceSession.objects.select_related('lecture').only(
+            'id', 'lecture__professor'
+        ).filter(session_code=session_code).first()
+        if session is None:
+            return Response({"error": "세션을 찾을 수 없습니다."}, status=404)
+        if user.role == 'professor' and session.lecture.professor_id != user.id:
+            return Response({"error": "담당 강의의 세션만 조회할 수 있습니다."}, status=403)
+
+        data = {"session_code": session_code, "student_id": student_id}
+        if checkin_queue.is_queued(session.id, student_id):
+            data["state"] = "queued"
+        else:
+            record_status = AttendanceRecord.objects.filter(
+                session_id=session.id, student_id=student_id
+            ).values_list('status', flat=True).first()
+            if record_status:
+                data["state"] = "persisted"
+            elif write_behind_enabled() and checkin_queue.is_spooled(session.id, student_id):
+                # 다른 워커 프로세스에 접수된 출석
+                data["state"] = "queued"
+            else:
+                data["state"] = "not_found"
+            data["status"] = record_status
+        if write_behind_enabled():
+            data["queue"] = checkin_queue.stats()
+        return Response(data)
 
 # 교수용: 주차별 전체 학생 출결 조회 API
 class WeeklyAttendanceView(APIView):
@@ -654,18 +843,17 @@ class WeeklyAttendanceView(APIView):
         except AttendanceSession.DoesNotExist:
             return Response({"error": "해당 주차의 세션이 존재하지 않습니다."}, status=404)
 
-        results = []
-        for student in lecture.students.all():
-            record, created = AttendanceRecord.objects.get_or_create(
-                session=session,
-                student=student,
-                defaults={"status": "absent"}
-            )
-            results.append({
-                "student_id": student.id,
-                "student_name": student.name,
-                "status": record.status
-            })
+        # 'close' 모드에서는 세션 종료 시 결석 처리하므로 조회는 데이터를 변경하지 않는다
+        if settings.ATTENDANCE_ABSENT_FILL == 'read':
+            fill_absent(session)
+
+        results = [
+            {
+                "student_id": row['id'],
+                "student_name": row['name'],
+                "status": row['status']
+            } for row in session_roster(session)
+        ]
 
         return Response({
             "lecture": lecture.name,
@@ -674,6 +862,54 @@ class WeeklyAttendanceView(APIView):
         })
 
 
+# 교수용: 학기 전체 출석부(학생 × 주차) 내보내기
+class AttendanceExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="학기 출석부 내보내기 (CSV/XLSX)",
+        manual_parameters=[
+            openapi.Parameter('lecture_code', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True, description="강의 코드"),
+            openapi.Parameter('file_type', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['csv', 'xlsx'], description="파일 형식 (기본 csv)"),
+        ]
+    )
+    def get(self, request):
+        professor = request.user
+        lecture_code = request.query_params.get("lecture_code")
+        file_type = request.query_params.get("file_type", "csv")
+
+        if professor.role != 'professor':
+            return Response({"error": "접근 권한이 없습니다."}, status=403)
+
+        if not lecture_code:
+            return Response({"error": "lecture_code는 필수입니다."}, status=400)
+
+        if file_type not in ('csv', 'xlsx'):
+            return Response({"error": "file_type은 csv 또는 xlsx 입니다."}, status=400)
+
+        try:
+            lecture = Lecture.objects.get(code=lecture_code, professor=professor)
+        except Lecture.DoesNotExist:
+            return Response({"error": "강의를 찾을 수 없습니다."}, status=404)
+
+        filename = f"{lecture.code}_attendance.{file_type}"
+        if file_type == 'csv':
+            response = StreamingHttpResponse(iter_csv(gradebook_rows(lecture)), content_type="text/csv; charset=utf-8")
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        try:
+            output = write_xlsx(gradebook_rows(lecture))
+        except ImportError:
+            return Response({"error": "xlsx 내보내기를 사용하려면 openpyxl 패키지가 필요합니다."}, status=501)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+
 # 학생용: 내 수강 강의 리스트 조회
 class MyLectureListView(APIView):
     permission_classes = [IsAuthenticated]
@@ -684,7 +920,9 @@ class MyLectureListView(APIView):
         if user.role != 'student':
             return Response({"error": "학생만 접근 가능합니다."}, status=403)
 
-        lectures = Lecture.objects.filter(students=user)
+        lectures = Lecture.objects.filter(students=user).select_related('professor').only(
+            'id', 'code', 'name', 'professor__name'
+        )
         return Response([
             {
                 "lecture_id": l.id,
@@ -702,6 +940,7 @@ class LectureStudentListView(APIView):
         operation_summary="특정 강의 수강 학생 목록 조회",
         manual_parameters=[
             openapi.Parameter('lecture_code', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True, description="강의 코드"),
+            *LIST_MODE_PARAMETERS
         ]
     )
     def get(self, request):
@@ -716,26 +955,28 @@ class LectureStudentListView(APIView):
         except Lecture.DoesNotExist:
             return Response({"error": "해당 강의를 찾을 수 없습니다."}, status=404)
 
-        students = lecture.students.all()
-        return Response([
-            {
-                "id": s.id,
-                "username": s.username,
-                "name": s.name,
-                "major": s.major,
-                "department": s.department,
-            } for s in students
-        ])
+        students = lecture.students.values('id', 'username', 'name', 'major', 'department')
+        return list_response(self, request, students, dict)
 
+
+# QR 이미지에는 지금 유효한 출석 토큰이 담기므로 해당 강의 교수에게만 보여준다 (세션 코드는 추측 가능)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
 def qr_image_view(request):
     session_code = request.GET.get("session_code")
     if not session_code:
         return HttpResponse("session_code 파라미터가 필요합니다.", status=400)
 
-    # QR 생성
-    qr = qrcode.make(f"checkmate://attendance?session_code={session_code}")
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
+    roster = get_roster(session_code)
+    if roster is None:
+        return HttpResponse("활성화된 세션을 찾을 수 없습니다.", status=404)
+    if roster.professor_id != request.user.id:
+        return HttpResponse("해당 강의 교수만 QR 코드를 조회할 수 있습니다.", status=403)
+
+    # QR 생성 (렌더링 결과 캐시 재사용, 토큰 회전 주기마다 이미지가 바뀜)
+    qr = session_qr(roster.session_id)
+    if is_not_modified(request, qr.etag):
+        return set_cache_headers(HttpResponse(status=304), qr.etag)
 
     # 이미지 응답
-    return HttpResponse(buffer.getvalue(), content_type="image/png")
+    return set_cache_headers(HttpResponse(qr.png, content_type="image/png"), qr.etag)
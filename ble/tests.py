@@ -1,3 +1,64 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .utils import ble_controller
+from .utils.ble_controller import AdvertiserWorker
+
+
+class AdvertiserWorkerTests(SimpleTestCase):
+    def setUp(self):
+        self.worker = AdvertiserWorker()
+        self.calls = []
+        # 실제 BLE 전환(1초 대기) 대신 호출만 기록
+        for name in ('start_ble_advertising', 'stop_ble_advertising', 'update_ble_payload'):
+            patcher = mock.patch.object(ble_controller, name, side_effect=lambda *args, name=name: self.calls.append(
+                (name, args)
+            ))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def submit(self, action, **params):
+        result = self.worker.submit(action, **params)
+        self.worker.join()
+        return result
+
+    def test_duplicate_start_is_not_queued(self):
+        self.assertTrue(self.submit('start', session_id='L_1', lecture_id='L')[1])
+        self.assertFalse(self.submit('start', session_id='L_1', lecture_id='L')[1])
+        self.assertEqual(self.worker.status()['advertising']['session_id'], 'L_1')
+        self.assertEqual(self.worker.noops, 1)
+        self.assertEqual([name for name, _ in self.calls], ['start_ble_advertising'])
+
+    def test_switching_sessions_stops_previous_first(self):
+        self.submit('start', session_id='L_1')
+        self.submit('start', session_id='L_2')
+        self.submit('rotate', payload='abc')
+        self.assertEqual(self.calls, [
+            ('start_ble_advertising', (None, 'L_1', None)),
+            ('stop_ble_advertising', ('L_1',)),
+            ('start_ble_advertising', (None, 'L_2', None)),
+            ('update_ble_payload', ('L_2', 'abc')),
+        ])
+        # 다른 세션의 종료 요청은 무시
+        self.assertFalse(self.submit('stop', session_id='L_1')[1])
+        self.assertTrue(self.submit('stop', session_id='L_2')[1])
+        self.assertIsNone(self.worker.status()['advertising']['session_id'])
+
+    def test_failed_start_can_be_retried(self):
+        ble_controller.start_ble_advertising.side_effect = [RuntimeError('adapter busy'), None]
+        with self.assertLogs('checkmate.events', 'ERROR'):
+            self.assertTrue(self.submit('start', session_id='L_1')[1])
+        self.assertIsNone(self.worker.status()['target_session'])
+
+        self.assertTrue(self.submit('start', session_id='L_1')[1])
+        self.assertEqual(self.worker.status()['advertising']['session_id'], 'L_1')
+
+    def test_failed_stop_keeps_stop_available(self):
+        self.submit('start', session_id='L_1')
+        ble_controller.stop_ble_advertising.side_effect = [RuntimeError('adapter busy'), None]
+        with self.assertLogs('checkmate.events', 'ERROR'):
+            self.submit('stop', session_id='L_1')
+        self.assertEqual(self.worker.status()['target_session'], 'L_1')
+        self.assertTrue(self.submit('stop', session_id='L_1')[1])
+        self.assertIsNone(self.worker.status()['advertising']['session_id'])
@@ -1,8 +1,10 @@
 # ble/urls.py
 from django.urls import path
-from .views import mock_advertise, mock_stop_session
+from .views import mock_advertise, mock_stop_session, rotate_payload, advertiser_status
 
 urlpatterns = [
     path("advertise/", mock_advertise, name="mock_advertise"),
     path("stop-session/", mock_stop_session, name="mock_stop_session"),
-]
\ No newline at end of file
+    path("rotate/", rotate_payload, name="ble_rotate_payload"),
+    path("status/", advertiser_status, name="ble_advertiser_status"),
+]
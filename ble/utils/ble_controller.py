@@ -1,21 +1,164 @@
+import contextvars
+import itertools
+import logging
+import queue
+import threading
 import time
 from datetime import datetime
 
-def start_ble_advertising(lecture_id, session_id, professor_username):
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{timestamp}] [BLE START] 광고 시작됨")
-    print(f"  - 강의 ID: {lecture_id}")
-    print(f"  - 세션 ID: {session_id}")
-    print(f"  - 교수 Username: {professor_username}")
+from Checkmate_Backend.eventlog import log_event
 
+def start_ble_advertising(lecture_id, session_id, professor_username):
     # 실제 BLE 광고 로직은 여기 들어가야 함
     # 예시용으로 1초 대기
     time.sleep(1)
+    log_event('ble.advertise.started', session=session_id, lecture=lecture_id, professor=professor_username)
 
 def stop_ble_advertising(session_id):
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{timestamp}] [BLE STOP] 광고 종료됨")
-    print(f"  - 세션 ID: {session_id}")
-
     # 실제 BLE 종료 로직은 여기 들어가야 함
-    time.sleep(1)
\ No newline at end of file
+    time.sleep(1)
+    log_event('ble.advertise.stopped', session=session_id)
+
+def update_ble_payload(session_id, payload):
+    # 실제 BLE 광고 데이터 교체 로직은 여기 들어가야 함
+    log_event('ble.payload.rotated', session=session_id)
+
+
+class _Timing:
+    """소요 시간 누적 통계 (ms)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = None
+
+    def observe(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2) if self.last_ms is not None else None,
+        }
+
+
+class AdvertiserWorker:
+    """BLE 광고 상태를 소유하는 장기 실행 스레드
+    뷰는 명령(start/stop/rotate)을 큐에 넣고 바로 반환하며, 실제 광고 전환은 이 스레드에서만 일어난다."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ids = itertools.count(1)
+        # 큐에 쌓인 명령까지 반영한 목표 세션 - 같은 세션의 중복 시작 요청을 큐에 넣지 않기 위해 사용
+        self._target_session = None
+        self._target_command = None  # 목표 세션을 마지막으로 바꾼 명령 id
+        self.state = {"session_id": None, "lecture_id": None, "professor_username": None, "since": None}
+        self.timings = {name: _Timing() for name in ("queue_wait", "start", "stop", "rotate")}
+        self.noops = 0
+
+    def submit(self, action, **params):
+        """명령을 큐에 넣고 (command_id, queued 여부) 반환 - 이미 목표 상태면 큐에 넣지 않는다"""
+        with self._lock:
+            session_id = params.get("session_id")
+            if action == "start" and session_id == self._target_session:
+                self.noops += 1
+                return None, False
+            if action == "stop":
+                if self._target_session is None or session_id not in (None, self._target_session):
+                    self.noops += 1
+                    return None, False
+                self._target_session = None
+            elif action == "start":
+                self._target_session = session_id
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ble-advertiser", daemon=True)
+                self._thread.start()
+
+            command_id = next(self._ids)
+            if action in ("start", "stop"):
+                self._target_command = command_id
+            # 요청의 로그 컨텍스트(request_id)를 워커 스레드에서 이어 쓰도록 함께 넘긴다
+            self._queue.put((command_id, action, params, time.perf_counter(), contextvars.copy_context()))
+        return command_id, True
+
+    def _run(self):
+        while True:
+            command_id, action, params, queued_at, context = self._queue.get()
+            self.timings["queue_wait"].observe((time.perf_counter() - queued_at) * 1000)
+            try:
+                context.run(getattr(self, f"_{action}"), **params)
+            except Exception:
+                self._reconcile_target(command_id)
+                context.run(
+                    log_event, 'ble.command.failed', level=logging.ERROR, exc_info=True,
+                    command_id=command_id, action=action, session=params.get("session_id")
+                )
+            finally:
+                self._queue.task_done()
+
+    def _reconcile_target(self, command_id):
+        """실패한 시작/종료 명령 뒤에 목표를 바꾼 명령이 없으면 목표를 실제 광고 상태로 되돌린다
+        (그대로 두면 같은 세션의 재시도 요청이 중복으로 취급되어 광고 없이 200 이 나간다)"""
+        with self._lock:
+            if self._target_command == command_id:
+                self._target_session = self.state["session_id"]
+
+    def join(self):
+        """큐에 넣은 명령이 모두 처리될 때까지 대기 (테스트/종료용)"""
+        self._queue.join()
+
+    def _timed(self, name, fn, *args):
+        started = time.perf_counter()
+        fn(*args)
+        self.timings[name].observe((time.perf_counter() - started) * 1000)
+
+    def _start(self, session_id, lecture_id=None, professor_username=None):
+        if self.state["session_id"] == session_id:
+            self.noops += 1
+            return
+        if self.state["session_id"] is not None:
+            self._stop(self.state["session_id"])
+
+        self._timed("start", start_ble_advertising, lecture_id, session_id, professor_username)
+        self.state.update(
+            session_id=session_id,
+            lecture_id=lecture_id,
+            professor_username=professor_username,
+            since=datetime.now().isoformat(timespec='seconds'),
+        )
+
+    def _stop(self, session_id=None):
+        current = self.state["session_id"]
+        if current is None or session_id not in (None, current):
+            self.noops += 1
+            return
+
+        self._timed("stop", stop_ble_advertising, current)
+        self.state.update(session_id=None, lecture_id=None, professor_username=None, since=None)
+
+    def _rotate(self, payload):
+        if self.state["session_id"] is None:
+            self.noops += 1
+            return
+        self._timed("rotate", update_ble_payload, self.state["session_id"], payload)
+
+    def status(self):
+        return {
+            "advertising": dict(self.state),
+            "target_session": self._target_session,
+            "queue_depth": self._queue.qsize(),
+            "noops": self.noops,
+            "timings": {name: timing.as_dict() for name, timing in self.timings.items()},
+        }
+
+
+advertiser = AdvertiserWorker()
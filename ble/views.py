@@ -1,10 +1,11 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime
 
-# ✅ 라즈베리파이 BLE 컨트롤러 함수 임포트
-from ble.utils.ble_controller import start_ble_advertising, stop_ble_advertising
+from Checkmate_Backend.eventlog import log_event
+
+# ✅ 라즈베리파이 BLE 광고 워커 (명령 큐에 넣고 즉시 반환)
+from ble.utils.ble_controller import advertiser
 
 @api_view(['POST'])
 def mock_advertise(request):
@@ -12,33 +13,41 @@ def mock_advertise(request):
     session_id = request.data.get('session_id')
     professor_username = request.data.get('professor_username')
 
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"\n[BLE 광고 시작 요청] {timestamp}")
-    print(f"  - 강의 ID: {lecture_id}")
-    print(f"  - 세션 ID: {session_id}")
-    print(f"  - 교수 username: {professor_username}")
-
-    try:
-        # ✅ 실제 BLE 광고 시작 함수 호출
-        start_ble_advertising(lecture_id, session_id, professor_username)
-        print("  ✅ BLE 광고 성공\n")
-        return Response({"message": "BLE 광고 시작됨"}, status=status.HTTP_200_OK)
-    except Exception as e:
-        print(f"  ❌ BLE 광고 실패: {e}")
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    log_event('ble.advertise.requested', session=session_id, lecture=lecture_id, professor=professor_username)
+
+    if not session_id:
+        return Response({"error": "session_id는 필수입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    command_id, queued = advertiser.submit(
+        "start",
+        session_id=session_id,
+        lecture_id=lecture_id,
+        professor_username=professor_username
+    )
+    if not queued:
+        return Response({"message": "이미 광고 중인 세션"}, status=status.HTTP_200_OK)
+    return Response({"message": "BLE 광고 시작 요청됨", "command_id": command_id}, status=status.HTTP_202_ACCEPTED)
 
 @api_view(['POST'])
 def mock_stop_session(request):
     session_id = request.data.get('session_id')
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"\n[BLE 광고 종료 요청] {timestamp}")
-    print(f"  - 세션 ID: {session_id}")
-
-    try:
-        # ✅ 실제 BLE 광고 종료 함수 호출
-        stop_ble_advertising(session_id)
-        print("  ✅ BLE 종료 성공\n")
-        return Response({"message": "BLE 광고 종료됨"}, status=status.HTTP_200_OK)
-    except Exception as e:
-        print(f"  ❌ BLE 종료 실패: {e}")
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+    log_event('ble.stop.requested', session=session_id)
+
+    command_id, queued = advertiser.submit("stop", session_id=session_id)
+    if not queued:
+        return Response({"message": "광고 중인 세션이 아님"}, status=status.HTTP_200_OK)
+    return Response({"message": "BLE 광고 종료 요청됨", "command_id": command_id}, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['POST'])
+def rotate_payload(request):
+    payload = request.data.get('payload')
+    if not payload:
+        return Response({"error": "payload는 필수입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    command_id, _ = advertiser.submit("rotate", payload=payload)
+    return Response({"message": "BLE 페이로드 교체 요청됨", "command_id": command_id}, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+def advertiser_status(request):
+    # 현재 광고 상태, 큐 대기 시간 및 광고 전환 소요 시간 통계
+    return Response(advertiser.status())
@@ -0,0 +1,86 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from Checkmate_Backend.lru import TTLCache
+from .models import User
+
+# 출석 체크 요청은 대부분 토큰 검증 후 사용자 id/role/name 만 쓰므로,
+# 검증된 토큰(jti)별로 사용자 조회 결과를 잠깐 캐시해 요청마다 User 를 SELECT 하지 않는다.
+# 다른 필드는 지연 로딩(deferred)되므로 전역 기본값이 아니라 이 필드만 쓰는 출석 체크 뷰에만 지정한다
+# (내 정보 조회처럼 다른 필드를 쓰는 뷰에 쓰면 필드마다 추가 조회가 생긴다).
+# 사용자 저장/삭제 시 같은 프로세스의 캐시는 바로 비우고, 다른 워커는 TTL_SECONDS 안에 반영된다.
+
+_PROJECTED = {'id', 'username', 'name', 'role', 'is_active'}
+# Model.from_db 는 값이 모델 필드 정의 순서대로 오기를 기대한다
+FIELDS = tuple(f.attname for f in User._meta.concrete_fields if f.attname in _PROJECTED)
+FIELDS_WITH_PASSWORD = tuple(f.attname for f in User._meta.concrete_fields if f.attname in _PROJECTED | {'password'})
+
+_projections = TTLCache(
+    maxsize=settings.JWT_USER_CACHE['MAX_TOKENS'],
+    ttl=settings.JWT_USER_CACHE['TTL_SECONDS'],
+)
+
+
+def _fields():
+    # 비밀번호 변경 시 토큰 폐기(CHECK_REVOKE_TOKEN)를 켠 경우에만 해시를 함께 가져온다
+    return FIELDS_WITH_PASSWORD if api_settings.CHECK_REVOKE_TOKEN else FIELDS
+
+
+def invalidate_user(user_id):
+    """사용자의 모든 토큰 캐시 제거 (비활성화/역할 변경/비밀번호 변경 등)"""
+    _projections.discard_if(lambda jti, entry: entry[0] == user_id)
+
+
+def clear():
+    _projections.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication 과 같은 검증(서명/만료/is_active/비밀번호 변경)을 하되 사용자 조회를 jti 별로 캐시"""
+
+    def cached_user(self, validated_token):
+        """캐시에 있으면 사용자, 없으면 None (DB 에 접근하지 않으므로 이벤트 루프에서 바로 호출 가능)"""
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        entry = _projections.get(jti) if jti else None
+        if entry is None or entry[1] != _fields():
+            return None
+        return self._build(validated_token, entry[1], entry[2])
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = self.cached_user(validated_token)
+        if user is not None:
+            return user
+
+        fields = _fields()
+        values = self.user_model.objects.filter(
+            **{api_settings.USER_ID_FIELD: validated_token[api_settings.USER_ID_CLAIM]}
+        ).values_list(*fields).first()
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if jti:
+            # 토큰 만료 이후까지 남지 않도록
+            ttl = min(settings.JWT_USER_CACHE['TTL_SECONDS'], validated_token.get('exp', 0) - time.time())
+            if ttl > 0:
+                _projections.set(jti, (values[fields.index('id')], fields, values), ttl=ttl)
+        return self._build(validated_token, fields, values)
+
+    def _build(self, validated_token, fields, values):
+        user = User.from_db(DEFAULT_DB_ALIAS, fields, values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfiguredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """반복 횟수를 PASSWORD_HASHING['PBKDF2_ITERATIONS'] 로 정하는 PBKDF2 (저장 형식은 기본 PBKDF2 와 같음)
+    반복 횟수를 바꾸면 기존 비밀번호는 다음 로그인 때 새 횟수로 재해시된다"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHING['PBKDF2_ITERATIONS']
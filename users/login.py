@@ -0,0 +1,93 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from Checkmate_Backend.eventlog import log_event
+
+# 비밀번호 검증(PBKDF2 등)은 요청 하나에 수십 ms 의 CPU 를 쓴다.
+# 수업 직전 로그인이 몰릴 때 요청 스레드마다 동시에 해시를 돌리면 출석 체크 같은 다른 요청까지 CPU 를 뺏기므로,
+# 해시 계산만 크기가 정해진 전용 스레드 풀에서 하고(hashlib 은 계산 중 GIL 을 놓는다) 대기열이 넘치면 바로 503 으로 돌려보낸다.
+# DB 저장은 풀 스레드가 아니라 요청 스레드에서 한다.
+
+
+def _config(key):
+    return settings.LOGIN[key]
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "로그인 요청이 많습니다. 잠시 후 다시 시도해주세요."
+    default_code = 'login_busy'
+
+
+class HashPool:
+    """비밀번호 해시 전용 스레드 풀 - 동시 계산 수는 HASH_WORKERS, 대기 작업 수는 HASH_QUEUE 로 제한"""
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # 로그인을 처리하지 않는 프로세스(관리 명령 등)에서 스레드가 뜨지 않도록 첫 사용 시점에 만든다
+        with self._lock:
+            if self._executor is None:
+                workers = _config('HASH_WORKERS')
+                self._slots = threading.BoundedSemaphore(workers + _config('HASH_QUEUE'))
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def run(self, fn, *args):
+        if self._executor is None:
+            self._start()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            log_event('login.busy', level=logging.WARNING)
+            raise LoginBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # 시간 초과로 포기한 작업도 끝날 때까지는 자리를 차지한다
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=_config('HASH_TIMEOUT_SECONDS'))
+        except TimeoutError:
+            log_event('login.hash_timeout', level=logging.WARNING)
+            raise LoginBusy()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+hash_pool = HashPool()
+
+
+def _verify(password, encoded):
+    """(일치 여부, 재해시 값) - 현재 해시 프로필과 다르게 저장된 비밀번호면 재해시 값도 여기서 계산"""
+    upgraded = []
+    correct = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return correct, upgraded[0] if upgraded else None
+
+
+def verify_password(user, password):
+    """user.check_password 와 같되 해시 계산은 hash_pool 에서 하고, 필요하면 현재 프로필로 재해시해 저장"""
+    correct, upgraded = hash_pool.run(_verify, password, user.password)
+    if upgraded is not None:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+        log_event('login.password_rehashed', user=user.pk)
+    return correct
+
+
+def hash_password(password):
+    """make_password 를 hash_pool 에서 (회원가입 등)"""
+    return hash_pool.run(make_password, password)
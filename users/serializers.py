@@ -1,6 +1,7 @@
 # users/serializers.py
 
 from rest_framework import serializers
+from .login import hash_password, verify_password
 from .models import User
 
 class LoginSerializer(serializers.Serializer):
@@ -16,7 +17,8 @@ class LoginSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError("사용자를 찾을 수 없습니다.")
 
-        if not user.check_password(password):
+        # 해시 계산은 로그인 전용 작업 풀에서 (몰리면 LoginBusy → 503)
+        if not verify_password(user, password):
             raise serializers.ValidationError("비밀번호가 틀렸습니다.")
 
         data['user'] = user
@@ -60,7 +62,7 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         password = validated_data.pop('password')
         user = User(**validated_data)
-        user.set_password(password)
+        user.password = hash_password(password)
         user.save()
         return user
 
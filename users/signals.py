@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import authentication
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_token_cache_on_save(sender, instance, update_fields=None, **kwargs):
+    # 로그인 시 last_login 만 갱신하는 저장은 인증 결과에 영향이 없다
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    authentication.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_token_cache_on_delete(sender, instance, **kwargs):
+    authentication.invalidate_user(instance.pk)
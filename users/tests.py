@@ -1,3 +1,160 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import authentication, throttling
+from .authentication import CachedJWTAuthentication
+from .login import HashPool, LoginBusy
+from .models import User
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='stu', email='stu@test.invalid', name='학생', role='student')
+
+    def setUp(self):
+        authentication.clear()
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self, backend=CachedJWTAuthentication):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = backend().authenticate(request)
+        return user, len(queries)
+
+    def test_repeated_requests_skip_user_query(self):
+        user, first = self.authenticate()
+        self.assertEqual((user.id, user.role, user.name), (self.user.id, 'student', '학생'))
+        self.assertEqual(first, 1)
+
+        user, second = self.authenticate()
+        self.assertEqual(second, 0)
+        self.assertEqual(user.username, 'stu')
+        self.assertTrue(user.is_authenticated)
+        _, uncached = self.authenticate(JWTAuthentication)
+        self.assertEqual(uncached, 1)
+
+        # 캐시하지 않은 필드는 필요할 때만 조회
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(user.email, 'stu@test.invalid')
+        self.assertEqual(len(queries), 1)
+
+    def test_deactivation_and_deletion_invalidate_cache(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+        self.user.is_active = True
+        self.user.save()
+        self.authenticate()
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_user_info_loads_full_row_in_one_query(self):
+        # 전역 기본 인증은 캐시하지 않는 JWTAuthentication - 지연 로딩 필드로 쿼리가 늘지 않는다
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['email'], 'stu@test.invalid')
+
+    def test_last_login_update_keeps_cache(self):
+        self.authenticate()
+        self.user.save(update_fields=['last_login'])
+        _, count = self.authenticate()
+        self.assertEqual(count, 0)
+
+
+# 테스트에서는 해시 반복 횟수를 낮춘다
+@override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, 'PBKDF2_ITERATIONS': 1000})
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='stu', email='stu@test.invalid', name='학생', role='student',
+                                       password=make_password('pw-1234', hasher='pbkdf2_sha1'))
+
+    def setUp(self):
+        throttling.clear()
+
+    def login(self, username='stu', password='pw-1234', ip='10.0.0.1'):
+        return self.client.post('/api/users/login/', {'username': username, 'password': password},
+                                content_type='application/json', REMOTE_ADDR=ip)
+
+    def test_login_rehashes_with_configured_profile(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['user_id'], self.user.id)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, 'PBKDF2_ITERATIONS': 1200}):
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1200$'))
+        self.assertEqual(self.login(password='wrong').status_code, 400)
+
+    def test_rate_limited_per_username_and_ip(self):
+        limits = {'username': (2, 1), 'ip': (3, 1)}
+        with override_settings(LOGIN={**settings.LOGIN, 'RATE_LIMITS': limits}), \
+                self.assertLogs('checkmate.events', 'WARNING'):
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            response = self.login()
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            # 다른 사용자명은 같은 IP 의 남은 한도까지 허용
+            self.assertEqual(self.login(username='other').status_code, 400)
+            self.assertEqual(self.login(username='other2').status_code, 429)
+            self.assertEqual(self.login(username='other2', ip='10.0.0.2').status_code, 400)
+
+    def test_only_failed_logins_count_against_username(self):
+        limits = {'username': (2, 1), 'ip': (100, 1)}
+        with override_settings(LOGIN={**settings.LOGIN, 'RATE_LIMITS': limits}):
+            for _ in range(3):
+                self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            with self.assertLogs('checkmate.events', 'WARNING'):
+                self.assertEqual(self.login().status_code, 429)
+
+    def test_ip_limit_ignores_forwarded_for(self):
+        limits = {'username': (10, 1), 'ip': (1, 1)}
+        with override_settings(LOGIN={**settings.LOGIN, 'RATE_LIMITS': limits}), \
+                self.assertLogs('checkmate.events', 'WARNING'):
+            self.assertEqual(self.login(username='a').status_code, 400)
+            response = self.client.post('/api/users/login/', {'username': 'b', 'password': 'x'},
+                                        content_type='application/json', REMOTE_ADDR='10.0.0.1',
+                                        HTTP_X_FORWARDED_FOR='203.0.113.9')
+            self.assertEqual(response.status_code, 429)
+
+    def test_saturated_hash_pool_rejects_immediately(self):
+        pool = HashPool()
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocked():
+            started.set()
+            release.wait(5)
+
+        with override_settings(LOGIN={**settings.LOGIN, 'HASH_WORKERS': 1, 'HASH_QUEUE': 0}):
+            worker = threading.Thread(target=pool.run, args=(blocked,))
+            worker.start()
+            started.wait(5)
+            with self.assertLogs('checkmate.events', 'WARNING'), self.assertRaises(LoginBusy):
+                pool.run(make_password, 'pw')
+            release.set()
+            worker.join()
+            self.assertTrue(pool.run(make_password, 'pw').startswith('pbkdf2_sha256$'))
@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from Checkmate_Backend.eventlog import log_event
+from Checkmate_Backend.lru import TTLCache
+
+# 로그인 시도 횟수 제한 - 사용자명별, IP 별 토큰 버킷.
+# 비밀번호 해시 전에 검사하므로 무차별 대입 요청은 해시 CPU 를 쓰기 전에 429 로 끝난다.
+# IP 버킷은 시도마다, 사용자명 버킷은 로그인에 실패했을 때만 차감한다 (정상 사용자는 자기 계정이 잠기지 않음).
+# IP 는 클라이언트가 바꿀 수 있는 X-Forwarded-For 가 아니라 REMOTE_ADDR 로 구분한다
+# (프록시 뒤에 둘 때는 프록시/서버 설정에서 REMOTE_ADDR 에 실제 주소를 넣는다).
+# 워커 프로세스마다 따로 센다 (프로세스가 N 개면 실제 허용량은 최대 N 배).
+
+_lock = threading.Lock()
+_buckets = TTLCache(maxsize=settings.LOGIN['MAX_BUCKETS'], ttl=3600)
+
+
+def _config(key):
+    return settings.LOGIN[key]
+
+
+def clear():
+    _buckets.clear()
+
+
+def _tokens(kind, key, now):
+    """(현재 토큰 수, 초당 충전량, 가득 찰 때까지의 초)"""
+    burst, per_minute = _config('RATE_LIMITS')[kind]
+    rate = per_minute / 60
+    tokens, updated = _buckets.get((kind, key), (burst, now))
+    return min(burst, tokens + (now - updated) * rate), rate, burst / rate
+
+
+def _take(charged, checked, now):
+    """charged/checked 의 모든 버킷에 토큰이 있으면 charged 버킷에서만 하나씩 꺼내고 0,
+    아니면 아무것도 꺼내지 않고 다시 시도할 수 있을 때까지의 초"""
+    with _lock:
+        states = []
+        wait = 0.0
+        for kind, key in (*charged, *checked):
+            tokens, rate, refill_seconds = _tokens(kind, key, now)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate)
+            states.append((kind, key, tokens, refill_seconds))
+        if wait:
+            return wait
+        for kind, key, tokens, refill_seconds in states[:len(charged)]:
+            # 가득 찰 시간이 지나면 버킷을 지워도 결과가 같다
+            _buckets.set((kind, key), (tokens - 1, now), ttl=refill_seconds)
+        return 0.0
+
+
+def record_failure(username):
+    """로그인 실패 - 사용자명 버킷에서 토큰 하나를 뺀다 (이미 비었으면 그대로)"""
+    if not isinstance(username, str) or not username:
+        return
+    now = time.monotonic()
+    with _lock:
+        tokens, _, refill_seconds = _tokens('username', username, now)
+        _buckets.set(('username', username), (max(tokens - 1, 0), now), ttl=refill_seconds)
+
+
+class LoginRateThrottle(BaseThrottle):
+    """로그인 시도를 사용자명별/IP 별 토큰 버킷으로 제한 (LOGIN['RATE_LIMITS']), 초과 시 429 + Retry-After
+    사용자명 버킷은 여기서 검사만 하고, 실패한 로그인에서 record_failure 로 차감한다"""
+
+    def allow_request(self, request, view):
+        ip = request.META.get('REMOTE_ADDR')
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        checked = [('username', username)] if isinstance(username, str) and username else []
+        self._wait = _take([('ip', ip)], checked, time.monotonic())
+        if self._wait:
+            log_event('login.throttled', level=logging.WARNING, ip=ip, username=username)
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
@@ -8,9 +8,11 @@ from rest_framework import status, generics
 
 from .models import User
 from .serializers import LoginSerializer, RegisterSerializer, UserInfoSerializer
+from .throttling import LoginRateThrottle, record_failure
 
 
 class LoginAPIView(APIView):
+    throttle_classes = [LoginRateThrottle]
 
     @swagger_auto_schema(request_body=LoginSerializer)  # ✅ Swagger용 추가
     def post(self, request):
@@ -25,6 +27,8 @@ class LoginAPIView(APIView):
                 'role': user.role,
                 'name': user.name
             })
+        # 로그인 실패만 사용자명별 시도 횟수에 센다
+        record_failure(request.data.get('username') if hasattr(request.data, 'get') else None)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 class RegisterAPIView(generics.CreateAPIView):
     queryset = User.objects.all()